@@ -0,0 +1,103 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compact import widen_numeric
+from normalization import distinct_rows
+
+logger = logging.getLogger(__name__)
+
+QUANTITY_COLUMN = "수량[출력]"
+
+
+@dataclass
+class OrderLineGroups:
+    """
+    Order lines collapsed into one aggregated row per 상품명구분 key.
+
+    Kept by an aggregated run so its line-level output can be regenerated.
+    """
+
+    # Cleaned order lines, before aggregation
+    lines: pd.DataFrame
+    # Aggregated row of each line
+    groups: np.ndarray
+    # Aggregated row behind each output row of the run; expanded rows hold
+    # -1 - their aggregated row, as ORDER_ROW_COLUMN does
+    row_groups: Optional[np.ndarray] = None
+    # Last stage the aggregated run made
+    stage: Optional[str] = None
+
+    @property
+    def group_count(self) -> int:
+        """Number of aggregated rows."""
+        return int(self.groups.max()) + 1 if len(self.groups) else 0
+
+    def line_positions(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Locate the rows of each order line among the run's output rows.
+
+        Every line maps to the order row of its aggregated row, and to each of
+        that row's expanded rows, which keep their output order.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The output order row of
+            each line; the expanded output rows of every line, in line order;
+            and the line of each of those expanded rows
+        """
+        is_order_row = self.row_groups >= 0
+        order_rows = np.empty(self.group_count, dtype=np.int64)
+        order_rows[self.row_groups[is_order_row]] = np.flatnonzero(is_order_row)
+
+        expanded = np.flatnonzero(~is_order_row)
+        expanded_groups = -1 - self.row_groups[expanded]
+        by_group = expanded[np.argsort(expanded_groups, kind="stable")]
+        counts = np.bincount(expanded_groups, minlength=self.group_count)
+        starts = np.cumsum(counts) - counts
+
+        # Walk each line's span of its group's expanded rows
+        line_counts = counts[self.groups]
+        offsets = np.arange(line_counts.sum()) - np.repeat(
+            np.cumsum(line_counts) - line_counts, line_counts
+        )
+        expanded_rows = by_group[np.repeat(starts[self.groups], line_counts) + offsets]
+        expanded_lines = np.repeat(np.arange(len(self.groups)), line_counts)
+        return order_rows[self.groups], expanded_rows, expanded_lines
+
+
+def aggregate_order_lines(
+    order_df: pd.DataFrame,
+) -> Tuple[pd.DataFrame, OrderLineGroups]:
+    """
+    Collapse order lines sharing a 상품명구분 key into one row.
+
+    Each aggregated row is the key's first line with the summed quantity of
+    all of them, so the stages after cleaning, which depend on the key and
+    scale with the quantity, do their work once per key. Lines whose
+    quantities are not numbers are left as they are.
+
+    Args:
+        order_df: Cleaned order lines, with 상품명구분
+
+    Returns:
+        Tuple[pd.DataFrame, OrderLineGroups]: The aggregated rows in order of
+        their first line, with a default RangeIndex, and the line mapping
+    """
+    quantity = order_df[QUANTITY_COLUMN]
+    if not pd.api.types.is_numeric_dtype(quantity) or pd.api.types.is_bool_dtype(
+        quantity
+    ):
+        logger.warning(f"{QUANTITY_COLUMN} is not numeric, order lines not aggregated")
+        groups = np.arange(len(order_df))
+        return order_df.reset_index(drop=True), OrderLineGroups(order_df, groups)
+
+    groups, first_rows = distinct_rows(order_df, ["상품명구분"])
+    # Missing quantities only stay missing if all of a key's are
+    totals = widen_numeric(quantity).groupby(groups).sum(min_count=1)
+
+    aggregated_df = order_df.take(first_rows).reset_index(drop=True)
+    aggregated_df[QUANTITY_COLUMN] = totals.array
+    return aggregated_df, OrderLineGroups(order_df, groups)
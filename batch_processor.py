@@ -0,0 +1,289 @@
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from master_cache import DEFAULT_CACHE_DIR
+from master_catalog import MasterCatalog
+from order_processor import OrderProcessor
+
+logger = logging.getLogger(__name__)
+
+# Master catalog for worker processes. Set in the parent before the pool
+# starts so workers forked from it inherit it without pickling or re-indexing.
+_worker_catalog: Optional[MasterCatalog] = None
+
+
+def _init_worker(catalog: Optional[MasterCatalog]) -> None:
+    """Install the master catalog in a worker not forked from the parent."""
+    global _worker_catalog
+    if catalog is not None:
+        _worker_catalog = catalog
+
+
+def resolve_order_files(patterns: Sequence[str]) -> List[str]:
+    """
+    Expand directories and glob patterns into order workbook paths.
+
+    Args:
+        patterns: Directories, glob patterns or file paths
+
+    Returns:
+        List[str]: Sorted, de-duplicated workbook paths
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.xlsx")
+        paths.extend(glob.glob(pattern))
+
+    # Skip Excel lock files such as "~$통합주문리스트.xlsx"
+    return sorted(
+        {path for path in paths if not os.path.basename(path).startswith("~$")}
+    )
+
+
+def _output_paths(order_paths: List[str], output_dir: str) -> List[str]:
+    """Map each order workbook to a unique output CSV path."""
+    outputs, seen = [], {}
+    for path in order_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = seen.get(stem, 0)
+        seen[stem] = count + 1
+        suffix = f"_{count}" if count else ""
+        outputs.append(os.path.join(output_dir, f"{stem}{suffix}_final_order.csv"))
+    return outputs
+
+
+def _summary_row(order_path: str, output_path: str) -> Dict:
+    """Return an empty summary row for one order workbook."""
+    return {
+        "input": order_path,
+        "output": output_path,
+        "status": "ok",
+        "order_rows": 0,
+        "output_rows": 0,
+        "seconds": 0.0,
+        "error": "",
+    }
+
+
+def _process_file(order_path: str, output_path: str) -> Dict:
+    """
+    Process one order workbook with the worker's master catalog.
+
+    Returns:
+        Dict: Summary row for the file; failures are reported, not raised
+    """
+    start = time.perf_counter()
+    summary = _summary_row(order_path, output_path)
+
+    try:
+        processor = OrderProcessor(order_path, use_cache=False, catalog=_worker_catalog)
+        processor.load_order_data()
+        summary["order_rows"] = len(processor.order_df)
+
+        result_df = processor.run_pipeline()
+        processor.save_to_csv(output_path)
+        summary["output_rows"] = len(result_df)
+
+    except Exception as e:
+        logger.error(f"Error processing {order_path}: {e}")
+        summary["status"] = "failed"
+        summary["error"] = f"{type(e).__name__}: {e}"
+
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+class BatchOrderProcessor:
+    """
+    Process many order workbooks against one master workbook.
+
+    The option and master sheets are loaded and indexed into one MasterCatalog
+    in the parent process. Files are then processed in parallel across a
+    process pool whose workers receive the catalog once at start-up. Workers
+    come from a forkserver that has imported this module, since the parent may
+    be running threads by then (pyarrow's, when the catalog comes from the
+    Parquet cache); with fork=True they are forked from the parent and inherit
+    the catalog instead. Each file gets its own output CSV, and a failure in
+    one file is recorded in the summary without stopping the others.
+    """
+
+    def __init__(
+        self,
+        master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        output_dir: str = "output",
+        workers: Optional[int] = None,
+        use_cache: bool = True,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        fork: bool = False,
+    ):
+        """
+        Initialize the BatchOrderProcessor.
+
+        Args:
+            master_excel_path: Path to the master data Excel file
+            output_dir: Directory for the per-file outputs and the summary
+            workers: Number of worker processes, defaults to the CPU count
+            use_cache: Reuse parsed option/master sheets cached on disk
+            cache_dir: Directory of the parsed master sheet cache
+            fork: Fork the workers from this process, which is faster but only
+                safe while it runs no other threads
+        """
+        self.master_excel_path = master_excel_path
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.fork = fork
+
+    def load_master_data(self) -> MasterCatalog:
+        """Load the option and master data and index them once for all files."""
+        processor = OrderProcessor(
+            master_excel_path=self.master_excel_path,
+            use_cache=self.use_cache,
+            cache_dir=self.cache_dir,
+        )
+        processor.load_master_data()
+        return processor.catalog
+
+    def process_files(self, order_paths: Sequence[str]) -> pd.DataFrame:
+        """
+        Process order workbooks in parallel.
+
+        Args:
+            order_paths: Order workbook paths
+
+        Returns:
+            pd.DataFrame: One summary row per input file, in input order
+        """
+        global _worker_catalog
+
+        order_paths = list(order_paths)
+        if not order_paths:
+            raise ValueError("No order workbooks to process.")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_paths = _output_paths(order_paths, self.output_dir)
+
+        logger.info("Loading master data for the batch...")
+        catalog = self.load_master_data()
+        _worker_catalog = catalog
+
+        if self.fork:
+            mp_context, initargs = multiprocessing.get_context("fork"), (None,)
+        elif "forkserver" in multiprocessing.get_all_start_methods():
+            # The server imports pandas once; workers fork from it
+            mp_context, initargs = multiprocessing.get_context("forkserver"), (catalog,)
+            mp_context.set_forkserver_preload([__name__])
+        else:
+            mp_context, initargs = multiprocessing.get_context("spawn"), (catalog,)
+
+        workers = min(self.workers, len(order_paths))
+        logger.info(f"Processing {len(order_paths)} files with {workers} workers...")
+
+        summaries = {}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                executor.submit(_process_file, order_path, output_path): (
+                    order_path,
+                    output_path,
+                )
+                for order_path, output_path in zip(order_paths, output_paths)
+            }
+            for future in as_completed(futures):
+                order_path, output_path = futures[future]
+                try:
+                    summaries[order_path] = future.result()
+                except Exception as e:
+                    # The worker itself died; record the file and carry on
+                    logger.error(f"Worker failed on {order_path}: {e}")
+                    summary = _summary_row(order_path, output_path)
+                    summary["status"] = "failed"
+                    summary["error"] = f"{type(e).__name__}: {e}"
+                    summaries[order_path] = summary
+                logger.info(f"{order_path}: {summaries[order_path]['status']}")
+
+        return pd.DataFrame([summaries[path] for path in order_paths])
+
+    def save_summary(
+        self, summary_df: pd.DataFrame, filename: str = "batch_summary.csv"
+    ) -> str:
+        """
+        Save the combined batch summary to the output directory.
+
+        Args:
+            summary_df: Summary returned by process_files
+            filename: Summary CSV filename
+
+        Returns:
+            str: Path of the written summary
+        """
+        path = os.path.join(self.output_dir, filename)
+        summary_df.to_csv(path, index=False)
+        logger.info(f"Batch summary saved to {path}")
+        return path
+
+
+def main():
+    """Process a directory or glob of order workbooks in parallel."""
+    parser = argparse.ArgumentParser(
+        description="Process many order workbooks against one master workbook."
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Order workbooks, directories or glob patterns"
+    )
+    parser.add_argument("--master", default="쇼핑몰연동마스터.xlsx")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument(
+        "--fork",
+        action="store_true",
+        help="Fork the workers from this process instead of a forkserver",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        batch = BatchOrderProcessor(
+            master_excel_path=args.master,
+            output_dir=args.output_dir,
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            cache_dir=args.cache_dir,
+            fork=args.fork,
+        )
+        summary_df = batch.process_files(resolve_order_files(args.inputs))
+        summary_path = batch.save_summary(summary_df)
+
+        failed = summary_df[summary_df["status"] != "ok"]
+        print(
+            f"\nBatch completed: {len(summary_df) - len(failed)} ok, {len(failed)} failed"
+        )
+        print(f"Total rows processed: {summary_df['output_rows'].sum()}")
+        print(f"Summary: {summary_path}")
+        for row in failed.itertuples(index=False):
+            print(f"  FAILED {row.input}: {row.error}")
+
+    except Exception as e:
+        logger.error(f"Error in batch processing: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,852 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from compact import compact_frame, frame_nbytes
+from engines import ENGINES
+from instrumentation import Instrumentation, StageMetrics
+from order_processor import OrderProcessor
+from parallel import ParallelOrderProcessor
+from synthetic_data import generate_dataset
+from workbook_loader import (
+    EXCEL_BACKENDS,
+    MASTER_SHEETS,
+    ORDER_SHEETS,
+    read_workbook,
+    resolve_backend,
+)
+from writers import DEFAULT_CHUNK_ROWS, write_output
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_PATH = "benchmark_results.jsonl"
+
+# (order rows, catalog SKUs) grids; "full" reaches the largest supported scales
+SCALE_PRESETS = {
+    "smoke": {"orders": [1_000, 10_000], "skus": [1_000]},
+    "default": {"orders": [1_000, 10_000, 100_000, 1_000_000], "skus": [1_000, 50_000]},
+    "full": {
+        "orders": [1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+        "skus": [1_000, 50_000, 500_000],
+    },
+}
+
+
+# Commands timed by the startup suite, run with the current interpreter
+STARTUP_COMMANDS = {
+    "python": ["-c", "pass"],
+    "cli_help": ["cli.py", "--help"],
+    "import_order_processor": ["-c", "import order_processor"],
+}
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "openpyxl")
+
+
+def _git_commit() -> Optional[str]:
+    """Return the current git commit, or None outside a repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _stage_result(metrics_list: List[StageMetrics]) -> Dict:
+    """Summarize the fastest of several runs of one stage."""
+    best = min(metrics_list, key=lambda m: m.wall_seconds)
+    wall = best.wall_seconds
+    return {
+        "stage": best.name,
+        "wall_seconds": best.wall_seconds,
+        "cpu_seconds": best.cpu_seconds,
+        "rows_in": best.rows_in,
+        "rows_out": best.rows_out,
+        "rows_per_second": best.rows_in / wall if wall > 0 else None,
+        "rss_bytes": best.rss_bytes,
+        "rss_delta_bytes": best.rss_delta_bytes,
+        "peak_rss_bytes": best.peak_rss_bytes,
+        "traced_peak_bytes": best.traced_peak_bytes,
+    }
+
+
+def bench_pipeline(
+    n_orders: int,
+    n_skus: int,
+    bundle_fraction: float = 0.1,
+    max_bundle_size: int = 4,
+    seed: int = 0,
+    repeat: int = 1,
+    trace_memory: bool = False,
+    compact: bool = False,
+    hash_keys: bool = True,
+    engine: str = "pandas",
+    copy_free: bool = False,
+    aggregate: bool = False,
+) -> Dict:
+    """
+    Benchmark each pipeline stage and the full pipeline at one scale.
+
+    Each repeat runs the pipeline on a fresh copy of the same generated
+    dataset; the fastest run of each stage is reported, with the highest
+    peak-to-input memory ratio of the runs.
+
+    Args:
+        n_orders: Number of order rows
+        n_skus: Number of catalog SKUs
+        bundle_fraction: Fraction of SKUs that are "옵션구분N" bundles
+        max_bundle_size: Largest N for bundles
+        seed: Random seed of the generated dataset
+        repeat: Number of runs
+        trace_memory: Record per-stage heap peaks with tracemalloc
+        compact: Run in compact mode, compacting the frames as loading would
+        hash_keys: Join on hashed 상품명구분 keys rather than the text keys
+        engine: Engine running the stages, a key of engines.ENGINES
+        copy_free: Run the pipeline in copy-free mode
+        aggregate: Collapse order lines with the same key after cleaning
+
+    Returns:
+        Dict: The case parameters and its per-stage results
+    """
+    logger.info(f"Generating {n_orders} orders over {n_skus} SKUs...")
+    dataset = generate_dataset(
+        n_orders=n_orders,
+        n_skus=n_skus,
+        bundle_fraction=bundle_fraction,
+        max_bundle_size=max_bundle_size,
+        seed=seed,
+    )
+    order_df, master_df = dataset.order_df, dataset.master_df
+    if compact:
+        order_df = compact_frame(order_df)
+        master_df = compact_frame(master_df, max_unique_ratio=1.0)
+
+    runs, totals, ratios = [], [], []
+    for _ in range(repeat):
+        processor = OrderProcessor(
+            use_cache=False,
+            instrumentation=Instrumentation(trace_memory=trace_memory, track_peak=True),
+            compact=compact,
+            hash_keys=hash_keys,
+            engine=engine,
+            copy_free=copy_free,
+            aggregate=aggregate,
+        )
+        processor.order_df = order_df.copy()
+        processor.option_df = dataset.option_df
+        processor.master_df = master_df
+        # Recorded for every mode so their ratios compare
+        processor.instrumentation.record_input(
+            sum(
+                frame_nbytes(df)
+                for df in (processor.order_df, dataset.option_df, master_df)
+            )
+        )
+
+        start = time.perf_counter()
+        processor.run_pipeline()
+        totals.append(time.perf_counter() - start)
+        runs.append(processor.metrics.stages)
+        ratios.append(processor.metrics.peak_input_ratio)
+        output_rows = len(processor.final_order_df)
+        output_bytes = frame_nbytes(processor.final_order_df)
+        del processor
+
+    stages = [_stage_result([run[i] for run in runs]) for i in range(len(runs[0]))]
+    total = min(totals)
+    stages.append(
+        {
+            "stage": "pipeline",
+            "wall_seconds": total,
+            "cpu_seconds": sum(stage["cpu_seconds"] for stage in stages),
+            "rows_in": n_orders,
+            "rows_out": output_rows,
+            "rows_per_second": n_orders / total if total > 0 else None,
+            "rss_bytes": max(stage["rss_bytes"] for stage in stages),
+            "rss_delta_bytes": sum(stage["rss_delta_bytes"] for stage in stages),
+            "peak_input_ratio": None if None in ratios else max(ratios),
+            "traced_peak_bytes": (
+                max(stage["traced_peak_bytes"] for stage in stages)
+                if trace_memory
+                else None
+            ),
+        }
+    )
+
+    return {
+        "suite": "pipeline",
+        "case": (
+            f"orders={n_orders},skus={n_skus},bundles={bundle_fraction}"
+            + (",compact" if compact else "")
+            + ("" if hash_keys else ",text_keys")
+            + ("" if engine == "pandas" else f",engine={engine}")
+            + (",copy_free" if copy_free else "")
+            + (",aggregate" if aggregate else "")
+        ),
+        "params": {
+            "orders": n_orders,
+            "skus": n_skus,
+            "bundle_fraction": bundle_fraction,
+            "max_bundle_size": max_bundle_size,
+            "seed": seed,
+            "repeat": repeat,
+            "option_rows": len(dataset.option_df),
+            "master_rows": len(dataset.master_df),
+            "compact": compact,
+            "hash_keys": hash_keys,
+            "engine": engine,
+            "copy_free": copy_free,
+            "aggregate": aggregate,
+            "output_bytes": output_bytes,
+        },
+        "stages": stages,
+    }
+
+
+def _worker_counts() -> List[int]:
+    """Return powers of two up to the CPU count, and the CPU count."""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    return sorted(set(counts + [cpus]))
+
+
+def bench_parallel(
+    n_orders: int,
+    n_skus: int,
+    bundle_fraction: float = 0.1,
+    seed: int = 0,
+    repeat: int = 1,
+    workers: Optional[List[int]] = None,
+    compact: bool = False,
+    engine: str = "pandas",
+) -> Dict:
+    """
+    Benchmark sharded parallel processing against the single-core pipeline.
+
+    Each worker count runs the whole pipeline with a ParallelOrderProcessor;
+    one worker is the single-core pipeline itself. The fastest of repeat runs
+    is reported with its speedup over one worker, and every output is checked
+    against the single-core output.
+
+    Args:
+        n_orders: Number of order rows
+        n_skus: Number of catalog SKUs
+        bundle_fraction: Fraction of SKUs that are "옵션구분N" bundles
+        seed: Random seed of the generated dataset
+        repeat: Runs per worker count
+        workers: Worker counts to run, powers of two up to the CPU count if
+            None
+        compact: Run in compact mode, compacting the frames as loading would
+        engine: Engine running the stages, a key of engines.ENGINES
+
+    Returns:
+        Dict: The case parameters and one result per worker count
+    """
+    dataset = generate_dataset(
+        n_orders=n_orders, n_skus=n_skus, bundle_fraction=bundle_fraction, seed=seed
+    )
+    order_df, master_df = dataset.order_df, dataset.master_df
+    if compact:
+        order_df = compact_frame(order_df)
+        master_df = compact_frame(master_df, max_unique_ratio=1.0)
+
+    stages, reference, serial_seconds = [], None, None
+    for count in sorted(set([1] + list(workers or _worker_counts()))):
+        times = []
+        for _ in range(repeat):
+            processor = ParallelOrderProcessor(
+                use_cache=False,
+                workers=count,
+                min_shard_rows=1,
+                compact=compact,
+                engine=engine,
+            )
+            processor.order_df = order_df.copy()
+            processor.option_df = dataset.option_df
+            processor.master_df = master_df
+
+            start = time.perf_counter()
+            output_df = processor.run_pipeline()
+            times.append(time.perf_counter() - start)
+
+        if reference is None:
+            reference, serial_seconds = output_df, min(times)
+        matches = output_df.equals(reference)
+        if not matches:
+            logger.error(f"Output with {count} workers differs from one worker")
+
+        wall = min(times)
+        stages.append(
+            {
+                "stage": f"workers={count}",
+                "wall_seconds": wall,
+                "rows_in": n_orders,
+                "rows_out": len(output_df),
+                "rows_per_second": n_orders / wall if wall > 0 else None,
+                "speedup": serial_seconds / wall if wall > 0 else None,
+                "efficiency": serial_seconds / wall / count if wall > 0 else None,
+                "matches_serial": matches,
+            }
+        )
+
+    return {
+        "suite": "parallel",
+        "case": (
+            f"orders={n_orders},skus={n_skus},bundles={bundle_fraction}"
+            + (",compact" if compact else "")
+            + ("" if engine == "pandas" else f",engine={engine}")
+        ),
+        "params": {
+            "orders": n_orders,
+            "skus": n_skus,
+            "bundle_fraction": bundle_fraction,
+            "seed": seed,
+            "repeat": repeat,
+            "compact": compact,
+            "engine": engine,
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": stages,
+    }
+
+
+def bench_writers(
+    n_orders: int,
+    n_skus: int,
+    bundle_fraction: float = 0.1,
+    seed: int = 0,
+    compact: bool = False,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    extensions: Tuple[str, ...] = (".csv", ".csv.gz", ".parquet", ".feather", ".xlsx"),
+) -> Dict:
+    """
+    Benchmark the output writers on the pipeline output at one scale.
+
+    Args:
+        n_orders: Number of order rows
+        n_skus: Number of catalog SKUs
+        bundle_fraction: Fraction of SKUs that are "옵션구분N" bundles
+        seed: Random seed of the generated dataset
+        compact: Write the output of a compact-mode run
+        chunk_rows: Rows per chunk
+        extensions: Output file extensions to write, one writer each
+
+    Returns:
+        Dict: The case parameters and one result per writer
+    """
+    dataset = generate_dataset(
+        n_orders=n_orders, n_skus=n_skus, bundle_fraction=bundle_fraction, seed=seed
+    )
+    processor = OrderProcessor(use_cache=False, compact=compact)
+    processor.order_df = (
+        compact_frame(dataset.order_df) if compact else dataset.order_df.copy()
+    )
+    processor.option_df = dataset.option_df
+    processor.master_df = (
+        compact_frame(dataset.master_df, max_unique_ratio=1.0)
+        if compact
+        else dataset.master_df
+    )
+    output_df = processor.run_pipeline()
+
+    stages = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for extension in extensions:
+            result = write_output(
+                output_df,
+                os.path.join(tmp_dir, f"final_order_df{extension}"),
+                chunk_rows=chunk_rows,
+            )
+            stages.append(
+                {
+                    "stage": f"write{extension}",
+                    "wall_seconds": result.seconds,
+                    "rows_in": result.rows,
+                    "rows_out": result.rows,
+                    "rows_per_second": (
+                        result.rows / result.seconds if result.seconds > 0 else None
+                    ),
+                    "bytes_written": result.bytes_written,
+                }
+            )
+
+    return {
+        "suite": "writers",
+        "case": (
+            f"orders={n_orders},skus={n_skus},bundles={bundle_fraction}"
+            + (",compact" if compact else "")
+        ),
+        "params": {
+            "orders": n_orders,
+            "skus": n_skus,
+            "bundle_fraction": bundle_fraction,
+            "seed": seed,
+            "compact": compact,
+            "chunk_rows": chunk_rows,
+        },
+        "stages": stages,
+    }
+
+
+def _fastest(repeat: int, read: Callable[[], pd.DataFrame]) -> Tuple[float, int]:
+    """Return the fastest of repeat calls of read and the rows it returned."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(read())
+        times.append(time.perf_counter() - start)
+    return min(times), rows
+
+
+def bench_readers(path: str, repeat: int = 1) -> Dict:
+    """
+    Benchmark the workbook parsing backends on one workbook.
+
+    The sheets the pipeline reads from the workbook are parsed whole with
+    pd.read_excel, as loading did before columns were projected, then by
+    each installed backend with every column and with the pipeline's
+    columns only. The fastest of repeat runs is reported, with its speedup
+    over pd.read_excel.
+
+    Args:
+        path: Order or master workbook
+        repeat: Runs per reader
+
+    Returns:
+        Dict: The case parameters and one result per sheet and reader
+    """
+    with pd.ExcelFile(path) as workbook:
+        sheet_names = set(workbook.sheet_names)
+    sheets = {
+        sheet: options
+        for workbook_sheets in (ORDER_SHEETS, MASTER_SHEETS)
+        for sheet, options in workbook_sheets.items()
+        if sheet in sheet_names
+    }
+    if not sheets:
+        raise ValueError(f"{path} has none of the order or master sheets")
+    backends = [name for name, backend in EXCEL_BACKENDS.items() if backend.available()]
+
+    def read_sheet(sheet: str, options: Dict, backend: str) -> pd.DataFrame:
+        return read_workbook(path, {sheet: options}, backend).frames[sheet]
+
+    stages = []
+    for sheet, options in sheets.items():
+        header = options.get("header", 0)
+        baseline, rows = _fastest(
+            repeat, partial(pd.read_excel, path, sheet_name=sheet, header=header)
+        )
+        stages.append(
+            {
+                "stage": f"{sheet}:read_excel",
+                "wall_seconds": baseline,
+                "rows_out": rows,
+                "rows_per_second": rows / baseline if baseline > 0 else None,
+                "speedup": 1.0,
+            }
+        )
+        for backend in backends:
+            for columns, usecols in (("all", None), ("projected", options["usecols"])):
+                seconds, rows = _fastest(
+                    repeat,
+                    partial(
+                        read_sheet,
+                        sheet,
+                        {"header": header, "usecols": usecols},
+                        backend,
+                    ),
+                )
+                stages.append(
+                    {
+                        "stage": f"{sheet}:{backend}:{columns}",
+                        "wall_seconds": seconds,
+                        "rows_out": rows,
+                        "rows_per_second": rows / seconds if seconds > 0 else None,
+                        "speedup": baseline / seconds if seconds > 0 else None,
+                    }
+                )
+
+    return {
+        "suite": "readers",
+        "case": os.path.basename(path),
+        "params": {
+            "workbook": os.path.abspath(path),
+            "bytes": os.path.getsize(path),
+            "repeat": repeat,
+            "backends": backends,
+            "auto_backend": resolve_backend(),
+        },
+        "stages": stages,
+    }
+
+
+def bench_startup(repeat: int = 5) -> Dict:
+    """
+    Benchmark process start-up of the CLI and of importing the pipeline.
+
+    Each command runs in a fresh interpreter; the fastest of repeat runs is
+    reported. The CLI is also checked for importing any heavy module.
+
+    Args:
+        repeat: Runs per command
+
+    Returns:
+        Dict: The case parameters and one result per command
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    stages = []
+    for name, command in STARTUP_COMMANDS.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, *command], cwd=root, check=True, capture_output=True
+            )
+            times.append(time.perf_counter() - start)
+        stages.append({"stage": name, "wall_seconds": min(times)})
+
+    heavy_imports = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, cli; print(','.join(m for m in {HEAVY_MODULES!r} "
+            "if m in sys.modules))",
+        ],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    if heavy_imports:
+        logger.warning(f"cli imports {heavy_imports} at start-up")
+
+    return {
+        "suite": "startup",
+        "case": "cli",
+        "params": {
+            "repeat": repeat,
+            "cli_heavy_imports": heavy_imports.split(",") if heavy_imports else [],
+        },
+        "stages": stages,
+    }
+
+
+def _scale_grid(args: argparse.Namespace) -> Iterator[Tuple[int, int, float]]:
+    """Yield (orders, skus, bundle fraction) for the selected scales."""
+    preset = SCALE_PRESETS[args.preset]
+    for n_skus in args.skus or preset["skus"]:
+        for n_orders in args.orders or preset["orders"]:
+            for bundle_fraction in args.bundle_fraction:
+                yield n_orders, n_skus, bundle_fraction
+
+
+def run_pipeline_suite(args: argparse.Namespace) -> List[Dict]:
+    """Run the pipeline benchmark over the selected scale grid."""
+    return [
+        bench_pipeline(
+            n_orders,
+            n_skus,
+            bundle_fraction=bundle_fraction,
+            max_bundle_size=args.max_bundle_size,
+            seed=args.seed,
+            repeat=args.repeat,
+            trace_memory=args.trace_memory,
+            compact=args.compact,
+            hash_keys=not args.text_keys,
+            engine=args.engine,
+            copy_free=args.copy_free,
+            aggregate=args.aggregate,
+        )
+        for n_orders, n_skus, bundle_fraction in _scale_grid(args)
+    ]
+
+
+def run_writers_suite(args: argparse.Namespace) -> List[Dict]:
+    """Run the output writer benchmark over the selected scale grid."""
+    return [
+        bench_writers(
+            n_orders,
+            n_skus,
+            bundle_fraction=bundle_fraction,
+            seed=args.seed,
+            compact=args.compact,
+        )
+        for n_orders, n_skus, bundle_fraction in _scale_grid(args)
+    ]
+
+
+def run_parallel_suite(args: argparse.Namespace) -> List[Dict]:
+    """Run the parallel speedup benchmark over the selected scale grid."""
+    return [
+        bench_parallel(
+            n_orders,
+            n_skus,
+            bundle_fraction=bundle_fraction,
+            seed=args.seed,
+            repeat=args.repeat,
+            workers=args.workers,
+            compact=args.compact,
+            engine=args.engine,
+        )
+        for n_orders, n_skus, bundle_fraction in _scale_grid(args)
+    ]
+
+
+def run_readers_suite(args: argparse.Namespace) -> List[Dict]:
+    """Run the reader benchmark on the given workbooks, or the default ones."""
+    paths = args.workbook or [
+        path
+        for path in ("통합주문리스트.xlsx", "쇼핑몰연동마스터.xlsx")
+        if os.path.exists(path)
+    ]
+    return [bench_readers(path, repeat=args.repeat) for path in paths]
+
+
+def run_startup_suite(args: argparse.Namespace) -> List[Dict]:
+    """Run the start-up benchmark; it does not depend on the scale grid."""
+    return [bench_startup(repeat=max(args.repeat, 5))]
+
+
+# Benchmark suites selectable with --suite
+SUITES: Dict[str, Callable[[argparse.Namespace], List[Dict]]] = {
+    "pipeline": run_pipeline_suite,
+    "writers": run_writers_suite,
+    "parallel": run_parallel_suite,
+    "startup": run_startup_suite,
+    "readers": run_readers_suite,
+}
+
+
+def load_results(path: str) -> List[Dict]:
+    """
+    Read stored benchmark runs.
+
+    Args:
+        path: JSONL file written by save_results
+
+    Returns:
+        List[Dict]: Runs in the order they were recorded
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_results(run: Dict, path: str) -> None:
+    """Append one benchmark run to a JSONL results file."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    logger.info(f"Benchmark results appended to {path}")
+
+
+def results_frame(run: Dict) -> pd.DataFrame:
+    """Flatten a benchmark run into one row per case and stage."""
+    return pd.DataFrame(
+        [
+            {"suite": case["suite"], "case": case["case"], **stage}
+            for case in run["cases"]
+            for stage in case["stages"]
+        ]
+    )
+
+
+def compare_runs(current: Dict, previous: Dict) -> pd.DataFrame:
+    """
+    Compare the wall times of two runs case by case.
+
+    Args:
+        current: The new run
+        previous: The run to compare against
+
+    Returns:
+        pd.DataFrame: Matching stages with both wall times and their ratio
+    """
+    keys = ["suite", "case", "stage"]
+    merged = results_frame(current)[keys + ["wall_seconds"]].merge(
+        results_frame(previous)[keys + ["wall_seconds"]],
+        on=keys,
+        suffixes=("", "_previous"),
+    )
+    merged["ratio"] = merged["wall_seconds"] / merged["wall_seconds_previous"]
+    return merged
+
+
+def peak_ratio_failures(run: Dict, max_ratio: float) -> List[str]:
+    """
+    Return the pipeline cases whose peak memory exceeds a bound.
+
+    Args:
+        run: Benchmark run with pipeline cases
+        max_ratio: Highest allowed peak-to-input memory ratio
+
+    Returns:
+        List[str]: One message per case over the bound, or without a ratio
+    """
+    failures = []
+    for case in run["cases"]:
+        if case["suite"] != "pipeline":
+            continue
+        ratio = case["stages"][-1]["peak_input_ratio"]
+        if ratio is None:
+            failures.append(f"{case['case']}: peak memory not measured")
+        elif ratio > max_ratio:
+            failures.append(
+                f"{case['case']}: peak memory {ratio:.2f}x the input, "
+                f"over {max_ratio:.2f}x"
+            )
+    return failures
+
+
+def main():
+    """Run the benchmark suites and record the results."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the order pipeline on synthetic data."
+    )
+    parser.add_argument(
+        "--suite", nargs="+", choices=sorted(SUITES), default=["pipeline"]
+    )
+    parser.add_argument("--preset", choices=sorted(SCALE_PRESETS), default="smoke")
+    parser.add_argument("--orders", type=int, nargs="+", help="Override the preset")
+    parser.add_argument("--skus", type=int, nargs="+", help="Override the preset")
+    parser.add_argument("--bundle-fraction", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--max-bundle-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument(
+        "--compact", action="store_true", help="Run the pipeline in compact mode"
+    )
+    parser.add_argument(
+        "--text-keys",
+        action="store_true",
+        help="Join on the text 상품명구분 keys instead of their hashes",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default="pandas",
+        help="Engine running the pipeline stages",
+    )
+    parser.add_argument(
+        "--copy-free", action="store_true", help="Run the pipeline in copy-free mode"
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Collapse order lines with the same key before the later stages",
+    )
+    parser.add_argument(
+        "--max-peak-ratio",
+        type=float,
+        help="Fail if a pipeline case's peak memory exceeds this multiple of "
+        "its input frames",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        help="Worker counts of the parallel suite, powers of two up to the "
+        "CPU count if omitted",
+    )
+    parser.add_argument(
+        "--workbook",
+        nargs="+",
+        help="Workbooks of the readers suite, the order and master workbooks "
+        "in the current directory if omitted",
+    )
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument("--label", default="", help="Free-form note for this run")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const="latest",
+        help="Compare with a previous run id, or the latest run",
+    )
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Stage logs would drown the report
+    logging.getLogger("order_processor").setLevel(logging.WARNING)
+    logging.getLogger("instrumentation").setLevel(logging.WARNING)
+    logging.getLogger("parallel").setLevel(logging.WARNING)
+
+    previous_runs = load_results(args.results)
+
+    run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "label": args.label,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "argv": sys.argv[1:],
+        "cases": [],
+    }
+    for suite in args.suite:
+        run["cases"].extend(SUITES[suite](args))
+
+    report = results_frame(run)
+    print(f"\nBenchmark run {run['run_id']} ({run['git_commit']})")
+    print(
+        report.reindex(
+            columns=[
+                "suite",
+                "case",
+                "stage",
+                "wall_seconds",
+                "rows_per_second",
+                "speedup",
+                "efficiency",
+                "rss_delta_bytes",
+                "peak_input_ratio",
+                "traced_peak_bytes",
+                "bytes_written",
+            ]
+        )
+        .dropna(axis=1, how="all")
+        .to_string(index=False)
+    )
+
+    if args.compare and previous_runs:
+        if args.compare == "latest":
+            previous = previous_runs[-1]
+        else:
+            matches = [r for r in previous_runs if r["run_id"] == args.compare]
+            if not matches:
+                raise ValueError(f"No benchmark run with id {args.compare}")
+            previous = matches[0]
+        print(f"\nCompared with run {previous['run_id']} ({previous['git_commit']})")
+        print(compare_runs(run, previous).to_string(index=False))
+
+    if not args.no_save:
+        save_results(run, args.results)
+
+    if args.max_peak_ratio is not None:
+        failures = peak_ratio_failures(run, args.max_peak_ratio)
+        if failures:
+            sys.exit("Peak memory regression:\n" + "\n".join(failures))
+        print(f"\nPeak memory within {args.max_peak_ratio:.2f}x the input")
+
+
+if __name__ == "__main__":
+    main()
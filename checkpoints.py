@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = ".checkpoints"
+MANIFEST_NAME = "manifest.json"
+
+
+def _update_digest(digest, values) -> None:
+    """Feed one column's values to a digest."""
+    if isinstance(values, pd.arrays.NumpyExtensionArray):
+        values = values.to_numpy()
+
+    if isinstance(values, pd.Categorical):
+        digest.update(values.codes.tobytes())
+        _update_digest(digest, values.categories.array)
+    elif isinstance(values, pd.arrays.ArrowStringArray) or isinstance(
+        values.dtype, pd.ArrowDtype
+    ):
+        # Arrow columns are hashed as their buffers, without converting
+        for chunk in values._pa_array.chunks:
+            digest.update(str(chunk.offset).encode("ascii"))
+            for buffer in chunk.buffers():
+                if buffer is not None:
+                    digest.update(buffer)
+    elif isinstance(values, np.ndarray) and values.dtype != object:
+        digest.update(np.ascontiguousarray(values).tobytes())
+    else:
+        digest.update(pd.util.hash_array(np.asarray(values, dtype=object)).tobytes())
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    Return a content hash of a dataframe.
+
+    The hash covers the column names, dtypes, index and every value, so any
+    edit to a loaded sheet (a changed price, an added row) changes it.
+    Numeric and Arrow-backed columns are hashed as their raw buffers, so two
+    equal frames can hash differently if their memory layout differs, which
+    only costs a recomputation.
+
+    Args:
+        df: Dataframe to hash
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    digest.update(json.dumps([str(dtype) for dtype in df.dtypes]).encode("utf-8"))
+    if isinstance(df.index, pd.RangeIndex):
+        digest.update(repr(df.index).encode("utf-8"))
+    else:
+        _update_digest(digest, df.index.array)
+    for col in df.columns:
+        _update_digest(digest, df[col].array)
+    return digest.hexdigest()
+
+
+class StageCheckpoints:
+    """
+    On-disk checkpoints of pipeline stage outputs, keyed on their inputs.
+
+    The stages form a small dependency graph: each reads the outputs of
+    earlier stages and some loaded frames. A stage's key hashes its name, the
+    run configuration and the keys of everything it reads, with loaded frames
+    keyed by their content hash. A checkpoint is reused only while its stage's
+    key is unchanged, so editing the master sheet invalidates the master
+    merge and everything after it while the cleaned and expanded orders are
+    reused, and a failed run resumes after its last checkpointed stage.
+
+    The latest output of each stage is kept as a pickle, which round-trips
+    dtypes exactly and loads at memory speed.
+    """
+
+    def __init__(self, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR):
+        """
+        Initialize the checkpoints.
+
+        Args:
+            checkpoint_dir: Directory holding the stage outputs
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.keys: Dict[str, str] = {}
+
+    def plan(
+        self,
+        dependencies: Dict[str, Tuple[str, ...]],
+        sources: Dict[str, pd.DataFrame],
+        config: Optional[Dict] = None,
+    ) -> Dict[str, str]:
+        """
+        Compute the key of every stage for the given inputs.
+
+        Args:
+            dependencies: Stage names in run order, mapped to what each reads:
+                earlier stage names or keys of sources
+            sources: Loaded frames the stages read, by name
+            config: Settings that change stage outputs
+
+        Returns:
+            Dict[str, str]: The key of each stage
+        """
+        source_keys = {
+            name: frame_digest(df)
+            for name, df in sources.items()
+            if any(name in inputs for inputs in dependencies.values())
+        }
+
+        self.keys = {}
+        for stage, inputs in dependencies.items():
+            document = json.dumps(
+                {
+                    "version": CHECKPOINT_VERSION,
+                    "stage": stage,
+                    "config": config or {},
+                    "inputs": [
+                        self.keys[name] if name in self.keys else source_keys[name]
+                        for name in inputs
+                    ],
+                },
+                sort_keys=True,
+            )
+            self.keys[stage] = hashlib.sha256(document.encode("utf-8")).hexdigest()
+        return self.keys
+
+    def _read_manifest(self) -> Dict:
+        """Read the manifest of stored stages, empty if missing or unreadable."""
+        try:
+            path = os.path.join(self.checkpoint_dir, MANIFEST_NAME)
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != CHECKPOINT_VERSION:
+            return {}
+        return manifest.get("stages", {})
+
+    def _frame_path(self, stage: str) -> str:
+        """Return the path of a stage's stored output."""
+        return os.path.join(self.checkpoint_dir, f"{stage}.pkl")
+
+    def latest(self, stages: Sequence[str]) -> Optional[str]:
+        """
+        Return the last of stages with a checkpoint for its current key.
+
+        Args:
+            stages: Stage names in run order
+
+        Returns:
+            Optional[str]: The stage to resume after, or None to start over
+        """
+        stored = self._read_manifest()
+        for stage in reversed(stages):
+            entry = stored.get(stage)
+            if (
+                entry is not None
+                and entry["key"] == self.keys.get(stage)
+                and os.path.exists(self._frame_path(stage))
+            ):
+                return stage
+        return None
+
+    def load(self, stage: str) -> pd.DataFrame:
+        """Read a stage's stored output."""
+        return pd.read_pickle(self._frame_path(stage))
+
+    def save(self, stage: str, df: pd.DataFrame) -> None:
+        """
+        Store a stage's output under its current key.
+
+        Args:
+            stage: Stage name
+            df: The stage's output frame
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp_path = f"{self._frame_path(stage)}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, self._frame_path(stage))
+
+        stored = self._read_manifest()
+        stored[stage] = {
+            "key": self.keys[stage],
+            "rows": len(df),
+            "saved_at": time.time(),
+        }
+        tmp_path = os.path.join(self.checkpoint_dir, f"{MANIFEST_NAME}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": CHECKPOINT_VERSION, "stages": stored},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(tmp_path, os.path.join(self.checkpoint_dir, MANIFEST_NAME))
+
+    def clear(self) -> None:
+        """Remove every checkpoint."""
+        if os.path.isdir(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
+        logger.info(f"Cleared checkpoints in {self.checkpoint_dir}")
@@ -0,0 +1,274 @@
+import argparse
+import logging
+import time
+from functools import partial
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --until names of the stages, in run order. The processing modules (and
+# pandas) are only imported once a run starts, so these mirror
+# order_processor.PIPELINE_STAGES, writers.WRITERS, engines.ENGINES,
+# workbook_loader.LOAD_EXECUTORS, workbook_loader.EXCEL_BACKENDS,
+# master_cache.DEFAULT_CACHE_DIR, key_suggestions.DEFAULT_SUGGESTION_DIR and
+# normalization.DEFAULT_MEMO_DIR instead of importing them.
+STAGES = {
+    "load": "load_data",
+    "clean": "clean_order_data",
+    "separate": "process_option_separation",
+    "expand": "expand_option_rows",
+    "merge": "merge_master_data",
+    "calculate": "calculate_final_values",
+}
+OUTPUT_FORMATS = ("csv", "parquet", "feather", "xlsx")
+ENGINES = ("pandas", "polars")
+LOAD_EXECUTORS = ("process", "fork", "thread", "serial")
+EXCEL_BACKENDS = ("auto", "calamine", "openpyxl")
+DEFAULT_CACHE_DIR = ".master_cache"
+DEFAULT_SUGGESTION_DIR = ".suggestion_cache"
+DEFAULT_MEMO_DIR = ".normalization_memo"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog="format-order",
+        description="Merge an order list with the option and master sheets.",
+    )
+    parser.add_argument("--orders", default="통합주문리스트.xlsx")
+    parser.add_argument("--master", default="쇼핑몰연동마스터.xlsx")
+    parser.add_argument("-o", "--output", default="final_order_df.csv")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        help="Output format, inferred from the output extension if omitted",
+    )
+    parser.add_argument(
+        "--until",
+        choices=list(STAGES),
+        default="calculate",
+        help="Stop after this stage and write its output",
+    )
+    parser.add_argument(
+        "--no-output", action="store_true", help="Run the stages without writing"
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="Run the pipeline in compact mode"
+    )
+    parser.add_argument(
+        "--copy-free",
+        action="store_true",
+        help="Avoid whole-frame copies and drop the order rows once expanded",
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Collapse order lines with the same 상품명구분 before expanding and "
+        "write one row per key",
+    )
+    parser.add_argument(
+        "--line-output",
+        metavar="PATH",
+        help="With --aggregate, also write the line-level output to this file",
+    )
+    parser.add_argument(
+        "--exact-money",
+        action="store_true",
+        help="Keep quantities and KRW amounts as exact nullable integers",
+    )
+    parser.add_argument(
+        "--purchase-orders",
+        metavar="DIR",
+        help="Also write one purchase order per 매입처 to this directory",
+    )
+    parser.add_argument("--po-format", choices=OUTPUT_FORMATS, default="xlsx")
+    parser.add_argument(
+        "--po-workers", type=int, help="Processes writing purchase orders"
+    )
+    parser.add_argument(
+        "--unmatched-report",
+        metavar="PATH",
+        help="Write the keys missing from the master sheet, with suggested "
+        "master entries, to this CSV",
+    )
+    parser.add_argument(
+        "--suggestions", type=int, default=5, help="Suggestions per unmatched key"
+    )
+    parser.add_argument("--suggestion-cache", default=DEFAULT_SUGGESTION_DIR)
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandas",
+        help="Engine running the processing stages",
+    )
+    parser.add_argument(
+        "--text-keys",
+        action="store_true",
+        help="Join on the text 상품명구분 keys instead of their hashes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Split the order rows by product across this many processes",
+    )
+    parser.add_argument(
+        "--fork",
+        action="store_true",
+        help=(
+            "Fork the --workers and --po-workers processes from this one instead "
+            "of a forkserver"
+        ),
+    )
+    parser.add_argument(
+        "--load-executor",
+        choices=LOAD_EXECUTORS,
+        default="process",
+        help="How the order and master workbooks are read side by side",
+    )
+    parser.add_argument(
+        "--excel-backend",
+        choices=EXCEL_BACKENDS,
+        default="auto",
+        help="Parser reading the workbooks; auto prefers calamine if installed",
+    )
+    parser.add_argument(
+        "--normalization-rules",
+        metavar="PATH",
+        help="JSON list of product name and key rules replacing the defaults",
+    )
+    parser.add_argument(
+        "--normalization-memo",
+        default=DEFAULT_MEMO_DIR,
+        help="Keep normalized product triples here across runs",
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument(
+        "--checkpoint-dir",
+        help="Checkpoint stage outputs here and reuse those with unchanged inputs",
+    )
+    parser.add_argument("--metrics", help="Write per-stage metrics to this JSON file")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO")
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Run the pipeline as configured on the command line.
+
+    Args:
+        args: Parsed command-line arguments
+
+    Returns:
+        int: Number of rows in the output
+    """
+    start = time.perf_counter()
+    from instrumentation import Instrumentation
+    from join_keys import KEY_HASH_COLUMN
+    from normalization import ProductNormalizer, RuleSet
+    from order_processor import OrderProcessor
+    from parallel import ParallelOrderProcessor
+    from writers import write_output
+
+    logger.debug(f"Processing modules imported in {time.perf_counter() - start:.3f}s")
+
+    rules = (
+        RuleSet.from_json(args.normalization_rules)
+        if args.normalization_rules
+        else None
+    )
+    normalizer = ProductNormalizer(
+        rules, memo_dir=None if args.no_cache else args.normalization_memo
+    )
+    if args.workers is not None:
+        processor_class = partial(
+            ParallelOrderProcessor, workers=args.workers, fork=args.fork
+        )
+    else:
+        processor_class = OrderProcessor
+    processor = processor_class(
+        args.orders,
+        args.master,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        instrumentation=Instrumentation(json_path=args.metrics),
+        compact=args.compact,
+        hash_keys=not args.text_keys,
+        engine=args.engine,
+        load_executor=args.load_executor,
+        excel_backend=args.excel_backend,
+        checkpoint_dir=args.checkpoint_dir,
+        normalizer=normalizer,
+        exact_money=args.exact_money,
+        copy_free=args.copy_free,
+        aggregate=args.aggregate,
+    )
+    result_df = processor.process_all(until=STAGES[args.until])
+
+    if not args.no_output:
+        # Stages before the master merge still carry the hashed join key
+        output_df = result_df.drop(columns=[KEY_HASH_COLUMN], errors="ignore")
+        write_output(output_df, args.output, args.format)
+
+    if args.line_output:
+        line_df = processor.expand_order_lines()
+        write_output(
+            line_df.drop(columns=[KEY_HASH_COLUMN], errors="ignore"), args.line_output
+        )
+
+    if args.purchase_orders:
+        processor.save_purchase_orders(
+            args.purchase_orders,
+            fmt=args.po_format,
+            workers=args.po_workers,
+            fork=args.fork,
+        )
+
+    if args.unmatched_report:
+        report = processor.unmatched_key_report(
+            top_k=args.suggestions, cache_dir=args.suggestion_cache
+        )
+        report.to_csv(args.unmatched_report, index=False)
+        logger.info(
+            f"{report['상품명구분'].nunique()} unmatched keys written to "
+            f"{args.unmatched_report}"
+        )
+
+    return len(result_df)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Process an order list from the command line."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.purchase_orders and args.until != "calculate":
+        parser.error("--purchase-orders needs the full pipeline (--until calculate)")
+    if args.workers is not None and args.checkpoint_dir:
+        parser.error("--workers cannot be combined with --checkpoint-dir")
+    if args.line_output and not args.aggregate:
+        parser.error("--line-output needs --aggregate")
+    if args.workers is not None and args.aggregate:
+        parser.error("--workers cannot be combined with --aggregate")
+    if args.aggregate and args.checkpoint_dir:
+        parser.error("--aggregate cannot be combined with --checkpoint-dir")
+    if args.unmatched_report and args.until not in ("merge", "calculate"):
+        parser.error("--unmatched-report needs the master merge (--until merge)")
+
+    logging.basicConfig(level=getattr(logging, args.log_level))
+
+    try:
+        rows = run(args)
+
+        print(f"\nProcessing completed successfully!")
+        print(f"Total rows processed: {rows}")
+        if not args.no_output:
+            print(f"Output: {args.output}")
+
+    except Exception as e:
+        logger.error(f"Error in main processing: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
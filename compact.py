@@ -0,0 +1,202 @@
+import logging
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# Text columns are stored as categoricals when at most this share of their
+# values is distinct
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Return True for object or string dtype columns."""
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+def _compact_numeric(series: pd.Series) -> pd.Series:
+    """Downcast a numeric column to the narrowest dtype holding it exactly."""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series) and series.dtype.kind in "iu":
+        return pd.to_numeric(series, downcast="integer")
+    if series.dtype == np.float64:
+        narrow = series.astype(np.float32)
+        if np.array_equal(
+            narrow.to_numpy(np.float64), series.to_numpy(), equal_nan=True
+        ):
+            return narrow
+    return series
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    max_unique_ratio: float = CATEGORY_MAX_UNIQUE_RATIO,
+) -> pd.DataFrame:
+    """
+    Convert repetitive text columns to categoricals and downcast numerics.
+
+    Integer columns get the narrowest integer dtype holding their range and
+    float columns become float32 where that is lossless, so restore_frame
+    gives back the same values.
+
+    Args:
+        df: Frame to compact
+        columns: Columns to consider, all columns if None
+        max_unique_ratio: Largest share of distinct values for a text column to
+            become categorical; 1.0 converts every text column
+
+    Returns:
+        pd.DataFrame: A compacted copy of df
+    """
+    df = df.copy(deep=False)
+    for col in df.columns if columns is None else columns:
+        series = df[col]
+        if _is_text(series):
+            if len(series) and series.nunique() <= max_unique_ratio * len(series):
+                df[col] = series.astype("category")
+        else:
+            df[col] = _compact_numeric(series)
+    return df
+
+
+def restore_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Undo compact_frame: categoricals back to their values, numerics to 64 bits.
+
+    Args:
+        df: Frame that may hold compacted columns
+
+    Returns:
+        pd.DataFrame: A frame with plain dtypes
+    """
+    restored = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            restored[col] = series.astype(series.cat.categories.dtype)
+        else:
+            restored[col] = widen_numeric(series)
+    return pd.DataFrame(restored, index=df.index)
+
+
+def widen_numeric(series: pd.Series) -> pd.Series:
+    """Return a numeric column as int64 or float64 so arithmetic cannot overflow."""
+    if pd.api.types.is_bool_dtype(series) or series.dtype.kind not in "iuf":
+        return series
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        # Nullable integers stay nullable
+        if series.dtype.kind in "iu" and series.dtype != "Int64":
+            return series.astype("Int64")
+        return series
+    if series.dtype.kind in "iu" and series.dtype != np.int64:
+        return series.astype(np.int64)
+    if series.dtype.kind == "f" and series.dtype != np.float64:
+        return series.astype(np.float64)
+    return series
+
+
+def map_text(series: pd.Series, func: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """
+    Apply a vectorized text transformation, once per category if categorical.
+
+    Args:
+        series: Text column, possibly categorical
+        func: Series -> Series transformation
+
+    Returns:
+        pd.Series: The transformed column, categorical if the input was
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return func(series)
+
+    # Categories may collapse after the transformation, so re-encode them
+    mapped = func(pd.Series(series.cat.categories))
+    mapped_codes, uniques = pd.factorize(mapped, use_na_sentinel=True)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, mapped_codes[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=uniques),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def fill_text(series: pd.Series, value: str) -> pd.Series:
+    """Fill missing values, adding the fill value as a category if needed."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def combine_text(
+    df: pd.DataFrame,
+    columns: List[str],
+    func: Callable[[pd.DataFrame], pd.Series],
+) -> pd.Series:
+    """
+    Build a derived text column once per distinct combination of columns.
+
+    Args:
+        df: Frame holding the input columns
+        columns: Columns the derived value depends on
+        func: Frame -> Series builder, called on one row per combination
+
+    Returns:
+        pd.Series: The derived column as a categorical aligned with df
+    """
+    group_ids = (
+        df.groupby(columns, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    )
+    _, first_rows = np.unique(group_ids, return_index=True)
+
+    values = func(restore_frame(df.iloc[first_rows][columns].reset_index(drop=True)))
+    value_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    codes = value_codes[group_ids]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=uniques), index=df.index
+    )
+
+
+def compact_concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames, keeping categorical columns categorical.
+
+    pd.concat falls back to object columns when categories differ; here the
+    categories are unioned instead.
+
+    Args:
+        frames: Frames with the same columns
+
+    Returns:
+        pd.DataFrame: The concatenated frame with a fresh RangeIndex
+    """
+    combined = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if not isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            continue
+
+        parts = []
+        for frame in frames:
+            part = frame[col]
+            if not isinstance(part.dtype, pd.CategoricalDtype):
+                part = part.astype(object).astype("category")
+            parts.append(part)
+        try:
+            combined[col] = pd.Series(
+                union_categoricals(parts, ignore_order=True), index=combined.index
+            )
+        except TypeError:
+            # Categories of different dtypes (e.g. numbers and text)
+            combined[col] = combined[col].astype("category")
+    return combined
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Return the deep memory usage of a frame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
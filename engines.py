@@ -0,0 +1,505 @@
+import logging
+from typing import Dict, Type
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from join_keys import factorize_keys
+from order_processor import (
+    MASTER_COLUMNS,
+    ORDER_ROW_COLUMN,
+    OrderProcessor,
+    deal_number_ranks,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineEngine:
+    """
+    Runs the processing stages of an OrderProcessor.
+
+    An engine implements each stage named in PIPELINE_STAGES as a method
+    without arguments that reads and replaces the processor's frames. The
+    frames stay pandas between stages, so engines can be mixed with the
+    loading, caching and output code and with each other.
+    """
+
+    name = ""
+
+    def __init__(self, processor: OrderProcessor):
+        """
+        Initialize the engine for one processor.
+
+        Args:
+            processor: Processor whose frames the stages work on
+        """
+        self.processor = processor
+
+    def clean_order_data(self) -> None:
+        """Clean order_df and build its 상품명구분 keys."""
+        raise NotImplementedError
+
+    def process_option_separation(self) -> None:
+        """Look up the 옵션분리 code of every order row."""
+        raise NotImplementedError
+
+    def expand_option_rows(self) -> None:
+        """Build final_order_df from order_df and its bundle components."""
+        raise NotImplementedError
+
+    def sort_final_dataframe(self) -> None:
+        """Put final_order_df in deal-number order."""
+        raise NotImplementedError
+
+    def merge_master_data(self) -> None:
+        """Add the master columns to final_order_df."""
+        raise NotImplementedError
+
+    def calculate_final_values(self) -> None:
+        """Compute the order quantities and totals of final_order_df."""
+        raise NotImplementedError
+
+
+class PandasEngine(PipelineEngine):
+    """The processor's own pandas implementation of the stages (default)."""
+
+    name = "pandas"
+
+    def clean_order_data(self) -> None:
+        self.processor.clean_order_data()
+
+    def process_option_separation(self) -> None:
+        self.processor.process_option_separation()
+
+    def expand_option_rows(self) -> None:
+        self.processor.expand_option_rows()
+
+    def sort_final_dataframe(self) -> None:
+        self.processor._sort_final_dataframe()
+
+    def merge_master_data(self) -> None:
+        self.processor.merge_master_data()
+
+    def calculate_final_values(self) -> None:
+        self.processor.calculate_final_values()
+
+
+def _polars_text(series: pd.Series, keep_missing: bool = True):
+    """
+    Return a column as a Polars string Series.
+
+    Values convert like Series.astype(str), which keeps missing values
+    missing, or like Series.map(str), which turns them into "nan"/"None",
+    when keep_missing is False. String columns convert without a copy; other
+    columns convert once per distinct value.
+
+    Args:
+        series: Column to convert
+        keep_missing: Keep missing values as nulls
+
+    Returns:
+        pl.Series: One string per row
+    """
+    import polars as pl
+
+    if keep_missing and series.dtype == "str":
+        return pl.from_pandas(series)
+
+    codes, uniques = factorize_keys(series)
+    text = pd.Series(uniques, dtype=object)
+    text = text.astype(str) if keep_missing else text.map(str)
+    text = pl.Series(
+        [value if isinstance(value, str) else None for value in text], dtype=pl.String
+    )
+    return text.gather(codes)
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Return True if every non-missing value of a column is a string."""
+    if series.dtype == "str":
+        return True
+    return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+
+
+def _polars_keys(series: pd.Series):
+    """
+    Return a catalog key column as a Polars frame of (key, row).
+
+    Only text and missing keys can equal an order key, so rows holding
+    anything else (numbers read from Excel) are left out.
+    """
+    import polars as pl
+
+    codes, uniques = factorize_keys(series)
+    is_key = np.array(
+        [isinstance(value, str) or pd.isna(value) for value in uniques], dtype=bool
+    )
+    keys = _polars_text(series)
+    return (
+        pl.DataFrame({"key": keys, "row": pl.int_range(len(keys), eager=True)})
+        .filter(pl.Series(is_key[codes]))
+        .unique("key", keep="first", maintain_order=True)
+    )
+
+
+def _to_pandas(values, like: pd.Series) -> pd.Series:
+    """Convert a Polars Series into a column aligned with and typed like like."""
+    series = values.to_pandas()
+    if like.dtype == object:
+        series = series.astype(object)
+    series.index = like.index
+    return series
+
+
+def _gather(series: pd.Series, positions: np.ndarray) -> np.ndarray:
+    """Take rows by position, missing (NaN) where a position is -1."""
+    return take(series.array, positions, allow_fill=True)
+
+
+class PolarsEngine(PipelineEngine):
+    """
+    Multi-threaded columnar engine built on Polars.
+
+    The option fill, the option and master lookups, the bundle spans, the
+    deal-number sort and the totals run in Polars; names and keys come from
+    the processor's normalizer. Payload columns are gathered from the pandas
+    frames by the resulting row positions, so values and dtypes match the
+    pandas engine. Joins always use the text keys, so the processor's
+    hash_keys setting is ignored; the output is the same either way. Compact
+    mode is not supported.
+    """
+
+    name = "polars"
+
+    def __init__(self, processor: OrderProcessor):
+        super().__init__(processor)
+        try:
+            import polars  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "The polars engine needs the polars package: "
+                "pip install 'format-order[polars]'"
+            ) from e
+
+        if processor.compact:
+            raise ValueError("Compact mode is only supported by the pandas engine")
+        if processor.key_hasher is not None:
+            logger.debug("The polars engine joins on text keys, hash_keys is ignored")
+
+    def clean_order_data(self) -> None:
+        """Clean order_df and build its 상품명구분 keys."""
+        p = self.processor
+        if p.order_df is None:
+            raise ValueError("Order data not loaded. Call load_data() first.")
+
+        logger.info("Cleaning order data...")
+        df = p.order_df
+
+        # Fill missing options with "NO"
+        option_col = df.columns[2]
+        if _is_text(df[option_col]):
+            filled = _polars_text(df[option_col]).fill_null("NO")
+            df[option_col] = _to_pandas(filled, df[option_col])
+        else:
+            # Numbers among the options stay numbers, as with fillna
+            df[option_col] = df[option_col].fillna("NO")
+
+        # Names and keys run through the processor's normalizer, so the same
+        # rules and memo apply with either engine; only distinct triples are
+        # normalized, which leaves little for Polars to speed up
+        names, keys = p.normalizer.normalize(df)
+        df[names.name] = names
+        df["상품명구분"] = keys
+        p.normalizer.save()
+
+        logger.info("Order data cleaning completed")
+
+    def process_option_separation(self) -> None:
+        """Look up the 옵션분리 code of every order row."""
+        import polars as pl
+
+        p = self.processor
+        if p.order_df is None or p.option_df is None:
+            raise ValueError("Data not loaded. Call load_data() first.")
+
+        logger.info("Processing option separation...")
+
+        # First option row of each key; unmatched rows get a null row
+        joined = pl.DataFrame({"key": _polars_text(p.order_df["상품명구분"])}).join(
+            _polars_keys(p.option_df["상품명구분1"]),
+            on="key",
+            how="left",
+            maintain_order="left",
+        )
+        option_rows = joined["row"].fill_null(-1).to_numpy()
+        matched = option_rows >= 0
+
+        values = np.full(len(option_rows), None, dtype=object)
+        codes = p.option_df["옵션분리구분2"].to_numpy(dtype=object)
+        values[matched] = codes[option_rows[matched]]
+        p.order_df["옵션분리"] = values
+        p.instrumentation.record("option_matched_rows", int(matched.sum()))
+
+        logger.info("Option separation processing completed")
+
+    def _span_table(self):
+        """Return the option span table as a Polars frame, keyed like parents."""
+        import polars as pl
+
+        option_df = self.processor.option_df
+        anchors = pl.DataFrame(
+            {
+                "key": _polars_text(option_df["상품명구분1"]),
+                "code": _polars_text(option_df["옵션분리구분2"]),
+                # The anchor's index label is used as a position in option_df
+                "_span_start": option_df.index.to_numpy(dtype=np.int64) + 1,
+            }
+        ).unique(["key", "code"], keep="first", maintain_order=True)
+
+        wanted = (
+            pl.col("code")
+            .str.extract(r"^옵션구분(\d+)", 1)
+            .cast(pl.Int64, strict=False)
+            .sub(1)
+            .clip(lower_bound=0)
+            .fill_null(0)
+        )
+        available = (len(option_df) - pl.col("_span_start")).clip(lower_bound=0)
+        return (
+            anchors.with_columns(_span_wanted=wanted)
+            .filter(pl.col("_span_wanted") > 0)
+            .with_columns(_span_taken=pl.min_horizontal("_span_wanted", available))
+        )
+
+    def expand_option_rows(self) -> None:
+        """Build final_order_df from order_df and its bundle components."""
+        import polars as pl
+
+        p = self.processor
+        if p.order_df is None or p.option_df is None:
+            raise ValueError("Data not loaded. Call load_data() first.")
+
+        logger.info("Expanding option rows...")
+
+        order_df = p.order_df
+        codes = _polars_text(order_df["옵션분리"])
+        parents = (
+            pl.DataFrame(
+                {
+                    "_parent_position": pl.int_range(len(codes), eager=True),
+                    "key": _polars_text(order_df["상품명구분"]),
+                    "code": codes,
+                    "_wanted": codes.str.extract(r"^옵션구분(\d+)", 1)
+                    .cast(pl.Int64, strict=False)
+                    .fill_null(0),
+                }
+            )
+            .filter(pl.col("_wanted") > 1)
+            .drop("_wanted")
+            .join(
+                self._span_table(),
+                on=["key", "code"],
+                how="left",
+                maintain_order="left",
+            )
+        )
+
+        p._log_expansion_warnings(
+            parents.select(
+                상품명구분="key",
+                _span_start="_span_start",
+                _span_wanted="_span_wanted",
+                _span_taken="_span_taken",
+            ).to_pandas()
+        )
+
+        parents = parents.drop_nulls("_span_start")
+        span_start = parents["_span_start"].to_numpy()
+        span_taken = parents["_span_taken"].to_numpy()
+
+        # Repeat each parent by its span and walk the follow-on option rows
+        offsets = np.arange(span_taken.sum()) - np.repeat(
+            np.cumsum(span_taken) - span_taken, span_taken
+        )
+        option_positions = np.repeat(span_start, span_taken) + offsets
+        order_positions = np.repeat(parents["_parent_position"].to_numpy(), span_taken)
+
+        appended_df = self._expanded_rows(option_positions, order_positions)
+        if appended_df.empty:
+            p.final_order_df = order_df.copy()
+        else:
+            p.final_order_df = pd.concat([order_df, appended_df], ignore_index=True)
+        self.sort_final_dataframe()
+
+        p.instrumentation.record("expanded_rows", len(appended_df))
+        logger.info(f"Added {len(appended_df)} expanded rows")
+
+    def _expanded_rows(
+        self, option_positions: np.ndarray, order_positions: np.ndarray
+    ) -> pd.DataFrame:
+        """Build the expanded rows from their option and parent order rows."""
+        import polars as pl
+
+        p = self.processor
+        if len(option_positions) == 0:
+            return pd.DataFrame(columns=p.order_df.columns)
+
+        option_rows = p.option_df.iloc[option_positions].reset_index(drop=True)
+        order_rows = p.order_df.iloc[order_positions].reset_index(drop=True)
+
+        new_columns = {
+            "판매몰상품번호/딜번호[출력]": option_rows["판매몰상품번호/딜번호"],
+            "원상품명(쇼핑몰)[출력]": option_rows["원상품명_쇼핑몰"],
+            "원옵션(쇼핑몰)[출력]": option_rows["원옵션_쇼핑몰"].where(
+                option_rows["원옵션_쇼핑몰"].notna(), "NO"
+            ),
+            "수량[출력]": order_rows["수량[출력]"],
+            "옵션분리": order_rows["옵션분리"],
+        }
+
+        # The components' keys convert every value with str(), like map(str)
+        parts = pl.DataFrame(
+            {
+                name: _polars_text(new_columns[col], keep_missing=False)
+                for name, col in (
+                    ("deal", "판매몰상품번호/딜번호[출력]"),
+                    ("name", "원상품명(쇼핑몰)[출력]"),
+                    ("option", "원옵션(쇼핑몰)[출력]"),
+                )
+            }
+        )
+        keys = parts.select(
+            pl.concat_str(["deal", "name", "option"]).str.replace_all(
+                " ", "", literal=True
+            )
+        ).to_series()
+        new_columns["상품명구분"] = keys.to_pandas()
+        if ORDER_ROW_COLUMN in p.order_df.columns:
+            new_columns[ORDER_ROW_COLUMN] = -1 - order_rows[ORDER_ROW_COLUMN]
+
+        return pd.DataFrame(
+            {
+                col: new_columns[col] if col in new_columns else None
+                for col in p.order_df.columns
+            },
+            index=pd.RangeIndex(len(option_positions)),
+        )
+
+    def sort_final_dataframe(self) -> None:
+        """Put final_order_df in deal-number order with a stable Polars sort."""
+        import polars as pl
+
+        p = self.processor
+        ranks = deal_number_ranks(p.final_order_df["판매몰상품번호/딜번호[출력]"])
+        order = (
+            pl.DataFrame({"rank": ranks})
+            .with_row_index()
+            .sort("rank", maintain_order=True)["index"]
+            .to_numpy()
+        )
+
+        if np.any(order != np.arange(len(order))):
+            p.final_order_df = p.final_order_df.take(order)
+        p.final_order_df = p.final_order_df.reset_index(drop=True)
+
+    def merge_master_data(self) -> None:
+        """Add the master columns to final_order_df."""
+        import polars as pl
+
+        p = self.processor
+        if p.final_order_df is None or p.master_df is None:
+            raise ValueError("Data not processed. Call previous methods first.")
+
+        logger.info("Merging master data...")
+
+        # First master row of each key; missing keys match like in pd.merge
+        keys = _polars_text(p.final_order_df["상품명구분"])
+        joined = pl.DataFrame({"key": keys}).join(
+            _polars_keys(p.master_df["상품명구분1"]),
+            on="key",
+            how="left",
+            nulls_equal=True,
+            maintain_order="left",
+        )
+        master_rows = joined["row"].fill_null(-1).to_numpy()
+
+        # Track order keys without a master entry
+        unmatched = master_rows < 0
+        p.instrumentation.record("master_unmatched_rows", int(unmatched.sum()))
+        p.instrumentation.record(
+            "master_unmatched_keys",
+            keys.filter(pl.Series(unmatched)).drop_nulls().n_unique(),
+        )
+
+        master_values = pd.DataFrame(
+            {col: _gather(p.master_df[col], master_rows) for col in MASTER_COLUMNS[1:]},
+            index=p.final_order_df.index,
+        )
+        p.final_order_df = pd.concat(
+            [
+                p.final_order_df.drop(columns=MASTER_COLUMNS[1:], errors="ignore"),
+                master_values,
+            ],
+            axis=1,
+        )
+
+        logger.info("Master data merge completed")
+
+    def calculate_final_values(self) -> None:
+        """Compute the order quantities and totals of final_order_df."""
+        import polars as pl
+
+        p = self.processor
+        if p.final_order_df is None:
+            raise ValueError("Data not processed. Call previous methods first.")
+
+        columns = ["단위수량", "수량[출력]", "기준판매가", "매입단가"]
+        df = p.final_order_df
+        if p.exact_money or not all(
+            pd.api.types.is_numeric_dtype(df[col]) for col in columns
+        ):
+            # Exact won arithmetic, or text among the numbers: keep pandas'
+            # object arithmetic
+            p.calculate_final_values()
+            return
+
+        logger.info("Calculating final values...")
+
+        totals = pl.from_pandas(df[columns]).select(
+            발주수량=pl.col("단위수량") * pl.col("수량[출력]"),
+            기준판매가합계=pl.col("단위수량")
+            * pl.col("수량[출력]")
+            * pl.col("기준판매가"),
+            매입가합계=pl.col("단위수량") * pl.col("수량[출력]") * pl.col("매입단가"),
+        )
+
+        df.drop(columns="단위수량", inplace=True)
+        for col in totals.columns:
+            df[col] = totals[col].to_numpy()
+
+        logger.info("Final calculations completed")
+
+
+# Engines selectable per run, by name
+ENGINES: Dict[str, Type[PipelineEngine]] = {
+    "pandas": PandasEngine,
+    "polars": PolarsEngine,
+}
+
+
+def create_engine(name: str, processor: OrderProcessor) -> PipelineEngine:
+    """
+    Return the named engine bound to a processor.
+
+    Args:
+        name: A key of ENGINES
+        processor: Processor whose frames the engine works on
+
+    Returns:
+        PipelineEngine: The engine
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name} (choose from {', '.join(ENGINES)})")
+    return ENGINES[name](processor)
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_concat
+from master_cache import DEFAULT_CACHE_DIR, file_sha256, read_frame, write_frame
+from order_processor import ORDER_ROW_COLUMN, OrderProcessor, deal_number_ranks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = ".incremental_state"
+STATE_VERSION = 3
+
+
+def order_row_fingerprints(order_df: pd.DataFrame) -> np.ndarray:
+    """
+    Fingerprint order rows for incremental processing.
+
+    A row's fingerprint hashes its four order columns together with how many
+    identical rows came before it, so repeated lines (the same product ordered
+    twice) stay distinct while rows keep their fingerprint when the export
+    grows.
+
+    Args:
+        order_df: Order rows as loaded by load_order_data
+
+    Returns:
+        np.ndarray: One uint64 fingerprint per row
+    """
+    row_hash = pd.util.hash_pandas_object(order_df.iloc[:, :4], index=False)
+    occurrence = row_hash.groupby(row_hash.to_numpy()).cumcount()
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({"row": row_hash.to_numpy(), "occurrence": occurrence.to_numpy()}),
+        index=False,
+    ).to_numpy()
+
+
+class IncrementalOrderProcessor(OrderProcessor):
+    """
+    Process only the order rows not handled by previous runs.
+
+    A ledger of row fingerprints, the master workbook's content hash and the
+    accumulated result are kept in a state directory. Each run pushes only
+    unseen rows through the pipeline and merges them into the prior result.
+    The stored result numbers every row in ORDER_ROW_COLUMN by its position in
+    the ledger, so the merge puts rows in the order a full run gives them when
+    the export only grows at the end. If the master workbook or the output
+    settings (see output_config) changed since the ledger was written,
+    everything is reprocessed.
+    """
+
+    def __init__(
+        self,
+        order_excel_path: str = "통합주문리스트.xlsx",
+        master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        state_dir: str = DEFAULT_STATE_DIR,
+        **kwargs,
+    ):
+        """
+        Initialize the IncrementalOrderProcessor.
+
+        Args:
+            order_excel_path: Path to the order list Excel file
+            master_excel_path: Path to the master data Excel file
+            state_dir: Directory holding the ledger and the prior result
+            **kwargs: Passed through to OrderProcessor; aggregation is not
+                supported
+        """
+        if kwargs.get("aggregate"):
+            raise ValueError("Aggregation is not supported by incremental runs")
+        super().__init__(order_excel_path, master_excel_path, **kwargs)
+        self.state_dir = state_dir
+        self.new_row_count = 0
+
+    def _read_state(self) -> Optional[Dict]:
+        """Read the state manifest, or None if there is no usable state."""
+        try:
+            with open(
+                os.path.join(self.state_dir, "manifest.json"), encoding="utf-8"
+            ) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("version") != STATE_VERSION:
+            return None
+        return manifest
+
+    def _config_digest(self) -> str:
+        """Return a hash of the settings the accumulated result was made with."""
+        document = json.dumps(self.output_config(), sort_keys=True)
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+    def _write_state(
+        self, fingerprints: np.ndarray, result_df: pd.DataFrame, master_sha256: str
+    ) -> None:
+        """Persist the ledger, the accumulated result and the manifest."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        manifest = {
+            "version": STATE_VERSION,
+            "master_sha256": master_sha256,
+            "config_sha256": self._config_digest(),
+            "ledger_format": write_frame(
+                pd.DataFrame({"fingerprint": fingerprints}),
+                os.path.join(self.state_dir, "ledger"),
+            ),
+            "result_format": write_frame(
+                result_df, os.path.join(self.state_dir, "result")
+            ),
+            "rows": len(fingerprints),
+            "updated_at": time.time(),
+        }
+
+        tmp_path = os.path.join(self.state_dir, "manifest.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.state_dir, "manifest.json"))
+
+    def _merge_results(
+        self, prior_df: pd.DataFrame, new_df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Put the prior and new results in single-run order.
+
+        A full run sorts the order rows, followed by the expanded rows in
+        parent order, by deal number; ORDER_ROW_COLUMN gives that sequence
+        back across runs.
+        """
+        if self.compact:
+            combined = compact_concat([prior_df, new_df])
+        else:
+            combined = pd.concat([prior_df, new_df], ignore_index=True)
+
+        order_rows = combined[ORDER_ROW_COLUMN].to_numpy()
+        expanded = order_rows < 0
+        parent_rows = np.where(expanded, -1 - order_rows, order_rows)
+        ranks = deal_number_ranks(combined["판매몰상품번호/딜번호[출력]"])
+        order = np.lexsort((parent_rows, expanded, ranks))
+        return combined.take(order).reset_index(drop=True)
+
+    def process_incremental(self) -> pd.DataFrame:
+        """
+        Process the order rows added since the last run.
+
+        Returns:
+            pd.DataFrame: The accumulated processed order dataframe
+        """
+        logger.info("Starting incremental order processing pipeline...")
+
+        self.load_data()
+        fingerprints = order_row_fingerprints(self.order_df)
+        master_sha256 = file_sha256(self.master_excel_path)
+
+        manifest = self._read_state()
+        prior_df = None
+        new_mask = np.ones(len(fingerprints), dtype=bool)
+
+        if manifest is None:
+            logger.info("No incremental state found, processing all rows")
+        elif manifest["master_sha256"] != master_sha256:
+            logger.info("Master data changed since the last run, reprocessing all rows")
+        elif manifest["config_sha256"] != self._config_digest():
+            logger.info("Settings changed since the last run, reprocessing all rows")
+        else:
+            ledger = read_frame(
+                os.path.join(self.state_dir, "ledger"), manifest["ledger_format"]
+            )["fingerprint"].to_numpy()
+            prior_df = read_frame(
+                os.path.join(self.state_dir, "result"), manifest["result_format"]
+            )
+            new_mask = ~np.isin(fingerprints, ledger)
+
+            missing = np.isin(ledger, fingerprints, invert=True).sum()
+            if missing:
+                logger.warning(
+                    f"{missing} previously processed rows are no longer in the export"
+                )
+            fingerprints = np.concatenate([ledger, fingerprints[new_mask]])
+
+        self.new_row_count = int(new_mask.sum())
+        logger.info(f"{self.new_row_count} new order rows to process")
+
+        if self.new_row_count == 0 and prior_df is not None:
+            self.final_order_df = prior_df.drop(columns=ORDER_ROW_COLUMN)
+            return self.final_order_df
+
+        # New rows follow the ledger's rows
+        first_row = len(fingerprints) - self.new_row_count
+        self.order_df = self.order_df[new_mask].reset_index(drop=True)
+        self.order_df[ORDER_ROW_COLUMN] = np.arange(
+            first_row, first_row + self.new_row_count
+        )
+        result_df = self.run_pipeline()
+        if prior_df is not None:
+            result_df = self._merge_results(prior_df, result_df)
+
+        self._write_state(fingerprints, result_df, master_sha256)
+        self.final_order_df = result_df.drop(columns=ORDER_ROW_COLUMN)
+
+        logger.info("Incremental order processing completed successfully")
+        return self.final_order_df
+
+    def reset(self) -> None:
+        """Forget all previous runs."""
+        if os.path.isdir(self.state_dir):
+            shutil.rmtree(self.state_dir)
+        logger.info(f"Cleared incremental state in {self.state_dir}")
+
+
+def main():
+    """Process only the order rows added since the previous run."""
+    parser = argparse.ArgumentParser(
+        description="Incrementally process a cumulative order export."
+    )
+    parser.add_argument("--orders", default="통합주문리스트.xlsx")
+    parser.add_argument("--master", default="쇼핑몰연동마스터.xlsx")
+    parser.add_argument("--output", default="final_order_df.csv")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument(
+        "--reset", action="store_true", help="Forget previous runs first"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        processor = IncrementalOrderProcessor(
+            args.orders, args.master, state_dir=args.state_dir, cache_dir=args.cache_dir
+        )
+        if args.reset:
+            processor.reset()
+
+        result_df = processor.process_incremental()
+        processor.save_to_csv(args.output)
+
+        print(f"\nIncremental processing completed successfully!")
+        print(f"New order rows processed: {processor.new_row_count}")
+        print(f"Total rows in output: {len(result_df)}")
+
+    except Exception as e:
+        logger.error(f"Error in incremental processing: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_bytes() -> int:
+    """Return the process's resident set size, or its peak where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # ru_maxrss is the lifetime peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Stages measuring the peak RSS that are running in this process, and whether
+# the outermost one could reset the peak. The peak count belongs to the
+# process, so this is shared by every instrumentation and thread, under the
+# lock.
+_peak_lock = threading.Lock()
+_peak_stages = 0
+_peak_reset = False
+
+
+def reset_peak_rss() -> bool:
+    """
+    Restart the peak RSS count from the current RSS.
+
+    This writes /proc/self/clear_refs, which resets the peak of the whole
+    process: every thread, every instrumentation and anything else reading
+    VmHWM sees the reset. Instrumentation only calls it for track_peak
+    stages, and only from the outermost one running.
+
+    Returns:
+        bool: False where the peak cannot be reset (outside Linux)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return the peak RSS since the last reset_peak_rss, None if unknown."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+@dataclass
+class StageMetrics:
+    """Measurements for one run of one pipeline stage."""
+
+    name: str
+    status: str = "ok"
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    rss_bytes: int = 0
+    rss_delta_bytes: int = 0
+    peak_rss_bytes: Optional[int] = None
+    traced_peak_bytes: Optional[int] = None
+    traced_delta_bytes: Optional[int] = None
+    counts: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    profile_path: Optional[str] = None
+
+
+@dataclass
+class PipelineMetrics:
+    """Stage measurements collected over a pipeline run."""
+
+    stages: List[StageMetrics] = field(default_factory=list)
+    input_bytes: Optional[int] = None
+    input_rss_bytes: Optional[int] = None
+
+    @property
+    def wall_seconds(self) -> float:
+        """Total wall time across stages."""
+        return sum(stage.wall_seconds for stage in self.stages)
+
+    @property
+    def peak_input_ratio(self) -> Optional[float]:
+        """
+        Peak memory of the run's frames as a multiple of its input frames.
+
+        The input frames count once; every byte the RSS peaked above its
+        level when the input was recorded adds to them. Memory freed before
+        then and reused is not counted, so this is a lower bound.
+        """
+        peaks = [
+            stage.peak_rss_bytes
+            for stage in self.stages
+            if stage.peak_rss_bytes is not None
+        ]
+        if not self.input_bytes or self.input_rss_bytes is None or not peaks:
+            return None
+        extra = max(0, max(peaks) - self.input_rss_bytes)
+        return (self.input_bytes + extra) / self.input_bytes
+
+    def stage(self, name: str) -> Optional[StageMetrics]:
+        """Return the latest metrics for a stage, or None if it did not run."""
+        for stage in reversed(self.stages):
+            if stage.name == name:
+                return stage
+        return None
+
+    def to_dict(self) -> Dict:
+        """Return the metrics as plain data."""
+        return {
+            "wall_seconds": self.wall_seconds,
+            "input_bytes": self.input_bytes,
+            "peak_input_ratio": self.peak_input_ratio,
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Serialize the metrics as JSON.
+
+        Args:
+            path: Also write the JSON to this file if given
+
+        Returns:
+            str: The JSON document
+        """
+        document = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(document)
+        return document
+
+
+class Instrumentation:
+    """
+    Per-stage timing, memory and row-count instrumentation.
+
+    Wall time, CPU time, RSS and row counts are always recorded. The peak
+    RSS of each stage (Linux only), Python heap peaks via tracemalloc and
+    cProfile captures are opt-in: the first resets the process-wide peak
+    count, the others have overhead. Every finished stage is passed to the
+    registered hooks.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        profile_dir: Optional[str] = None,
+        json_path: Optional[str] = None,
+        hooks: Optional[List[Callable[[StageMetrics], None]]] = None,
+        track_peak: bool = False,
+    ):
+        """
+        Initialize the instrumentation.
+
+        Args:
+            trace_memory: Record per-stage heap peaks with tracemalloc
+            profile_dir: Directory for per-stage cProfile dumps, off if None
+            json_path: File the metrics are written to when a run finishes
+            hooks: Callables receiving each stage's metrics as it finishes
+            track_peak: Record each stage's peak RSS; the outermost running
+                stage resets the process's peak count (see reset_peak_rss),
+                stages nested in it or running in other threads meanwhile
+                report the peak since it started
+        """
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.json_path = json_path
+        self.hooks = list(hooks or [])
+        self.track_peak = track_peak
+        self.metrics = PipelineMetrics()
+        self._current = None
+
+    def reset(self) -> None:
+        """Start a new set of metrics."""
+        self.metrics = PipelineMetrics()
+
+    def add_hook(self, hook: Callable[[StageMetrics], None]) -> None:
+        """Register a callable receiving each stage's metrics."""
+        self.hooks.append(hook)
+
+    def record(self, name: str, value: int) -> None:
+        """Record a count on the running stage; ignored outside a stage."""
+        if self._current is not None:
+            self._current.counts[name] = int(value)
+
+    def record_input(self, nbytes: int) -> None:
+        """
+        Record the size of the frames a run starts from.
+
+        The RSS is taken now as the level the run's peak is measured from,
+        see PipelineMetrics.peak_input_ratio.
+
+        Args:
+            nbytes: Deep size of the input frames
+        """
+        self.metrics.input_bytes = int(nbytes)
+        self.metrics.input_rss_bytes = current_rss_bytes()
+
+    def record_time(self, name: str, seconds: float) -> None:
+        """Record a timing within the running stage; ignored outside a stage."""
+        if self._current is not None:
+            self._current.timings[name] = float(seconds)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = 0) -> Iterator[StageMetrics]:
+        """
+        Measure one stage run.
+
+        Args:
+            name: Stage name
+            rows_in: Number of rows entering the stage
+
+        Yields:
+            StageMetrics: The stage's metrics, for setting rows_out and counts
+        """
+        metrics = StageMetrics(name=name, rows_in=rows_in)
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        global _peak_stages, _peak_reset
+        if self.track_peak:
+            # Nested or concurrent stages, of this or another instrumentation,
+            # leave the outer stage's peak count alone
+            with _peak_lock:
+                if _peak_stages == 0:
+                    _peak_reset = reset_peak_rss()
+                _peak_stages += 1
+
+        profiler = cProfile.Profile() if self.profile_dir else None
+        rss_before = current_rss_bytes()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        outer, self._current = self._current, metrics
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield metrics
+        except Exception:
+            metrics.status = "failed"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.cpu_seconds = time.process_time() - cpu_start
+            metrics.rss_bytes = current_rss_bytes()
+            metrics.rss_delta_bytes = metrics.rss_bytes - rss_before
+            if self.track_peak:
+                with _peak_lock:
+                    if _peak_reset:
+                        metrics.peak_rss_bytes = peak_rss_bytes()
+                    _peak_stages -= 1
+
+            if self.trace_memory:
+                traced_current, traced_peak = tracemalloc.get_traced_memory()
+                metrics.traced_peak_bytes = traced_peak
+                metrics.traced_delta_bytes = traced_current - traced_before
+            if started_tracing:
+                tracemalloc.stop()
+
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                metrics.profile_path = os.path.join(
+                    self.profile_dir, f"{len(self.metrics.stages):02d}_{name}.prof"
+                )
+                profiler.dump_stats(metrics.profile_path)
+
+            self._current = outer
+            self.metrics.stages.append(metrics)
+            self._emit(metrics)
+
+    def _emit(self, metrics: StageMetrics) -> None:
+        """Log a finished stage and pass it to the hooks."""
+        logger.info(
+            f"{metrics.name}: {metrics.wall_seconds:.3f}s wall, "
+            f"{metrics.cpu_seconds:.3f}s cpu, "
+            f"{metrics.rows_in} -> {metrics.rows_out} rows"
+        )
+        for hook in self.hooks:
+            try:
+                hook(metrics)
+            except Exception as e:
+                logger.error(f"Metrics hook failed: {e}")
+
+    def finish(self) -> PipelineMetrics:
+        """
+        Finish a run, writing the metrics to json_path if configured.
+
+        Returns:
+            PipelineMetrics: The metrics of the run
+        """
+        if self.json_path is not None:
+            self.metrics.to_json(self.json_path)
+            logger.info(f"Pipeline metrics saved to {self.json_path}")
+        return self.metrics
@@ -0,0 +1,128 @@
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Order-side column holding the hashed 상품명구분 while the stages run
+KEY_HASH_COLUMN = "_key_hash"
+
+
+def hash_text(values: np.ndarray) -> np.ndarray:
+    """
+    Return stable 64-bit hashes of key values.
+
+    Values are hashed as text with pandas' SipHash and its fixed default key,
+    so a key hashes the same in every run and process. Non-text keys (numbers
+    read from Excel) hash like their str() and missing values share one hash,
+    which KeyHasher's collision check turns into a fallback where it matters.
+
+    Args:
+        values: Key values, typically the distinct keys of a column
+
+    Returns:
+        np.ndarray: One uint64 hash per value
+    """
+    text = np.array(values, dtype=object)
+    missing = pd.isna(text)
+    if pd.api.types.infer_dtype(text, skipna=True) not in ("string", "empty"):
+        text = text.astype(str).astype(object)
+    text[missing] = None
+    return pd.util.hash_array(text, categorize=False)
+
+
+def factorize_keys(keys: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (row codes, distinct values) of a column, missing values included.
+
+    Categoricals reuse their codes; other columns are factorized once.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        # Code -1 (missing) picks the trailing NaN
+        uniques = np.append(keys.cat.categories.to_numpy(object), np.nan)
+        return keys.cat.codes.to_numpy(), uniques
+
+    codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+class KeyHasher:
+    """
+    Stable 64-bit join keys for 상품명구분 text with collision detection.
+
+    Each key column is hashed once per distinct value and the hashes are
+    broadcast back to the rows. Every distinct key hashed is remembered, so if
+    two different keys ever share a hash, collided is set and callers join on
+    the text keys instead.
+    """
+
+    def __init__(self):
+        """Initialize an empty key registry."""
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._values = np.empty(0, dtype=object)
+        self.collided = False
+
+    def hash(self, keys: pd.Series) -> np.ndarray:
+        """
+        Hash a key column and register its distinct keys.
+
+        Args:
+            keys: Text keys, possibly categorical
+
+        Returns:
+            np.ndarray: One uint64 hash per row
+        """
+        codes, uniques = factorize_keys(keys)
+        unique_hashes = hash_text(uniques)
+        self._register(unique_hashes, uniques)
+        return unique_hashes[codes]
+
+    def merge(self, other: "KeyHasher") -> None:
+        """
+        Register every key another hasher has seen.
+
+        Args:
+            other: Hasher whose keys, or collision, carry over to this one
+        """
+        if other.collided:
+            self._flag_collision()
+        else:
+            self._register(other._hashes, other._values)
+
+    def _register(self, hashes: np.ndarray, values: np.ndarray) -> None:
+        """Add distinct keys to the registry, flagging any hash collision."""
+        if self.collided:
+            return
+
+        # values are distinct, so a repeated hash is a collision
+        if len(pd.unique(hashes)) < len(hashes):
+            self._flag_collision()
+            return
+
+        positions = pd.Index(self._hashes).get_indexer(hashes)
+        known = positions >= 0
+        known_values = pd.Series(self._values[positions[known]], dtype=object)
+        new_values = pd.Series(values[known], dtype=object)
+        same = (known_values.to_numpy() == new_values.to_numpy()) | (
+            known_values.isna().to_numpy() & new_values.isna().to_numpy()
+        )
+        if not same.all():
+            self._flag_collision()
+            return
+
+        self._hashes = np.concatenate([self._hashes, hashes[~known]])
+        self._values = np.concatenate([self._values, values[~known]])
+
+    def _flag_collision(self) -> None:
+        """Switch to text joins for the rest of this hasher's life."""
+        logger.warning("상품명구분 hash collision detected, joining on text keys")
+        self.collided = True
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._values = np.empty(0, dtype=object)
+
+    @property
+    def key_count(self) -> int:
+        """Number of distinct keys registered."""
+        return len(self._hashes)
@@ -0,0 +1,328 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_VERSION = 1
+DEFAULT_SUGGESTION_DIR = ".suggestion_cache"
+SUGGESTIONS_NAME = "suggestions.json"
+DEFAULT_NGRAM = 2
+DEFAULT_TOP_K = 5
+
+# Master columns shown next to each suggested key
+SUGGESTION_COLUMNS = ["매입처", "상품코드", "상품명_발주서기준"]
+
+
+def key_ngrams(key, n: int = DEFAULT_NGRAM) -> set:
+    """
+    Return the character n-grams of a key.
+
+    Keys are compared without spaces and case, like the 상품명구분 built from
+    the order columns. Keys shorter than n are their own single gram.
+
+    Args:
+        key: A 상품명구분 or 상품명구분1 value
+        n: Gram length in characters
+
+    Returns:
+        set: The key's distinct n-grams
+    """
+    text = str(key).replace(" ", "").lower()
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class KeyIndex:
+    """
+    Inverted n-gram index over the master sheet's 상품명구분1 keys.
+
+    Each key is split into character n-grams and every gram points to the
+    keys containing it. A query only reads the posting lists of its own
+    grams, rarest first and within a budget, so grams shared by most of the
+    catalog (deal-number digits, "옵션") cost nothing; the keys sharing the
+    most grams are then re-scored exactly by the Dice coefficient of their
+    gram sets. Query time depends on how many keys share the query's rare
+    grams, not on the catalog size.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable,
+        n: int = DEFAULT_NGRAM,
+        max_postings: int = 100_000,
+        candidates: int = 200,
+    ):
+        """
+        Initialize the index; it is built on the first query.
+
+        Args:
+            keys: Master keys; missing values are skipped and duplicates
+                indexed once
+            n: Gram length in characters
+            max_postings: Most posting entries read per query
+            candidates: Keys sharing the most grams read that are re-scored
+                exactly per query
+        """
+        self.n = n
+        self.max_postings = max_postings
+        self.candidates = candidates
+
+        keys = pd.unique(pd.Series(list(keys), dtype=object).dropna().map(str))
+        self.keys = np.asarray(keys, dtype=object)
+        self._vocabulary = None
+
+    def _build(self) -> None:
+        """Build the gram vocabulary and the posting lists."""
+        vocabulary: Dict[str, int] = {}
+        gram_ids = [
+            [
+                vocabulary.setdefault(gram, len(vocabulary))
+                for gram in key_ngrams(key, self.n)
+            ]
+            for key in self.keys
+        ]
+
+        # Grams of each key, as CSR offsets into one flat array
+        lengths = np.array([len(ids) for ids in gram_ids], dtype=np.int64)
+        flat = np.fromiter(
+            itertools.chain.from_iterable(gram_ids), dtype=np.int64, count=lengths.sum()
+        )
+        self._key_offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self._key_grams = flat
+        self._key_lengths = lengths
+
+        # Keys of each gram, the posting lists, also as CSR
+        order = np.argsort(flat, kind="stable")
+        self._postings = np.repeat(np.arange(len(self.keys)), lengths)[order]
+        self._posting_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(flat, minlength=len(vocabulary)))]
+        )
+        self._vocabulary = vocabulary
+
+        logger.info(
+            f"Indexed {len(self.keys)} master keys by {len(vocabulary)} "
+            f"{self.n}-grams"
+        )
+
+    def query(self, key, top_k: int = DEFAULT_TOP_K) -> List[Tuple[str, float]]:
+        """
+        Return the master keys most similar to a key.
+
+        Args:
+            key: The unmatched key
+            top_k: Most suggestions returned
+
+        Returns:
+            List[Tuple[str, float]]: (master key, Dice score) pairs, best
+            first; empty if no master key shares a gram
+        """
+        if self._vocabulary is None:
+            self._build()
+
+        grams = key_ngrams(key, self.n)
+        gram_ids = np.array(
+            [self._vocabulary[gram] for gram in grams if gram in self._vocabulary],
+            dtype=np.int64,
+        )
+        if len(gram_ids) == 0:
+            return []
+
+        # Read the rarest grams' postings first, at least one list
+        starts = self._posting_offsets[gram_ids]
+        sizes = self._posting_offsets[gram_ids + 1] - starts
+        by_rarity = np.argsort(sizes, kind="stable")
+        read = np.cumsum(sizes[by_rarity])
+        used = by_rarity[: max(1, np.searchsorted(read, self.max_postings, "right"))]
+        candidates = np.concatenate(
+            [self._postings[starts[i] : starts[i] + sizes[i]] for i in used]
+        )
+
+        # Re-score the keys sharing the most of the grams read
+        candidate_keys, shared = np.unique(candidates, return_counts=True)
+        if len(candidate_keys) > self.candidates:
+            keep = np.argpartition(-shared, self.candidates - 1)[: self.candidates]
+            candidate_keys = np.sort(candidate_keys[keep])
+
+        # Gather the candidates' grams back to back and count those in the query
+        starts = self._key_offsets[candidate_keys]
+        lengths = self._key_lengths[candidate_keys]
+        segment_starts = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - segment_starts, lengths)
+        positions += np.arange(lengths.sum())
+        in_query = np.isin(self._key_grams[positions], gram_ids).astype(np.int64)
+        common = np.add.reduceat(in_query, segment_starts)
+        scores = 2 * common / (len(grams) + lengths)
+
+        best = np.lexsort((candidate_keys, -scores))[:top_k]
+        return [
+            (self.keys[candidate_keys[i]], round(float(scores[i]), 4)) for i in best
+        ]
+
+
+def catalog_key_digest(keys: Sequence) -> str:
+    """Return a hash of a set of master keys, independent of their order."""
+    digest = hashlib.sha256()
+    for key in sorted({str(key) for key in keys if not pd.isna(key)}):
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SuggestionCache:
+    """
+    On-disk cache of the suggestions made for each unmatched key.
+
+    Suggestions depend only on the key and the set of master keys, so they
+    are reused across runs until the master keys, the gram length or a larger
+    top_k invalidate them; a mall that keeps sending the same renamed
+    products is looked up once.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_SUGGESTION_DIR):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached suggestions
+        """
+        self.cache_dir = cache_dir
+
+    def _path(self) -> str:
+        """Return the path of the suggestion file."""
+        return os.path.join(self.cache_dir, SUGGESTIONS_NAME)
+
+    def load(self, catalog_digest: str, n: int, top_k: int) -> Dict[str, List]:
+        """
+        Read the cached suggestions made against the same master keys.
+
+        Args:
+            catalog_digest: catalog_key_digest of the master keys
+            n: Gram length of the index
+            top_k: Suggestions needed per key
+
+        Returns:
+            Dict[str, List]: Suggestions by unmatched key, empty if none apply
+        """
+        try:
+            with open(self._path(), encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if (
+            cached.get("version") != SUGGESTION_VERSION
+            or cached.get("catalog") != catalog_digest
+            or cached.get("ngram") != n
+            or cached.get("top_k", 0) < top_k
+        ):
+            return {}
+        return cached["suggestions"]
+
+    def store(
+        self, catalog_digest: str, n: int, top_k: int, suggestions: Dict[str, List]
+    ) -> None:
+        """
+        Write the suggestions made against a set of master keys.
+
+        Args:
+            catalog_digest: catalog_key_digest of the master keys
+            n: Gram length of the index
+            top_k: Suggestions kept per key
+            suggestions: Suggestions by unmatched key
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": SUGGESTION_VERSION,
+                    "catalog": catalog_digest,
+                    "ngram": n,
+                    "top_k": top_k,
+                    "suggestions": suggestions,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self._path())
+
+
+def unmatched_key_report(
+    order_keys: pd.Series,
+    master_lookup: pd.DataFrame,
+    index: Optional[KeyIndex] = None,
+    top_k: int = DEFAULT_TOP_K,
+    cache: Optional[SuggestionCache] = None,
+) -> pd.DataFrame:
+    """
+    List the order keys without a master entry and their likely matches.
+
+    Args:
+        order_keys: 상품명구분 of every order row
+        master_lookup: One master row per 상품명구분1, as merged
+        index: KeyIndex over master_lookup's keys, a new one if None
+        top_k: Suggestions per unmatched key
+        cache: Suggestion cache reused across runs, off if None
+
+    Returns:
+        pd.DataFrame: One row per (unmatched key, suggestion), the keys with
+        the most order rows first, with columns 상품명구분, rows, rank,
+        상품명구분1, score and SUGGESTION_COLUMNS; keys without any
+        suggestion get a single row with empty suggestion columns
+    """
+    master_keys = master_lookup["상품명구분1"]
+    unmatched = order_keys[~order_keys.isin(master_keys)].astype(str)
+    counts = unmatched.value_counts(sort=False)
+    # Most affected keys first, then by key for a stable report
+    counts = counts.iloc[np.lexsort((counts.index.to_numpy(str), -counts.to_numpy()))]
+
+    # The index is built on its first query, so not if every key is cached
+    if index is None:
+        index = KeyIndex(master_keys)
+    digest = catalog_key_digest(master_keys)
+    cached = cache.load(digest, index.n, top_k) if cache is not None else {}
+    missing = [key for key in counts.index if key not in cached]
+    if missing:
+        logger.info(
+            f"Suggesting master keys for {len(missing)} of {len(counts)} "
+            "unmatched keys"
+        )
+        cached.update({key: index.query(key, top_k) for key in missing})
+        if cache is not None:
+            cache.store(digest, index.n, top_k, cached)
+
+    records = []
+    for key, rows in counts.items():
+        suggestions = cached[key][:top_k] or [(None, np.nan)]
+        for rank, (candidate, score) in enumerate(suggestions, start=1):
+            records.append(
+                {
+                    "상품명구분": key,
+                    "rows": rows,
+                    "rank": rank if candidate is not None else np.nan,
+                    "상품명구분1": candidate,
+                    "score": score,
+                }
+            )
+    report = pd.DataFrame(
+        records, columns=["상품명구분", "rows", "rank", "상품명구분1", "score"]
+    )
+
+    # Show who supplies each suggested product
+    details = master_lookup[["상품명구분1"] + SUGGESTION_COLUMNS].dropna(
+        subset=["상품명구분1"]
+    )
+    details = details.assign(
+        상품명구분1=[str(key) for key in details["상품명구분1"]]
+    ).drop_duplicates("상품명구분1")
+    return report.merge(details, on="상품명구분1", how="left").astype(
+        {"rank": "Int64", "rows": "int64"}
+    )
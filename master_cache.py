@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".master_cache"
+MANIFEST_NAME = "manifest.json"
+FRAME_NAMES = ("option", "master")
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_frame(df: pd.DataFrame, base_path: str) -> str:
+    """
+    Write a dataframe in a fast on-disk format.
+
+    Parquet is used when pyarrow is installed and every column converts
+    cleanly. Columns mixing Python types (e.g. int and str deal numbers) cannot
+    be stored in Parquet without changing their values, so such frames fall
+    back to pickle.
+
+    Args:
+        df: Dataframe to write
+        base_path: Output path without extension
+
+    Returns:
+        str: The format written, "parquet" or "pickle"
+    """
+    try:
+        import pyarrow  # noqa: F401
+
+        tmp_path = f"{base_path}.parquet.tmp"
+        df.to_parquet(tmp_path, engine="pyarrow")
+        os.replace(tmp_path, f"{base_path}.parquet")
+        return "parquet"
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.debug(f"Parquet not usable for {base_path}, using pickle: {e}")
+        if os.path.exists(f"{base_path}.parquet.tmp"):
+            os.remove(f"{base_path}.parquet.tmp")
+
+    tmp_path = f"{base_path}.pkl.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, f"{base_path}.pkl")
+    return "pickle"
+
+
+def read_frame(base_path: str, fmt: str) -> pd.DataFrame:
+    """Read a dataframe written by write_frame."""
+    if fmt == "parquet":
+        return pd.read_parquet(f"{base_path}.parquet", engine="pyarrow")
+    return pd.read_pickle(f"{base_path}.pkl")
+
+
+class MasterDataCache:
+    """
+    On-disk cache of the parsed 옵션분리 and 마스터 sheets.
+
+    Each master workbook gets its own entry directory holding the cleaned
+    option and master frames plus a manifest with the workbook's path, size,
+    mtime and content hash. An entry is reused while the workbook's content is
+    unchanged; a changed size or mtime triggers a re-hash, and the frames are
+    rebuilt only when the hash differs.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, layout: str = ""):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            layout: Identifies the sheets and columns the frames are parsed
+                with; entries stored under another layout are misses
+        """
+        self.cache_dir = cache_dir
+        self.layout = layout
+
+    def _entry_dir(self, master_excel_path: str) -> str:
+        """Return the entry directory for a workbook path."""
+        path_key = hashlib.sha256(
+            os.path.abspath(master_excel_path).encode("utf-8")
+        ).hexdigest()[:16]
+        return os.path.join(self.cache_dir, path_key)
+
+    def _read_manifest(self, entry_dir: str) -> Optional[Dict]:
+        """Read an entry manifest, or None if missing or unreadable."""
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir: str, manifest: Dict) -> None:
+        """Atomically write an entry manifest."""
+        tmp_path = os.path.join(entry_dir, f"{MANIFEST_NAME}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(entry_dir, MANIFEST_NAME))
+
+    def _validate(self, master_excel_path: str) -> Tuple[Optional[Dict], Dict]:
+        """
+        Check the cache entry against the workbook on disk.
+
+        Returns:
+            Tuple[Optional[Dict], Dict]: The manifest if the entry is valid
+            (else None), and the workbook's current source fingerprint
+        """
+        entry_dir = self._entry_dir(master_excel_path)
+        manifest = self._read_manifest(entry_dir)
+        stat = os.stat(master_excel_path)
+        source = {
+            "path": os.path.abspath(master_excel_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+        if (
+            manifest is None
+            or manifest.get("version") != CACHE_VERSION
+            or manifest.get("layout", "") != self.layout
+        ):
+            source["sha256"] = file_sha256(master_excel_path)
+            return None, source
+
+        cached = manifest["source"]
+        if (
+            cached["size"] == source["size"]
+            and cached["mtime_ns"] == source["mtime_ns"]
+        ):
+            source["sha256"] = cached["sha256"]
+            return manifest, source
+
+        # Size or mtime changed: only the content hash decides
+        source["sha256"] = file_sha256(master_excel_path)
+        if source["sha256"] != cached["sha256"]:
+            return None, source
+
+        manifest["source"] = source
+        self._write_manifest(entry_dir, manifest)
+        return manifest, source
+
+    def load(
+        self, master_excel_path: str
+    ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Load the cached frames for a workbook if they are still valid.
+
+        Args:
+            master_excel_path: Path to the master data Excel file
+
+        Returns:
+            Optional[Tuple[pd.DataFrame, pd.DataFrame]]: (option_df, master_df),
+            or None on a cache miss
+        """
+        manifest, _ = self._validate(master_excel_path)
+        if manifest is None:
+            return None
+        return self._read_entry(master_excel_path, manifest)
+
+    def _read_entry(
+        self, master_excel_path: str, manifest: Dict
+    ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Read an entry's frames, or None if they cannot be read."""
+        entry_dir = self._entry_dir(master_excel_path)
+        try:
+            return tuple(
+                read_frame(os.path.join(entry_dir, name), manifest["formats"][name])
+                for name in FRAME_NAMES
+            )
+        except Exception as e:
+            logger.warning(f"Discarding unreadable master cache entry: {e}")
+            return None
+
+    def store(
+        self,
+        master_excel_path: str,
+        option_df: pd.DataFrame,
+        master_df: pd.DataFrame,
+        source: Optional[Dict] = None,
+    ) -> None:
+        """
+        Store the parsed frames for a workbook.
+
+        Args:
+            master_excel_path: Path to the master data Excel file
+            option_df: Cleaned 옵션분리 frame
+            master_df: Cleaned 마스터 frame
+            source: Source fingerprint, computed from the file if omitted
+        """
+        if source is None:
+            stat = os.stat(master_excel_path)
+            source = {
+                "path": os.path.abspath(master_excel_path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_sha256(master_excel_path),
+            }
+
+        entry_dir = self._entry_dir(master_excel_path)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        formats = {
+            name: write_frame(df, os.path.join(entry_dir, name))
+            for name, df in zip(FRAME_NAMES, (option_df, master_df))
+        }
+        self._write_manifest(
+            entry_dir,
+            {
+                "version": CACHE_VERSION,
+                "layout": self.layout,
+                "source": source,
+                "formats": formats,
+                "rows": {"option": len(option_df), "master": len(master_df)},
+                "created_at": time.time(),
+            },
+        )
+
+    def get_or_load(
+        self,
+        master_excel_path: str,
+        loader: Callable[[], Tuple[pd.DataFrame, pd.DataFrame]],
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return the cached frames, parsing the workbook with loader on a miss.
+
+        Args:
+            master_excel_path: Path to the master data Excel file
+            loader: Callable returning freshly parsed (option_df, master_df)
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: (option_df, master_df)
+        """
+        manifest, source = self._validate(master_excel_path)
+        if manifest is not None:
+            frames = self._read_entry(master_excel_path, manifest)
+            if frames is not None:
+                logger.info("Loaded option and master data from cache")
+                return frames
+
+        option_df, master_df = loader()
+        try:
+            self.store(master_excel_path, option_df, master_df, source=source)
+        except OSError as e:
+            logger.warning(f"Could not write master cache: {e}")
+        return option_df, master_df
+
+    def info(self) -> List[Dict]:
+        """
+        Describe every cache entry.
+
+        Returns:
+            List[Dict]: One manifest per entry, with its directory, on-disk
+            size and whether it still matches the workbook
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+
+        for name in sorted(os.listdir(self.cache_dir)):
+            entry_dir = os.path.join(self.cache_dir, name)
+            manifest = self._read_manifest(entry_dir)
+            if manifest is None:
+                continue
+
+            source_path = manifest["source"]["path"]
+            fresh = (
+                os.path.exists(source_path)
+                and self._validate(source_path)[0] is not None
+            )
+            entries.append(
+                {
+                    **manifest,
+                    "entry_dir": entry_dir,
+                    "bytes": sum(
+                        os.path.getsize(os.path.join(entry_dir, f))
+                        for f in os.listdir(entry_dir)
+                    ),
+                    "fresh": fresh,
+                }
+            )
+        return entries
+
+    def clear(self, master_excel_path: Optional[str] = None) -> int:
+        """
+        Remove cache entries.
+
+        Args:
+            master_excel_path: Only clear this workbook's entry if given
+
+        Returns:
+            int: Number of entries removed
+        """
+        if master_excel_path is not None:
+            entry_dirs = [self._entry_dir(master_excel_path)]
+        elif os.path.isdir(self.cache_dir):
+            entry_dirs = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+            ]
+        else:
+            entry_dirs = []
+
+        removed = 0
+        for entry_dir in entry_dirs:
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir)
+                removed += 1
+
+        logger.info(f"Removed {removed} master cache entries")
+        return removed
+
+
+def main():
+    """Inspect or clear the master data cache."""
+    parser = argparse.ArgumentParser(description="Manage the master data cache.")
+    parser.add_argument("command", choices=["info", "clear"])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--master", help="Limit clear to this master workbook's entry")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Entries are fresh if the pipeline would reuse them
+    from workbook_loader import MASTER_SHEETS, sheet_layout
+
+    cache = MasterDataCache(args.cache_dir, layout=sheet_layout(MASTER_SHEETS))
+
+    if args.command == "clear":
+        removed = cache.clear(args.master)
+        print(f"Removed {removed} cache entries from {args.cache_dir}")
+        return
+
+    entries = cache.info()
+    if not entries:
+        print(f"No cache entries in {args.cache_dir}")
+    for entry in entries:
+        source = entry["source"]
+        print(f"{entry['entry_dir']}:")
+        print(f"  source:  {source['path']}")
+        print(f"  size:    {source['size']} bytes, sha256 {source['sha256'][:12]}")
+        print(
+            f"  rows:    option={entry['rows']['option']} master={entry['rows']['master']}"
+        )
+        print(f"  formats: {entry['formats']}")
+        print(
+            f"  cached:  {entry['bytes']} bytes, {'fresh' if entry['fresh'] else 'stale'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
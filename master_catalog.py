@@ -0,0 +1,247 @@
+import logging
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_frame
+from join_keys import KEY_HASH_COLUMN, KeyHasher
+
+logger = logging.getLogger(__name__)
+
+# Master sheet columns merged into the orders, join key first
+MASTER_COLUMNS = [
+    "상품명구분1",
+    "매입처",
+    "상품코드",
+    "상품명_ERP기준\n(빈칸삭제)",
+    "옵션명_ERP기준\n(옵션공란NO채우기)",
+    "상품명_발주서기준",
+    "옵션명_발주서기준\n(옵션 공란 남겨두기)",
+    "기준판매가",
+    "매입단가",
+    "단위수량",
+]
+
+
+def _count_follow_on_rows(option_value) -> int:
+    """Return how many rows follow a "옵션구분N" anchor (N-1), or 0 if none."""
+    if not isinstance(option_value, str) or not option_value.startswith("옵션구분"):
+        return 0
+
+    num_match = re.search(r"옵션구분(\d+)", option_value)
+    if not num_match:
+        return 0
+
+    return max(int(num_match.group(1)) - 1, 0)
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    """Return values with writes disabled."""
+    values = np.array(values, copy=True)
+    values.flags.writeable = False
+    return values
+
+
+class MasterCatalog:
+    """
+    The option and master sheets with their lookup indexes, built once.
+
+    Every lookup the pipeline makes against the two sheets is precomputed
+    here: the 옵션분리 code of each 상품명구분1 (first option row wins), the
+    anchor position and follow-on span of each (상품명구분1, 옵션분리구분2)
+    bundle, and the master row of each 상품명구분1 (first master row wins),
+    each keyed both by text and by the 64-bit key hash.
+
+    A catalog is immutable once built: attributes cannot be reassigned, the
+    index arrays are read-only and the pipeline never writes to the sheets it
+    holds, so one catalog can be shared by any number of processors, threads
+    and forked workers. Replacing the master data means building a new
+    catalog.
+    """
+
+    __slots__ = (
+        "_option_df",
+        "_master_df",
+        "_compact",
+        "_key_hasher",
+        "_option_codes",
+        "_option_codes_by_hash",
+        "_span_table",
+        "_master_lookup",
+        "_master_lookup_by_hash",
+    )
+
+    def __init__(
+        self, option_df: pd.DataFrame, master_df: pd.DataFrame, compact: bool = False
+    ):
+        """
+        Build the catalog and all of its indexes.
+
+        Args:
+            option_df: Cleaned 옵션분리 sheet, with a default RangeIndex
+            master_df: Cleaned 마스터 sheet
+            compact: Compact master_df's columns first (categorical text and
+                narrow numerics), as for a compact OrderProcessor
+        """
+        if option_df is None or master_df is None:
+            raise ValueError("A MasterCatalog needs both option_df and master_df")
+
+        # Master text is repeated on every merged order row, so all of it
+        # becomes categorical even where values are unique within the sheet
+        if compact:
+            master_df = compact_frame(master_df, max_unique_ratio=1.0)
+
+        set_slot = super().__setattr__
+        set_slot("_option_df", option_df)
+        set_slot("_master_df", master_df)
+        set_slot("_compact", compact)
+
+        # Catalog keys are hashed once; processors register them for their
+        # own collision checks
+        key_hasher = KeyHasher()
+        option_hashes = key_hasher.hash(option_df["상품명구분1"])
+        master_hashes = key_hasher.hash(master_df["상품명구분1"])
+        set_slot("_key_hasher", key_hasher)
+
+        option_keys = option_df["상품명구분1"]
+        first_rows = (~option_keys.duplicated(keep="first")).to_numpy()
+        codes = _read_only(option_df["옵션분리구분2"].to_numpy()[first_rows])
+        set_slot(
+            "_option_codes",
+            pd.Series(codes, index=pd.Index(option_keys.to_numpy()[first_rows])),
+        )
+        set_slot(
+            "_option_codes_by_hash",
+            pd.Series(codes, index=pd.Index(_read_only(option_hashes[first_rows]))),
+        )
+
+        set_slot("_span_table", self._build_span_table(option_df))
+
+        first_rows = (~master_df["상품명구분1"].duplicated(keep="first")).to_numpy()
+        set_slot("_master_lookup", master_df[first_rows][MASTER_COLUMNS])
+        set_slot(
+            "_master_lookup_by_hash",
+            master_df[first_rows][MASTER_COLUMNS[1:]].assign(
+                **{KEY_HASH_COLUMN: master_hashes[first_rows]}
+            ),
+        )
+
+        logger.info(
+            f"Built master catalog: {len(self._option_codes)} option keys, "
+            f"{len(self._span_table)} bundle anchors, "
+            f"{len(self._master_lookup)} master keys"
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MasterCatalog is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("MasterCatalog is immutable")
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            super().__setattr__(slot, value)
+
+    @staticmethod
+    def _build_span_table(option_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Build the anchor -> follow-on span table for option_df.
+
+        Each (상품명구분1, 옵션분리구분2) pair whose code is "옵션구분N" maps to the
+        first option row carrying it (the anchor), the position of the first
+        follow-on row, and how many of the N-1 follow-on rows actually exist.
+
+        Returns:
+            pd.DataFrame: One row per anchor with columns 상품명구분, 옵션분리,
+            _span_start, _span_wanted and _span_taken
+        """
+        anchors = option_df[["상품명구분1", "옵션분리구분2"]].drop_duplicates(
+            keep="first"
+        )
+        wanted = anchors["옵션분리구분2"].map(_count_follow_on_rows)
+        anchors = anchors[wanted > 0]
+
+        # The anchor's index label is used as a position in option_df
+        span_start = anchors.index.to_numpy(dtype=np.int64) + 1
+        span_wanted = wanted[wanted > 0].to_numpy(dtype=np.int64)
+        span_available = np.clip(len(option_df) - span_start, 0, None)
+
+        return pd.DataFrame(
+            {
+                "상품명구분": anchors["상품명구분1"].to_numpy(),
+                "옵션분리": anchors["옵션분리구분2"].to_numpy(),
+                "_span_start": _read_only(span_start),
+                "_span_wanted": _read_only(span_wanted),
+                "_span_taken": _read_only(np.minimum(span_wanted, span_available)),
+            }
+        )
+
+    @property
+    def option_df(self) -> pd.DataFrame:
+        """The 옵션분리 sheet; shared, so treat it as read-only."""
+        return self._option_df
+
+    @property
+    def master_df(self) -> pd.DataFrame:
+        """The 마스터 sheet; shared, so treat it as read-only."""
+        return self._master_df
+
+    @property
+    def compact(self) -> bool:
+        """True if master_df was compacted."""
+        return self._compact
+
+    @property
+    def collided(self) -> bool:
+        """True if two catalog keys share a hash, so only text joins are safe."""
+        return self._key_hasher.collided
+
+    def holds(
+        self, option_df: Optional[pd.DataFrame], master_df: Optional[pd.DataFrame]
+    ) -> bool:
+        """Return True if the catalog was built from exactly these frames."""
+        return option_df is self._option_df and master_df is self._master_df
+
+    def register_keys(self, key_hasher: KeyHasher) -> None:
+        """
+        Add the catalog's keys to a processor's hasher for its collision check.
+
+        Args:
+            key_hasher: Hasher of the order keys joined to this catalog
+        """
+        key_hasher.merge(self._key_hasher)
+
+    def option_codes(self, hashed: bool) -> pd.Series:
+        """
+        Return the 옵션분리 code lookup.
+
+        Args:
+            hashed: Key the lookup by 상품명구분1 hash instead of text
+
+        Returns:
+            pd.Series: 옵션분리구분2 of the first option row of each key
+        """
+        return self._option_codes_by_hash if hashed else self._option_codes
+
+    @property
+    def span_table(self) -> pd.DataFrame:
+        """Bundle anchors with their follow-on spans, see _build_span_table."""
+        return self._span_table
+
+    def master_lookup(self, hashed: bool) -> pd.DataFrame:
+        """
+        Return the master rows to merge, one per key.
+
+        Args:
+            hashed: Key the rows by KEY_HASH_COLUMN instead of 상품명구분1
+
+        Returns:
+            pd.DataFrame: MASTER_COLUMNS of the first master row of each key,
+            with the join key column replaced by KEY_HASH_COLUMN if hashed
+        """
+        return self._master_lookup_by_hash if hashed else self._master_lookup
@@ -0,0 +1,158 @@
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+# Master columns merged into the orders that hold quantities or KRW amounts
+WON_MASTER_COLUMNS = ["기준판매가", "매입단가", "단위수량"]
+
+
+def won_column(series: pd.Series, name: str = "") -> pd.Series:
+    """
+    Return a quantity or KRW amount column as exact nullable Int64.
+
+    Float columns (numbers read from Excel, or made float by the missing
+    values of unmatched master rows) convert exactly, since every whole
+    number below 2**53 is a float; text columns are parsed as numbers first.
+
+    Args:
+        series: Numeric column, possibly nullable, compacted or text
+        name: Column name for error messages
+
+    Returns:
+        pd.Series: The column as Int64, missing where series is
+
+    Raises:
+        ValueError: If a value is not a whole number
+        OverflowError: If a value does not fit in int64
+    """
+    if series.dtype == "Int64":
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    if series.dtype.kind not in "iuf":
+        series = pd.to_numeric(series.astype(object), errors="raise")
+
+    if series.dtype.kind in "iu":
+        if series.dtype.kind == "u" and series.max() > _INT64_MAX:
+            raise OverflowError(f"{name} has values beyond int64")
+        return series.astype("Int64")
+
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = np.isnan(values)
+    filled = np.where(mask, 0.0, values)
+    with np.errstate(invalid="ignore"):
+        whole = filled.astype(np.int64)
+    # Fractions, and values beyond int64, do not survive the round trip
+    inexact = whole != filled
+    if inexact.any():
+        value = float(filled[np.flatnonzero(inexact)[0]])
+        if not np.isfinite(value) or value.is_integer():
+            raise OverflowError(f"{name} has values beyond int64: {value!r}")
+        raise ValueError(f"{name} holds a fraction of a won: {value!r}")
+    return pd.Series(
+        pd.arrays.IntegerArray(whole, mask), index=series.index, copy=False
+    )
+
+
+def won_frame(df: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    """Return df with some columns as nullable Int64, see won_column."""
+    return df.assign(**{col: won_column(df[col], col) for col in columns})
+
+
+def won_bound(series: pd.Series) -> int:
+    """
+    Return an upper bound on the absolute values of a numeric column.
+
+    Plain integer columns are bounded exactly, others through float64 with
+    room for its rounding error. Values that are not numbers are ignored.
+    """
+    if len(series) == 0:
+        return 0
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iu":
+        values = series.to_numpy()
+        return max(abs(int(values.min())), abs(int(values.max())))
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    if series.dtype.kind not in "iuf":
+        series = pd.to_numeric(series, errors="coerce")
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    largest = float(np.nanmax(np.abs(values), initial=0.0))
+    if not np.isfinite(largest):
+        return _INT64_MAX + 1
+    return int(np.ceil(largest * (1 + 2.0**-50))) + 1
+
+
+def multiply_won(
+    left: pd.Series,
+    right: pd.Series,
+    name: str = "",
+    left_bound: Optional[int] = None,
+    right_bound: Optional[int] = None,
+) -> pd.Series:
+    """
+    Multiply two Int64 columns exactly, missing where either side is.
+
+    The product cannot overflow if the bounds of both sides multiply to at
+    most the int64 maximum, which is checked once for the whole column; only
+    otherwise are the rows checked one by one.
+
+    Args:
+        left: First factor, Int64
+        right: Second factor, Int64
+        name: Result column name for error messages
+        left_bound: won_bound of left, or any larger bound; computed if None
+        right_bound: won_bound of right, or any larger bound; computed if None
+
+    Returns:
+        pd.Series: The Int64 products
+
+    Raises:
+        OverflowError: If a product does not fit in int64
+    """
+    if left_bound is None:
+        left_bound = won_bound(left)
+    if right_bound is None:
+        right_bound = won_bound(right)
+
+    if left_bound * right_bound > _INT64_MAX:
+        estimate = left.astype("Float64") * right.astype("Float64")
+        large = estimate.abs().to_numpy(dtype=np.float64, na_value=0.0) >= 2.0**62
+        for row in np.flatnonzero(large):
+            exact = int(left.iloc[row]) * int(right.iloc[row])
+            if not -_INT64_MAX - 1 <= exact <= _INT64_MAX:
+                raise OverflowError(f"{name} overflows int64 at row {row}: {exact}")
+
+    return left * right
+
+
+def check_won_totals(df: pd.DataFrame, columns: Sequence[str]) -> None:
+    """
+    Check that any sum over integer columns fits in int64.
+
+    Grouped and grand totals of a column are at most the sum of its absolute
+    values, so one bound per column covers every total taken from it.
+
+    Args:
+        df: Frame whose columns are summed
+        columns: Columns to check; non-integer columns are skipped
+
+    Raises:
+        OverflowError: If a total could overflow int64
+    """
+    for col in columns:
+        series = df[col]
+        if series.dtype.kind not in "iu" or pd.api.types.is_bool_dtype(series):
+            continue
+        if won_bound(series) * len(series) <= _INT64_MAX:
+            continue
+        # The float sum is within a factor 1 + 1e-9 of the exact one
+        absolute = series.abs().to_numpy(dtype=np.float64, na_value=0.0)
+        if absolute.sum() >= 2.0**62:
+            raise OverflowError(f"Totals of {col} could overflow int64")
@@ -0,0 +1,382 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compact import restore_frame
+from join_keys import factorize_keys
+from master_cache import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+MEMO_VERSION = 1
+DEFAULT_MEMO_DIR = ".normalization_memo"
+MANIFEST_NAME = "manifest.json"
+
+DEAL_COLUMN = "판매몰상품번호/딜번호[출력]"
+NAME_COLUMN = "원상품명(쇼핑몰)[출력]"
+OPTION_COLUMN = "원옵션(쇼핑몰)[출력]"
+PRODUCT_COLUMNS = [DEAL_COLUMN, NAME_COLUMN, OPTION_COLUMN]
+
+# What a rule rewrites: the product name, which is also written to the
+# output, or only the 상품명구분 key built from deal number, name and option
+RULE_TARGETS = ("name", "key")
+
+
+@dataclass(frozen=True)
+class NormalizationRule:
+    """One substitution made while cleaning order product strings."""
+
+    pattern: str
+    replacement: str = ""
+    target: str = "name"
+    description: str = ""
+
+
+# The clean-up the pipeline has always made
+DEFAULT_RULES = (
+    NormalizationRule(r"\[쿠폰\]", "", "name", "Coupon tag in product names"),
+    NormalizationRule(" ", "", "key", "Spaces in 상품명구분"),
+)
+
+
+class RuleSet:
+    """
+    Normalization rules, compiled into one single-pass regex per target.
+
+    The rules of a target are joined into one alternation with a named group
+    per rule, so each string is scanned once however many rules there are.
+    Where several rules match at the same position the earlier rule wins;
+    replacements are literal text.
+    """
+
+    def __init__(self, rules: Sequence[NormalizationRule] = DEFAULT_RULES):
+        """
+        Compile the rules.
+
+        Args:
+            rules: Rules in priority order
+        """
+        self.rules = tuple(rules)
+        self._patterns: Dict[str, Optional[re.Pattern]] = {}
+        self._replacements: Dict[str, Dict[str, str]] = {}
+
+        for target in RULE_TARGETS:
+            rules = [rule for rule in self.rules if rule.target == target]
+            self._replacements[target] = {
+                f"_r{i}": rule.replacement for i, rule in enumerate(rules)
+            }
+            self._patterns[target] = (
+                re.compile(
+                    "|".join(
+                        f"(?P<_r{i}>{rule.pattern})" for i, rule in enumerate(rules)
+                    )
+                )
+                if rules
+                else None
+            )
+
+        unknown = {rule.target for rule in self.rules} - set(RULE_TARGETS)
+        if unknown:
+            raise ValueError(f"Unknown normalization rule targets: {sorted(unknown)}")
+
+    @classmethod
+    def from_json(cls, path: str) -> "RuleSet":
+        """
+        Load rules from a JSON list of NormalizationRule fields.
+
+        Args:
+            path: File holding e.g. [{"pattern": "\\\\[특가\\\\]", "target": "name"}]
+
+        Returns:
+            RuleSet: The rules, in file order
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls([NormalizationRule(**rule) for rule in json.load(f)])
+
+    @property
+    def digest(self) -> str:
+        """Hash of the rules, identifying what they normalize to."""
+        document = json.dumps(
+            [asdict(rule) for rule in self.rules], ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+    def apply(self, values: pd.Series, target: str) -> pd.Series:
+        """
+        Rewrite text values with the rules of one target.
+
+        Args:
+            values: Text column; non-text values become missing, as with
+                the pandas .str methods
+            target: "name" or "key"
+
+        Returns:
+            pd.Series: The rewritten values
+        """
+        pattern = self._patterns[target]
+        if pattern is None:
+            return values
+        replacements = self._replacements[target]
+        return values.str.replace(
+            pattern, lambda match: replacements[match.lastgroup], regex=True
+        )
+
+    def normalize(self, products: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """
+        Clean product names and build the 상품명구분 keys.
+
+        Args:
+            products: Deal number, product name and filled option columns
+
+        Returns:
+            Tuple[pd.Series, pd.Series]: (cleaned names, keys)
+        """
+        names = self.apply(products[NAME_COLUMN], "name")
+        keys = self.apply(
+            products[DEAL_COLUMN].astype(str)
+            + names.astype(str)
+            + products[OPTION_COLUMN],
+            "key",
+        )
+        return names, keys
+
+
+def _memo_key(value) -> Optional[str]:
+    """
+    Return the memo key part of a raw value.
+
+    Text is its own key and missing values are None. Other values are keyed
+    by type and text, since 123 and 123.0 compare equal but make different
+    keys.
+    """
+    if isinstance(value, str):
+        return value
+    if pd.isna(value):
+        return None
+    return f"\0{type(value).__name__}:{value}"
+
+
+def _memo_keys(values: pd.Series) -> List[Optional[str]]:
+    """Return the memo key part of every value of a column."""
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        return values.astype(object).where(values.notna(), None).tolist()
+    return [_memo_key(value) for value in values.tolist()]
+
+
+def distinct_rows(
+    df: pd.DataFrame, columns: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Number the distinct combinations of some columns.
+
+    Args:
+        df: Frame holding the columns, possibly categorical
+        columns: Columns to combine
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The combination code of each row, in
+        order of first appearance, and the first row of each combination
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col in columns:
+        col_codes, uniques = factorize_keys(df[col])
+        # Categorical missing values (-1) take the trailing NaN's code
+        col_codes = np.where(col_codes < 0, len(uniques) - 1, col_codes)
+        codes, _ = pd.factorize(codes * len(uniques) + col_codes)
+
+    # factorize numbers combinations as they first appear
+    is_first = np.ones(len(codes), dtype=bool)
+    is_first[1:] = codes[1:] > np.maximum.accumulate(codes)[:-1]
+    return codes, np.flatnonzero(is_first)
+
+
+def _broadcast(
+    values: pd.Series, codes: np.ndarray, index: pd.Index, categorical: bool
+) -> pd.Series:
+    """Expand per-combination values to rows, optionally as a categorical."""
+    if categorical:
+        value_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        return pd.Series(
+            pd.Categorical.from_codes(value_codes[codes], categories=uniques),
+            index=index,
+        )
+    return values.take(codes).set_axis(index)
+
+
+class ProductNormalizer:
+    """
+    Normalizes order product strings once per distinct raw triple.
+
+    The same (deal number, product name, option) triple repeats across many
+    order rows, so the rules run on the distinct triples only and the cleaned
+    names and 상품명구분 keys are broadcast back to the rows through codes.
+    Results are memoized per triple for the normalizer's lifetime, so later
+    batches of a streamed file skip triples seen before, and with a memo
+    directory they are kept across runs until the rules change.
+    """
+
+    def __init__(self, rules: Optional[RuleSet] = None, memo_dir: Optional[str] = None):
+        """
+        Initialize the normalizer.
+
+        Args:
+            rules: Rules to apply, DEFAULT_RULES if None
+            memo_dir: Directory keeping the memo across runs, in memory only
+                if None
+        """
+        self.rules = rules or RuleSet()
+        self.memo_dir = memo_dir
+        self._memo: Dict[Tuple, Tuple] = {}
+        self._memo_loaded = False
+        # Entries normalized here that memo_dir does not hold yet
+        self._new_memo: Dict[Tuple, Tuple] = {}
+
+    def _load_memo(self) -> None:
+        """Read the memo written by earlier runs with the same rules."""
+        self._memo_loaded = True
+        if self.memo_dir is None:
+            return
+        try:
+            with open(
+                os.path.join(self.memo_dir, MANIFEST_NAME), encoding="utf-8"
+            ) as f:
+                manifest = json.load(f)
+            if (
+                manifest.get("version") != MEMO_VERSION
+                or manifest.get("rules") != self.rules.digest
+            ):
+                return
+            memo_df = read_frame(
+                os.path.join(self.memo_dir, "memo"), manifest["format"]
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"No usable normalization memo: {e}")
+            return
+
+        triples = zip(*(_memo_keys(memo_df[col]) for col in PRODUCT_COLUMNS))
+        self._memo.update(
+            zip(triples, zip(memo_df["name"].tolist(), memo_df["key"].tolist()))
+        )
+        logger.info(f"Loaded {len(memo_df)} normalized product triples")
+
+    def save(self) -> None:
+        """Write the memo to memo_dir if it gained entries."""
+        if self.memo_dir is None or not self._new_memo:
+            return
+
+        os.makedirs(self.memo_dir, exist_ok=True)
+        triples = list(self._memo)
+        results = list(self._memo.values())
+        memo_df = pd.DataFrame(
+            {
+                **{
+                    col: pd.Series([triple[i] for triple in triples], dtype=object)
+                    for i, col in enumerate(PRODUCT_COLUMNS)
+                },
+                "name": pd.Series([result[0] for result in results], dtype=object),
+                "key": pd.Series([result[1] for result in results], dtype=object),
+            }
+        )
+        manifest = {
+            "version": MEMO_VERSION,
+            "rules": self.rules.digest,
+            "format": write_frame(memo_df, os.path.join(self.memo_dir, "memo")),
+            "entries": len(memo_df),
+            "updated_at": time.time(),
+        }
+        tmp_path = os.path.join(self.memo_dir, f"{MANIFEST_NAME}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.memo_dir, MANIFEST_NAME))
+        self._new_memo = {}
+
+    def memo_entries(self) -> Dict[Tuple, Tuple]:
+        """Return every memoized (name, key) result by raw triple."""
+        if not self._memo_loaded:
+            self._load_memo()
+        return dict(self._memo)
+
+    def new_memo_entries(self) -> Dict[Tuple, Tuple]:
+        """Return the results normalized since the memo was last saved."""
+        return dict(self._new_memo)
+
+    def merge_memo(self, memo: Dict[Tuple, Tuple], new: bool = True) -> None:
+        """
+        Add results memoized by another normalizer with the same rules.
+
+        Args:
+            memo: (name, key) results by raw triple, as memo_entries returns
+            new: Whether save should write the entries this adds
+        """
+        if not self._memo_loaded:
+            self._load_memo()
+        added = {
+            triple: result
+            for triple, result in memo.items()
+            if triple not in self._memo
+        }
+        self._memo.update(added)
+        if new:
+            self._new_memo.update(added)
+
+    def _normalize_distinct(self, products: pd.DataFrame) -> Tuple[List, List]:
+        """Return the cleaned names and keys of distinct triples, memoized."""
+        if not self._memo_loaded:
+            self._load_memo()
+
+        triples = list(zip(*(_memo_keys(products[col]) for col in PRODUCT_COLUMNS)))
+        results = [self._memo.get(triple) for triple in triples]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        if missing:
+            names, keys = self.rules.normalize(products.iloc[missing])
+            for i, name, key in zip(missing, names.tolist(), keys.tolist()):
+                results[i] = (name, key)
+                self._memo[triples[i]] = results[i]
+                self._new_memo[triples[i]] = results[i]
+
+        logger.debug(
+            f"Normalized {len(missing)} of {len(triples)} distinct product triples"
+        )
+        return [result[0] for result in results], [result[1] for result in results]
+
+    def normalize(
+        self, df: pd.DataFrame, categorical_keys: bool = False
+    ) -> Tuple[pd.Series, pd.Series]:
+        """
+        Clean an order frame's product names and build its 상품명구분 keys.
+
+        Args:
+            df: Order rows with PRODUCT_COLUMNS, options already filled
+            categorical_keys: Return the keys as a categorical
+
+        Returns:
+            Tuple[pd.Series, pd.Series]: (cleaned names, keys) aligned with
+            df; the names keep the name column's dtype
+        """
+        codes, first_rows = distinct_rows(df, PRODUCT_COLUMNS)
+        products = restore_frame(
+            df.iloc[first_rows][PRODUCT_COLUMNS].reset_index(drop=True)
+        )
+        names, keys = self._normalize_distinct(products)
+
+        name_dtype = df[NAME_COLUMN].dtype
+        categorical_names = isinstance(name_dtype, pd.CategoricalDtype)
+        names = pd.Series(names, dtype=object)
+        if not categorical_names:
+            names = names.astype(name_dtype)
+        # Keys are text, typed as astype(str) types them
+        keys = pd.Series(keys, dtype=object).astype(str)
+
+        return (
+            _broadcast(names, codes, df.index, categorical_names).rename(NAME_COLUMN),
+            _broadcast(keys, codes, df.index, categorical_keys).rename("상품명구분"),
+        )
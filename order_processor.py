@@ -1,14 +1,215 @@
 import logging
-import re
-from typing import Dict, List, Optional
+import sys
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
+
+from aggregation import OrderLineGroups, aggregate_order_lines
+from checkpoints import StageCheckpoints
+from compact import (
+    compact_concat,
+    compact_frame,
+    fill_text,
+    frame_nbytes,
+    restore_frame,
+    widen_numeric,
+)
+from instrumentation import Instrumentation, PipelineMetrics
+from join_keys import KEY_HASH_COLUMN, KeyHasher, factorize_keys
+from key_suggestions import (
+    DEFAULT_SUGGESTION_DIR,
+    DEFAULT_TOP_K,
+    KeyIndex,
+    SuggestionCache,
+    unmatched_key_report,
+)
+from master_cache import DEFAULT_CACHE_DIR, MasterDataCache
+from master_catalog import MASTER_COLUMNS, MasterCatalog, _count_follow_on_rows
+from money import WON_MASTER_COLUMNS, multiply_won, won_bound, won_column, won_frame
+from normalization import ProductNormalizer
+from purchase_orders import PurchaseOrderRollup, build_purchase_orders
+from workbook_loader import (
+    MASTER_SHEETS,
+    ORDER_COLUMNS,
+    ORDER_SHEETS,
+    WorkbookData,
+    WorkbookPool,
+    read_workbook,
+    sheet_layout,
+)
+from writers import DEFAULT_CHUNK_ROWS, WriteResult, write_output
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Processing stages in run order: (method, input frame, output frame)
+PIPELINE_STAGES = (
+    ("clean_order_data", "order_df", "order_df"),
+    ("process_option_separation", "order_df", "order_df"),
+    ("expand_option_rows", "order_df", "final_order_df"),
+    ("merge_master_data", "final_order_df", "final_order_df"),
+    ("calculate_final_values", "final_order_df", "final_order_df"),
+)
+
+# Optional order-side column numbering the order rows. Expanded rows get
+# -1 - their parent's number, so sharded runs can be put back in order.
+ORDER_ROW_COLUMN = "_order_row"
+
+# What each stage reads: the output of an earlier stage or a loaded frame
+STAGE_DEPENDENCIES = {
+    "clean_order_data": ("order_df",),
+    "process_option_separation": ("clean_order_data", "option_df"),
+    "expand_option_rows": ("process_option_separation", "option_df"),
+    "merge_master_data": ("expand_option_rows", "master_df"),
+    "calculate_final_values": ("merge_master_data",),
+}
+
+
+def _deal_number_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Rank distinct deal numbers in output order.
+
+    A deal number sorts by its base id, the part before "-" in values such as
+    "1234-1", then by the integer after "-" (0 if absent). Base ids that are
+    numbers or digit strings compare as numbers, so "1234-1" follows 1234;
+    other text sorts after all numbers and missing values come last. Deal
+    numbers with equal keys share a rank.
+
+    Args:
+        values: Distinct deal numbers
+
+    Returns:
+        np.ndarray: One dense int64 rank per value
+    """
+    values = pd.Series(values, dtype=object)
+    is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    missing = values.isna().to_numpy()
+
+    text = values[is_text].astype(str)
+    parts = text.str.split("-", n=2)
+    has_sub = text.str.contains("-", regex=False)
+
+    # The sub id is the integer after the first "-", 0 if it is not one; with
+    # no "-" anywhere the column is all-NaN floats, so it is kept as objects
+    sub_text = parts.str[1].where(has_sub).astype(object).str.strip()
+    is_int = sub_text.str.fullmatch(r"[+-]?\d+").fillna(False).astype(bool)
+    sub_ids = pd.to_numeric(sub_text.where(is_int)).fillna(0)
+
+    base_text = pd.Series(None, index=values.index, dtype=object)
+    base_text[is_text] = parts.str[0].where(has_sub, text)
+    numbers = pd.to_numeric(values.where(~is_text & ~missing), errors="coerce")
+    is_digits = base_text.str.fullmatch(r"\d+").fillna(False).astype(bool)
+    numbers[is_digits] = pd.to_numeric(base_text[is_digits])
+
+    # Anything else non-missing (e.g. a date) sorts as its text
+    other = (~is_text & ~missing & numbers.isna()).to_numpy()
+    base_text[other] = values[other].astype(str)
+
+    kind = np.where(numbers.notna(), 0, np.where(missing, 2, 1))
+    text_codes, _ = pd.factorize(base_text.where(kind == 1), sort=True)
+    sub = np.zeros(len(values), dtype=np.int64)
+    sub[is_text] = sub_ids.to_numpy(dtype=np.int64)
+    keys = (
+        sub,
+        text_codes,
+        numbers.fillna(0).to_numpy(dtype=np.float64),
+        kind,
+    )
+
+    # Dense ranks: equal keys (e.g. 1234 and "1234") tie
+    order = np.lexsort(keys)
+    changed = np.zeros(len(order), dtype=bool)
+    for key in keys:
+        sorted_key = key[order]
+        changed[1:] |= sorted_key[1:] != sorted_key[:-1]
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.cumsum(changed)
+    return ranks
+
+
+def deal_number_ranks(deal_numbers: pd.Series) -> np.ndarray:
+    """
+    Return each row's rank in deal-number order, ties sharing a rank.
+
+    The ranks are derived once per distinct deal number.
+
+    Args:
+        deal_numbers: The 판매몰상품번호/딜번호 column
+
+    Returns:
+        np.ndarray: One int64 rank per row
+    """
+    codes, uniques = factorize_keys(deal_numbers)
+    return _deal_number_ranks(uniques)[codes]
+
+
+def deal_number_order(deal_numbers: pd.Series) -> np.ndarray:
+    """
+    Return the positions that put rows in deal-number order.
+
+    The keys are derived once per distinct deal number and rows are ordered by
+    a stable sort of their integer ranks, so rows with equal keys keep their
+    order, and already-sorted runs (order rows followed by their expansions)
+    are merged in linear time.
+
+    Args:
+        deal_numbers: The 판매몰상품번호/딜번호 column
+
+    Returns:
+        np.ndarray: Row positions in output order
+    """
+    return np.argsort(deal_number_ranks(deal_numbers), kind="stable")
+
+
+def copy_on_write():
+    """
+    Return a context running pandas with Copy-on-Write semantics.
+
+    Copy-on-Write is always on from pandas 3; older versions turn it on for
+    the duration of the context.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return nullcontext()
+    return pd.option_context("mode.copy_on_write", True)
+
+
+def release_arrow_memory() -> None:
+    """
+    Hand memory freed by pyarrow's allocator back to the OS.
+
+    Arrow-backed columns (pandas' default strings) are allocated by pyarrow,
+    whose allocator otherwise keeps freed memory for reuse, so replacing a
+    column raises the RSS even though the old one was freed. Nothing is
+    done if pyarrow was never imported.
+    """
+    pyarrow = sys.modules.get("pyarrow")
+    if pyarrow is not None:
+        pyarrow.default_memory_pool().release_unused()
+
+
+def _take_rows(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """
+    Reorder the rows of a frame one column at a time.
+
+    Each column is taken out of df before its reordered copy is made, so
+    only about one column is held twice rather than the whole frame. df is
+    left empty.
+
+    Args:
+        df: Frame to reorder, given up by the caller
+        positions: Row positions in their new order
+
+    Returns:
+        pd.DataFrame: The reordered rows, with a default RangeIndex
+    """
+    columns = {}
+    for col in list(df.columns):
+        columns[col] = df.pop(col).take(positions).reset_index(drop=True)
+        release_arrow_memory()
+    return pd.DataFrame(columns, copy=False)
+
 
 class OrderProcessor:
     """
@@ -25,6 +226,20 @@ class OrderProcessor:
         self,
         order_excel_path: str = "통합주문리스트.xlsx",
         master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        use_cache: bool = True,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        instrumentation: Optional[Instrumentation] = None,
+        compact: bool = False,
+        hash_keys: bool = True,
+        engine: str = "pandas",
+        load_executor: str = "process",
+        checkpoint_dir: Optional[str] = None,
+        catalog: Optional[MasterCatalog] = None,
+        normalizer: Optional[ProductNormalizer] = None,
+        exact_money: bool = False,
+        excel_backend: str = "auto",
+        copy_free: bool = False,
+        aggregate: bool = False,
     ):
         """
         Initialize the OrderProcessor with file paths.
@@ -32,33 +247,102 @@ class OrderProcessor:
         Args:
             order_excel_path: Path to the order list Excel file
             master_excel_path: Path to the master data Excel file
+            use_cache: Reuse parsed option/master sheets cached on disk
+            cache_dir: Directory of the parsed master sheet cache
+            instrumentation: Per-stage metrics collector, a default one if None
+            compact: Keep order and master frames as categoricals and narrow
+                numerics while processing, restoring them only at output
+            hash_keys: Join orders to the option and master sheets on 64-bit
+                hashes of 상품명구분 instead of the text keys; the polars engine
+                always joins on the text keys
+            engine: Name of the engine running the processing stages, a key
+                of engines.ENGINES
+            load_executor: How load_data reads the order and master workbooks
+                side by side: "process", "fork", "thread" or "serial"
+            checkpoint_dir: Checkpoint each stage's output in this directory
+                and reuse the outputs whose inputs are unchanged, off if None
+            catalog: Prebuilt option and master data to use instead of loading
+                the master workbook; it may be shared with other processors
+            normalizer: Product name and key normalization, with its rules
+                and memo; the default rules, memoized in memory, if None
+            exact_money: Calculate quantities and KRW amounts as nullable
+                Int64 with overflow checks instead of float64
+            excel_backend: Parser reading the workbooks, a key of
+                workbook_loader.EXCEL_BACKENDS, or "auto" for the fastest
+                one installed
+            copy_free: Run under pandas Copy-on-Write, reorder and merge
+                column by column instead of copying whole frames, and drop
+                order_df once final_order_df is built; the run's peak memory
+                is reported against its input frames
+            aggregate: Collapse the order lines sharing a 상품명구분 key into
+                one row with their summed quantity after cleaning, so the
+                later stages run once per key; expand_order_lines gives the
+                line-level output back. Checkpoints are not supported
         """
+        # engines builds on this module, so it is imported on first use
+        from engines import create_engine
+
         self.order_excel_path = order_excel_path
         self.master_excel_path = master_excel_path
+        self.master_cache = (
+            MasterDataCache(cache_dir, layout=sheet_layout(MASTER_SHEETS))
+            if use_cache
+            else None
+        )
+        self.instrumentation = instrumentation or Instrumentation()
+        if copy_free:
+            # The peak is reported against the input frames
+            self.instrumentation.track_peak = True
+        self.compact = compact
+        self.key_hasher = KeyHasher() if hash_keys else None
+        self.load_executor = load_executor
+        self.excel_backend = excel_backend
+        self.normalizer = normalizer or ProductNormalizer()
+        self.exact_money = exact_money
+        self.copy_free = copy_free
+        self.aggregate = aggregate
+        self.line_groups: Optional[OrderLineGroups] = None
+        self._won_bounds = None
+        if aggregate and checkpoint_dir is not None:
+            raise ValueError("Checkpoints are not supported with aggregation")
+        self.checkpoints = (
+            StageCheckpoints(checkpoint_dir) if checkpoint_dir is not None else None
+        )
+        if catalog is not None and catalog.compact != compact:
+            raise ValueError(
+                f"Catalog built with compact={catalog.compact}, "
+                f"processor has compact={compact}"
+            )
+        self.catalog = catalog
+        self._catalog_injected = catalog is not None
+        self._registered_catalog = None
+        self._key_index = None
         self.order_df = None
-        self.option_df = None
-        self.master_df = None
+        self.option_df = None if catalog is None else catalog.option_df
+        self.master_df = None if catalog is None else catalog.master_df
         self.final_order_df = None
+        self.engine = create_engine(engine, self)
 
     def load_data(self) -> None:
-        """Load all required data from Excel files."""
+        """
+        Load all required data from Excel files.
+
+        The order workbook is parsed on a worker while the option and master
+        data are read from the cache or parsed here, so loading takes about
+        as long as the slower of the two workbooks. With an injected catalog
+        only the order workbook is read.
+        """
         try:
-            # Load order data
-            logger.info("Loading order data...")
-            df = pd.read_excel(self.order_excel_path, sheet_name="통합주문리스트")
-            self.order_df = df.iloc[:, 5:9].copy()
-
-            # Load option data
-            logger.info("Loading option data...")
-            self.option_df = pd.read_excel(
-                self.master_excel_path, sheet_name="옵션분리", header=1
-            ).dropna(subset=["상품명구분1"])
-
-            # Load master data
-            logger.info("Loading master data...")
-            self.master_df = pd.read_excel(
-                self.master_excel_path, sheet_name="마스터", header=1
-            )
+            if self._catalog_injected:
+                self.load_master_data()
+                self.load_order_data()
+            else:
+                with WorkbookPool(self.load_executor) as pool:
+                    order_data = pool.submit(
+                        self.order_excel_path, ORDER_SHEETS, self.excel_backend
+                    )
+                    self.load_master_data()
+                    self._set_order_data(order_data.result())
 
             logger.info("Data loading completed successfully")
 
@@ -66,6 +350,76 @@ class OrderProcessor:
             logger.error(f"Error loading data: {e}")
             raise
 
+    def load_order_data(self) -> None:
+        """Load the order list from the order Excel file."""
+        logger.info("Loading order data...")
+        self._set_order_data(
+            read_workbook(self.order_excel_path, ORDER_SHEETS, self.excel_backend)
+        )
+
+    def _set_order_data(self, order_data: WorkbookData) -> None:
+        """Keep the order columns of a parsed order workbook."""
+        self._record_load_times(order_data)
+        self.order_df = order_data.frames["통합주문리스트"][ORDER_COLUMNS]
+
+        if self.compact:
+            self.order_df = compact_frame(self.order_df)
+
+    def load_master_data(self) -> None:
+        """
+        Load option and master data and build their catalog.
+
+        The sheets come from the cache when it is fresh; an injected catalog
+        is used as is.
+        """
+        if not self._catalog_injected:
+            if self.master_cache is not None:
+                option_df, master_df = self.master_cache.get_or_load(
+                    self.master_excel_path, self._read_master_sheets
+                )
+            else:
+                option_df, master_df = self._read_master_sheets()
+
+            # option_df is only read per anchor, so only master_df is compacted
+            self.catalog = MasterCatalog(option_df, master_df, compact=self.compact)
+
+        self.option_df = self.catalog.option_df
+        self.master_df = self.catalog.master_df
+
+        self.instrumentation.record("option_rows", len(self.option_df))
+        self.instrumentation.record("master_rows", len(self.master_df))
+
+    def _read_master_sheets(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Parse the option and master sheets from the master Excel file.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: (option_df, master_df)
+        """
+        # Both sheets are parsed from one open of the workbook
+        logger.info("Loading option and master data...")
+        master_data = read_workbook(
+            self.master_excel_path, MASTER_SHEETS, self.excel_backend
+        )
+        self._record_load_times(master_data)
+
+        option_df = master_data.frames["옵션분리"].dropna(subset=["상품명구분1"])
+        master_df = master_data.frames["마스터"]
+
+        return option_df, master_df
+
+    def _record_load_times(self, data: WorkbookData) -> None:
+        """Log and record how long a workbook took to open and parse."""
+        self.instrumentation.record_time(f"{data.workbook}:open", data.open_seconds)
+        for timing in data.timings:
+            logger.info(
+                f"Parsed {timing.workbook} [{timing.sheet}]: "
+                f"{timing.rows} rows in {timing.seconds:.2f}s with {data.backend}"
+            )
+            self.instrumentation.record_time(
+                f"{timing.workbook}:{timing.sheet}", timing.seconds
+            )
+
     def clean_order_data(self) -> None:
         """Clean and prepare order data."""
         if self.order_df is None:
@@ -75,29 +429,45 @@ class OrderProcessor:
 
         # Fill missing options with "NO"
         option_col_name = self.order_df.iloc[:, 2].name
-        self.order_df[option_col_name] = self.order_df[option_col_name].fillna("NO")
+        self.order_df[option_col_name] = fill_text(self.order_df[option_col_name], "NO")
 
-        # Remove "[쿠폰]" from product names
-        product_col_name = self.order_df.iloc[:, 1].name
-        self.order_df[product_col_name] = self.order_df[product_col_name].str.replace(
-            r"\[쿠폰\]", "", regex=True
+        # Clean product names and build the 상품명구분 keys, once per distinct
+        # (deal number, name, option)
+        names, keys = self.normalizer.normalize(
+            self.order_df, categorical_keys=self.compact
         )
+        self.order_df[names.name] = names
+        self.order_df["상품명구분"] = keys
+        self.normalizer.save()
 
-        # Create product identifier column
-        self._create_product_identifier()
+        if self.key_hasher is not None:
+            self.order_df[KEY_HASH_COLUMN] = self.key_hasher.hash(
+                self.order_df["상품명구분"]
+            )
 
         logger.info("Order data cleaning completed")
 
-    def _create_product_identifier(self) -> None:
-        """Create a unique product identifier by combining relevant columns."""
-        self.order_df["상품명구분"] = (
-            self.order_df["판매몰상품번호/딜번호[출력]"].astype(str)
-            + self.order_df["원상품명(쇼핑몰)[출력]"].astype(str)
-            + self.order_df["원옵션(쇼핑몰)[출력]"]
-        )
+    def aggregate_order_lines(self) -> None:
+        """
+        Collapse the cleaned order lines to one row per 상품명구분 key.
 
-        # Remove spaces from identifier
-        self.order_df["상품명구분"] = self.order_df["상품명구분"].str.replace(" ", "")
+        The aggregated rows are numbered in ORDER_ROW_COLUMN, which the later
+        stages carry to their output rows, and the lines are kept in
+        line_groups for expand_order_lines.
+        """
+        if self.order_df is None:
+            raise ValueError("Order data not loaded. Call load_data() first.")
+
+        logger.info("Aggregating order lines...")
+
+        line_count = len(self.order_df)
+        self.order_df, self.line_groups = aggregate_order_lines(self.order_df)
+        if self.compact:
+            self.order_df = compact_frame(self.order_df, columns=["수량[출력]"])
+        self.order_df[ORDER_ROW_COLUMN] = np.arange(len(self.order_df))
+
+        self.instrumentation.record("aggregated_rows", len(self.order_df))
+        logger.info(f"Aggregated {line_count} order lines to {len(self.order_df)} rows")
 
     def process_option_separation(self) -> None:
         """Process option separation logic."""
@@ -106,33 +476,77 @@ class OrderProcessor:
 
         logger.info("Processing option separation...")
 
+        order_keys = self._join_keys(self.order_df)
+        lookup_series = self._get_catalog().option_codes(self._use_key_hashes())
+
         # Step 1: Initial assignment with placeholder
         placeholder = "__NEEDS_ACTUAL_VALUE__"
-        condition = self.order_df["상품명구분"].isin(self.option_df["상품명구분1"])
+        condition = order_keys.isin(lookup_series.index)
         self.order_df["옵션분리"] = np.where(condition, placeholder, None)
+        self.instrumentation.record("option_matched_rows", condition.sum())
 
-        # Step 2: Create lookup and update values
-        self._update_option_separation_values(placeholder)
+        # Step 2: Look up and update values
+        self._update_option_separation_values(placeholder, order_keys, lookup_series)
 
         logger.info("Option separation processing completed")
 
-    def _update_option_separation_values(self, placeholder: str) -> None:
-        """Update option separation values using lookup from option_df."""
-        # Create lookup series
-        lookup_series = self.option_df.drop_duplicates(
-            subset=["상품명구분1"], keep="first"
-        ).set_index("상품명구분1")["옵션분리구분2"]
-
+    def _update_option_separation_values(
+        self, placeholder: str, order_keys: pd.Series, lookup_series: pd.Series
+    ) -> None:
+        """Update option separation values from the catalog's code lookup."""
         # Update values
         rows_to_update_mask = self.order_df["옵션분리"] == placeholder
-        values_to_set = self.order_df.loc[rows_to_update_mask, "상품명구분"].map(
-            lookup_series
-        )
+        values_to_set = order_keys[rows_to_update_mask].map(lookup_series)
         self.order_df.loc[rows_to_update_mask, "옵션분리"] = values_to_set
 
         # Clean up remaining placeholders
         self.order_df.loc[self.order_df["옵션분리"] == placeholder, "옵션분리"] = None
 
+        if self.compact:
+            self.order_df["옵션분리"] = self.order_df["옵션분리"].astype("category")
+
+    def _get_catalog(self) -> MasterCatalog:
+        """Return the catalog of option_df and master_df, rebuilt if replaced."""
+        if self.catalog is None or not self.catalog.holds(
+            self.option_df, self.master_df
+        ):
+            # The frames were assigned directly; they are used as given
+            self.catalog = MasterCatalog(self.option_df, self.master_df)
+        return self.catalog
+
+    def _use_key_hashes(self) -> bool:
+        """Return True while joins can use the hashed 상품명구분 keys."""
+        return self.key_hasher is not None and not self.key_hasher.collided
+
+    def _order_hashes(self, df: pd.DataFrame) -> pd.Series:
+        """Return an order frame's key hashes, hashing them if not yet done."""
+        if KEY_HASH_COLUMN not in df.columns:
+            df[KEY_HASH_COLUMN] = self.key_hasher.hash(df["상품명구분"])
+        return df[KEY_HASH_COLUMN]
+
+    def _join_keys(self, order_df: pd.DataFrame) -> pd.Series:
+        """
+        Return the keys joining order rows to the catalog.
+
+        These are the 64-bit hashes of 상품명구분, or the text keys themselves
+        when key hashing is off or a hash collision was seen; the catalog
+        lookups are keyed to match _use_key_hashes().
+
+        Returns:
+            pd.Series: Order keys, aligned with the rows of order_df
+        """
+        if self._use_key_hashes():
+            catalog = self._get_catalog()
+            if self._registered_catalog is not catalog:
+                catalog.register_keys(self.key_hasher)
+                self._registered_catalog = catalog
+            order_keys = self._order_hashes(order_df)
+            # Hashing either side may have revealed a collision
+            if not self.key_hasher.collided:
+                return order_keys
+
+        return order_df["상품명구분"]
+
     def expand_option_rows(self) -> None:
         """Expand rows based on option separation requirements."""
         if self.order_df is None or self.option_df is None:
@@ -140,151 +554,170 @@ class OrderProcessor:
 
         logger.info("Expanding option rows...")
 
-        new_rows_list = []
-
-        for index, order_row in self.order_df.iterrows():
-            if self._should_expand_row(order_row):
-                expanded_rows = self._create_expanded_rows(order_row)
-                new_rows_list.extend(expanded_rows)
+        appended_df = self._create_expanded_rows()
 
         # Combine original and new rows
-        self._combine_rows(new_rows_list)
-
-        logger.info(f"Added {len(new_rows_list)} expanded rows")
-
-    def _should_expand_row(self, row: pd.Series) -> bool:
-        """Check if a row should be expanded based on option separation."""
-        return (
-            pd.notna(row["옵션분리"])
-            and isinstance(row["옵션분리"], str)
-            and row["옵션분리"].startswith("옵션구분")
-        )
-
-    def _create_expanded_rows(self, order_row: pd.Series) -> List[Dict]:
-        """Create expanded rows for a given order row."""
-        new_rows = []
-
-        try:
-            # Extract number from "옵션구분N"
-            num_match = re.search(r"옵션구분(\d+)", order_row["옵션분리"])
-            if not num_match:
-                return new_rows
+        self._combine_rows(appended_df)
 
-            total_items = int(num_match.group(1))
-            num_rows_to_append = total_items - 1
+        self.instrumentation.record("expanded_rows", len(appended_df))
+        logger.info(f"Added {len(appended_df)} expanded rows")
 
-            if num_rows_to_append <= 0:
-                return new_rows
-
-            # Find anchor row in option_df
-            anchor_idx = self._find_anchor_index(order_row)
-            if anchor_idx is None:
-                return new_rows
-
-            # Create new rows
-            for i in range(num_rows_to_append):
-                option_data_idx = anchor_idx + 1 + i
-
-                if option_data_idx >= len(self.option_df):
-                    logger.warning(f"Not enough subsequent rows in option_df")
-                    break
+    def _create_expanded_rows(self) -> pd.DataFrame:
+        """
+        Create the expanded rows for every order row in one batched pass.
 
-                new_row = self._create_new_row(order_row, option_data_idx)
-                new_rows.append(new_row)
+        Returns:
+            pd.DataFrame: The new rows, in order row order, with order_df columns
+        """
+        option_values = self.order_df["옵션분리"]
 
-        except Exception as e:
-            logger.error(f"Error creating expanded rows: {e}")
+        # Resolve "옵션구분N" once per distinct value instead of once per row
+        codes, uniques = pd.factorize(option_values)
+        wanted_by_code = np.array(
+            [_count_follow_on_rows(value) for value in uniques], dtype=np.int64
+        )
+        wanted = np.zeros(len(option_values), dtype=np.int64)
+        wanted[codes >= 0] = wanted_by_code[codes[codes >= 0]]
+        parent_positions = np.flatnonzero(wanted > 0)
+
+        parents = pd.DataFrame(
+            {
+                "_parent_position": parent_positions,
+                "상품명구분": self.order_df["상품명구분"]
+                .iloc[parent_positions]
+                .to_numpy(),
+                "옵션분리": option_values.iloc[parent_positions].to_numpy(),
+            }
+        )
+        parents = parents.merge(
+            self._get_catalog().span_table, on=["상품명구분", "옵션분리"], how="left"
+        )
 
-        return new_rows
+        self._log_expansion_warnings(parents)
 
-    def _find_anchor_index(self, order_row: pd.Series) -> Optional[int]:
-        """Find the anchor index in option_df for the given order row."""
-        anchor_candidates = self.option_df[
-            (self.option_df["상품명구분1"] == order_row["상품명구분"])
-            & (self.option_df["옵션분리구분2"] == order_row["옵션분리"])
-        ]
+        parents = parents.dropna(subset=["_span_start"])
+        span_start = parents["_span_start"].to_numpy(dtype=np.int64)
+        span_taken = parents["_span_taken"].to_numpy(dtype=np.int64)
 
-        if anchor_candidates.empty:
-            logger.warning(
-                f"Could not find anchor row for 상품명구분: {order_row['상품명구분']}"
-            )
-            return None
+        # Repeat each parent by its span and walk the follow-on option rows
+        offsets = np.arange(span_taken.sum()) - np.repeat(
+            np.cumsum(span_taken) - span_taken, span_taken
+        )
+        option_positions = np.repeat(span_start, span_taken) + offsets
+        order_positions = np.repeat(
+            parents["_parent_position"].to_numpy(dtype=np.int64), span_taken
+        )
 
-        return anchor_candidates.index[0]
+        if len(option_positions) == 0:
+            return pd.DataFrame(columns=self.order_df.columns)
 
-    def _create_new_row(self, order_row: pd.Series, option_data_idx: int) -> Dict:
-        """Create a new row based on order row and option data."""
-        option_source_row = self.option_df.iloc[option_data_idx]
+        # Only the columns the new rows take are gathered
+        option_rows = (
+            self.option_df[
+                ["판매몰상품번호/딜번호", "원상품명_쇼핑몰", "원옵션_쇼핑몰"]
+            ]
+            .iloc[option_positions]
+            .reset_index(drop=True)
+        )
+        order_rows = (
+            self.order_df[
+                [
+                    col
+                    for col in ("수량[출력]", "옵션분리", ORDER_ROW_COLUMN)
+                    if col in self.order_df.columns
+                ]
+            ]
+            .iloc[order_positions]
+            .reset_index(drop=True)
+        )
 
-        new_row = {
-            "판매몰상품번호/딜번호[출력]": option_source_row["판매몰상품번호/딜번호"],
-            "원상품명(쇼핑몰)[출력]": option_source_row["원상품명_쇼핑몰"],
-            "원옵션(쇼핑몰)[출력]": (
-                option_source_row["원옵션_쇼핑몰"]
-                if pd.notna(option_source_row["원옵션_쇼핑몰"])
-                else "NO"
+        new_columns = {
+            "판매몰상품번호/딜번호[출력]": option_rows["판매몰상품번호/딜번호"],
+            "원상품명(쇼핑몰)[출력]": option_rows["원상품명_쇼핑몰"],
+            "원옵션(쇼핑몰)[출력]": option_rows["원옵션_쇼핑몰"].where(
+                option_rows["원옵션_쇼핑몰"].notna(), "NO"
             ),
-            "수량[출력]": order_row["수량[출력]"],
-            "옵션분리": order_row["옵션분리"],
+            "수량[출력]": order_rows["수량[출력]"],
+            "옵션분리": order_rows["옵션분리"],
         }
 
-        # Create product identifier for new row
-        new_row["상품명구분"] = (
-            str(new_row["판매몰상품번호/딜번호[출력]"])
-            + str(new_row["원상품명(쇼핑몰)[출력]"])
-            + str(new_row["원옵션(쇼핑몰)[출력]"])
-        ).replace(" ", "")
-
-        return new_row
+        # Create product identifier for new rows
+        new_columns["상품명구분"] = (
+            new_columns["판매몰상품번호/딜번호[출력]"].map(str)
+            + new_columns["원상품명(쇼핑몰)[출력]"].map(str)
+            + new_columns["원옵션(쇼핑몰)[출력]"].map(str)
+        ).str.replace(" ", "")
+        if KEY_HASH_COLUMN in self.order_df.columns:
+            new_columns[KEY_HASH_COLUMN] = self.key_hasher.hash(
+                new_columns["상품명구분"]
+            )
+        if ORDER_ROW_COLUMN in self.order_df.columns:
+            new_columns[ORDER_ROW_COLUMN] = -1 - order_rows[ORDER_ROW_COLUMN]
+
+        return pd.DataFrame(
+            {
+                col: new_columns[col] if col in new_columns else None
+                for col in self.order_df.columns
+            },
+            index=pd.RangeIndex(len(option_positions)),
+        )
 
-    def _combine_rows(self, new_rows_list: List[Dict]) -> None:
+    def _log_expansion_warnings(self, parents: pd.DataFrame) -> None:
+        """Log missing anchors and short spans in order row order."""
+        missing = parents["_span_start"].isna()
+        short = parents["_span_taken"] < parents["_span_wanted"]
+        self.instrumentation.record("missing_anchor_rows", missing.sum())
+        self.instrumentation.record("short_span_rows", short.sum())
+
+        flagged = parents[missing | short]
+
+        for product_id, is_missing in zip(
+            flagged["상품명구분"], flagged["_span_start"].isna()
+        ):
+            if is_missing:
+                logger.warning(
+                    f"Could not find anchor row for 상품명구분: {product_id}"
+                )
+            else:
+                logger.warning(f"Not enough subsequent rows in option_df")
+
+    def _combine_rows(self, appended_df: pd.DataFrame) -> None:
         """Combine original order data with new expanded rows."""
-        if new_rows_list:
-            appended_df = pd.DataFrame(new_rows_list)
-
-            # Ensure same columns
-            for col in self.order_df.columns:
-                if col not in appended_df.columns:
-                    appended_df[col] = None
-
-            appended_df = appended_df[self.order_df.columns]
+        if not appended_df.empty and self.compact:
+            # Appended deal numbers such as "1234-1" turn that column into text
+            self.final_order_df = compact_frame(
+                compact_concat([self.order_df, appended_df]),
+                columns=["판매몰상품번호/딜번호[출력]"],
+            )
+        elif not appended_df.empty:
             self.final_order_df = pd.concat(
                 [self.order_df, appended_df], ignore_index=True
             )
+        elif self.copy_free:
+            # A new frame sharing the columns; Copy-on-Write copies them only
+            # if one is changed
+            self.final_order_df = self.order_df.copy(deep=False)
         else:
             self.final_order_df = self.order_df.copy()
 
+        if self.copy_free:
+            # The order rows live on in final_order_df
+            self.order_df = None
+
         # Sort the final dataframe
         self._sort_final_dataframe()
 
     def _sort_final_dataframe(self) -> None:
         """Sort the final dataframe to keep related items together."""
+        order = deal_number_order(self.final_order_df["판매몰상품번호/딜번호[출력]"])
 
-        def get_base_id(prod_id):
-            if isinstance(prod_id, str) and "-" in prod_id:
-                return prod_id.split("-")[0]
-            return prod_id
-
-        def get_sub_id(prod_id):
-            if isinstance(prod_id, str) and "-" in prod_id:
-                try:
-                    return int(prod_id.split("-")[1])
-                except (ValueError, IndexError):
-                    return 0
-            return 0
-
-        self.final_order_df["_sort_key"] = self.final_order_df[
-            "판매몰상품번호/딜번호[출력]"
-        ].apply(get_base_id)
-        self.final_order_df["_sub_sort_key"] = self.final_order_df[
-            "판매몰상품번호/딜번호[출력]"
-        ].apply(get_sub_id)
-
-        self.final_order_df = (
-            self.final_order_df.sort_values(by=["_sort_key", "_sub_sort_key"])
-            .drop(columns=["_sort_key", "_sub_sort_key"])
-            .reset_index(drop=True)
-        )
+        # Expansion usually leaves few rows out of place; skip the copy if none
+        if np.any(order != np.arange(len(order))):
+            if self.copy_free:
+                self.final_order_df = _take_rows(self.final_order_df, order)
+            else:
+                self.final_order_df = self.final_order_df.take(order)
+        self.final_order_df = self.final_order_df.reset_index(drop=True)
 
     def merge_master_data(self) -> None:
         """Merge master data with the processed order data."""
@@ -293,39 +726,93 @@ class OrderProcessor:
 
         logger.info("Merging master data...")
 
-        # Define columns to merge from master data
-        master_columns = [
-            "상품명구분1",
-            "매입처",
-            "상품코드",
-            "상품명_ERP기준\n(빈칸삭제)",
-            "옵션명_ERP기준\n(옵션공란NO채우기)",
-            "상품명_발주서기준",
-            "옵션명_발주서기준\n(옵션 공란 남겨두기)",
-            "기준판매가",
-            "매입단가",
-            "단위수량",
+        order_keys = self._join_keys(self.final_order_df)
+        master_lookup_df = self._get_catalog().master_lookup(self._use_key_hashes())
+        if self.exact_money:
+            # Converted once per master key; unmatched rows merge as missing
+            master_lookup_df = won_frame(master_lookup_df, WON_MASTER_COLUMNS)
+
+        if (
+            self.copy_free
+            and not self.final_order_df.columns.isin(MASTER_COLUMNS[1:]).any()
+        ):
+            unmatched = self._gather_master_columns(order_keys, master_lookup_df)
+        else:
+            unmatched = self._merge_master_lookup(order_keys, master_lookup_df)
+
+        # Track order keys without a master entry
+        self.instrumentation.record("master_unmatched_rows", unmatched.sum())
+        self.instrumentation.record(
+            "master_unmatched_keys",
+            self.final_order_df.loc[unmatched, "상품명구분"].nunique(),
+        )
+
+        # Clean up the join key columns
+        join_key_columns = [
+            col
+            for col in ("상품명구분1", KEY_HASH_COLUMN)
+            if col in self.final_order_df.columns
         ]
+        if join_key_columns:
+            self.final_order_df = self.final_order_df.drop(columns=join_key_columns)
+
+        logger.info("Master data merge completed")
 
-        # Create lookup dataframe
-        master_lookup_df = self.master_df.drop_duplicates(
-            subset=["상품명구분1"], keep="first"
-        )[master_columns]
+    def _merge_master_lookup(
+        self, order_keys: pd.Series, master_lookup_df: pd.DataFrame
+    ) -> pd.Series:
+        """
+        Left-merge the master lookup into final_order_df.
+
+        Returns:
+            pd.Series: True for order rows without a master entry
+        """
+        if self._use_key_hashes():
+            # Join on the hashes; the text key stays on the order rows
+            join_columns = {"on": KEY_HASH_COLUMN}
+        else:
+            join_columns = {"left_on": "상품명구분", "right_on": "상품명구분1"}
+
+            if isinstance(order_keys.dtype, pd.CategoricalDtype):
+                # With identical categories on both sides the merge joins on
+                # the codes and keeps the key categorical
+                lookup_keys = master_lookup_df["상품명구분1"].astype(order_keys.dtype)
+                master_lookup_df = master_lookup_df[lookup_keys.notna()].assign(
+                    상품명구분1=lookup_keys[lookup_keys.notna()]
+                )
 
         # Perform left merge
         self.final_order_df = pd.merge(
             self.final_order_df,
             master_lookup_df,
-            left_on="상품명구분",
-            right_on="상품명구분1",
             how="left",
+            indicator=True,
+            **join_columns,
         )
 
-        # Clean up duplicate column
-        if "상품명구분1" in self.final_order_df.columns:
-            self.final_order_df = self.final_order_df.drop(columns=["상품명구분1"])
+        return self.final_order_df.pop("_merge") == "left_only"
 
-        logger.info("Master data merge completed")
+    def _gather_master_columns(
+        self, order_keys: pd.Series, master_lookup_df: pd.DataFrame
+    ) -> np.ndarray:
+        """
+        Add the master columns to final_order_df without copying its rows.
+
+        Gives the rows and dtypes of the left merge, but instead of building
+        a new frame from every order column, each order key is looked up
+        once and the master columns are taken by the resulting positions
+        and added to the existing frame.
+
+        Returns:
+            np.ndarray: True for order rows without a master entry
+        """
+        key_column = KEY_HASH_COLUMN if self._use_key_hashes() else "상품명구분1"
+        positions = pd.Index(master_lookup_df[key_column]).get_indexer(order_keys)
+        for col in MASTER_COLUMNS[1:]:
+            self.final_order_df[col] = take(
+                master_lookup_df[col].array, positions, allow_fill=True
+            )
+        return positions < 0
 
     def calculate_final_values(self) -> None:
         """Calculate final order quantities and totals."""
@@ -334,42 +821,418 @@ class OrderProcessor:
 
         logger.info("Calculating final values...")
 
+        df = self.final_order_df
+        if self.exact_money:
+            self._calculate_won_values(df)
+            logger.info("Final calculations completed")
+            return
+
+        # Compacted columns are widened first so the products cannot overflow
+
         # Calculate order quantity
-        self.final_order_df["발주수량"] = (
-            self.final_order_df["단위수량"] * self.final_order_df["수량[출력]"]
-        )
+        df["발주수량"] = widen_numeric(df["단위수량"]) * widen_numeric(df["수량[출력]"])
 
         # Remove unit quantity column as it's no longer needed
-        self.final_order_df.drop(columns="단위수량", inplace=True)
+        df.drop(columns="단위수량", inplace=True)
 
         # Calculate totals
-        self.final_order_df["기준판매가합계"] = (
-            self.final_order_df["발주수량"] * self.final_order_df["기준판매가"]
+        df["기준판매가합계"] = df["발주수량"] * widen_numeric(df["기준판매가"])
+        df["매입가합계"] = df["발주수량"] * widen_numeric(df["매입단가"])
+
+        logger.info("Final calculations completed")
+
+    def _calculate_won_values(self, df: pd.DataFrame) -> None:
+        """
+        Calculate the order quantities and totals as exact whole numbers.
+
+        Quantities and prices become nullable Int64, missing on rows without
+        a master entry, and every product is checked for int64 overflow. The
+        master columns arrive as Int64 from merge_master_data, so only other
+        engines' float columns are converted here. Merged prices and unit
+        quantities are bounded by the master sheet's, so the overflow checks
+        use bounds taken once per master sheet rather than per run.
+        """
+        quantity = won_column(df["수량[출력]"], "수량[출력]")
+        sale_price = won_column(df["기준판매가"], "기준판매가")
+        purchase_price = won_column(df["매입단가"], "매입단가")
+        unit_quantity = won_column(df["단위수량"], "단위수량")
+        bounds = self._won_master_bounds(df)
+
+        quantity_bound = won_bound(quantity)
+        order_quantity = multiply_won(
+            unit_quantity,
+            quantity,
+            "발주수량",
+            bounds["단위수량"],
+            quantity_bound,
         )
-        self.final_order_df["매입가합계"] = (
-            self.final_order_df["발주수량"] * self.final_order_df["매입단가"]
+        order_bound = bounds["단위수량"] * quantity_bound
+
+        df["수량[출력]"] = quantity
+        df["기준판매가"] = sale_price
+        df["매입단가"] = purchase_price
+        df["발주수량"] = order_quantity
+        df.drop(columns="단위수량", inplace=True)
+
+        df["기준판매가합계"] = multiply_won(
+            order_quantity,
+            sale_price,
+            "기준판매가합계",
+            order_bound,
+            bounds["기준판매가"],
+        )
+        df["매입가합계"] = multiply_won(
+            order_quantity,
+            purchase_price,
+            "매입가합계",
+            order_bound,
+            bounds["매입단가"],
         )
 
-        logger.info("Final calculations completed")
+    def _won_master_bounds(self, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Return bounds on the master money columns merged into df.
 
-    def process_all(self) -> pd.DataFrame:
+        Bounds come from master_df and are kept until it is replaced; without
+        a master sheet they are taken from df.
+        """
+        if self.master_df is None:
+            return {col: won_bound(df[col]) for col in WON_MASTER_COLUMNS}
+        if self._won_bounds is None or self._won_bounds[0] is not self.master_df:
+            self._won_bounds = (
+                self.master_df,
+                {col: won_bound(self.master_df[col]) for col in WON_MASTER_COLUMNS},
+            )
+        return self._won_bounds[1]
+
+    def process_all(self, until: Optional[str] = None) -> pd.DataFrame:
         """
         Execute the complete order processing pipeline.
 
+        Args:
+            until: Stop after this stage ("load_data" or a PIPELINE_STAGES
+                method name), run every stage if None
+
         Returns:
-            pd.DataFrame: The processed order dataframe
+            pd.DataFrame: The processed order dataframe, or the output of the
+            last stage run
         """
         logger.info("Starting complete order processing pipeline...")
 
-        self.load_data()
-        self.clean_order_data()
-        self.process_option_separation()
-        self.expand_option_rows()
-        self.merge_master_data()
-        self.calculate_final_values()
+        self.instrumentation.reset()
+        with self._copy_context():
+            self._run_stage(self.load_data, None, "order_df")
+            result_df = self.order_df
+            if until != "load_data":
+                result_df = self.run_pipeline(until)
+        self.instrumentation.finish()
 
         logger.info("Order processing pipeline completed successfully")
-        return self.final_order_df
+        return result_df
+
+    def run_pipeline(self, until: Optional[str] = None) -> pd.DataFrame:
+        """
+        Run every processing stage on the currently loaded data.
+
+        The stages are run by the processor's engine. With checkpoints, the
+        stages whose inputs are unchanged since a checkpointed run are skipped
+        and the pipeline resumes from the latest reusable output. In copy-free
+        mode the input frames' size is recorded first, so the run's peak
+        memory can be reported as a multiple of it, and order_df is dropped
+        once final_order_df is built. With aggregation, the cleaned order
+        lines are collapsed to one row per key before the other stages.
+
+        Args:
+            until: Stop after this PIPELINE_STAGES method, run all if None
+
+        Returns:
+            pd.DataFrame: The processed order dataframe, or the output of the
+            last stage run
+        """
+        stage_names = [name for name, _, _ in PIPELINE_STAGES]
+        if until is not None and until not in stage_names:
+            raise ValueError(f"Unknown pipeline stage: {until}")
+
+        if until is not None:
+            stages = PIPELINE_STAGES[: stage_names.index(until) + 1]
+        else:
+            stages = PIPELINE_STAGES
+
+        result_attr = stages[-1][2]
+        if self.copy_free:
+            self._record_input()
+        with self._copy_context():
+            if self.checkpoints is not None:
+                stages = self._resume_from_checkpoint(stages)
+
+            for name, input_attr, output_attr in stages:
+                self._run_stage(getattr(self.engine, name), input_attr, output_attr)
+                if self.checkpoints is not None:
+                    self.checkpoints.save(name, getattr(self, output_attr))
+                if self.aggregate and name == "clean_order_data":
+                    self._run_stage(self.aggregate_order_lines, "order_df", "order_df")
+                if self.copy_free:
+                    if output_attr == "final_order_df":
+                        self.order_df = None
+                    release_arrow_memory()
+
+        ratio = self.metrics.peak_input_ratio
+        if self.copy_free and ratio is not None:
+            logger.info(f"Peak memory {ratio:.2f}x the input frames")
+
+        result_df = getattr(self, result_attr)
+        if self.aggregate:
+            self.line_groups.row_groups = result_df.pop(ORDER_ROW_COLUMN).to_numpy()
+            self.line_groups.stage = stages[-1][0]
+        return result_df
+
+    def _copy_context(self):
+        """Return the context the stages run in, see copy_on_write."""
+        return copy_on_write() if self.copy_free else nullcontext()
+
+    def _record_input(self) -> None:
+        """Record the size of the loaded frames the stages start from."""
+        self.instrumentation.record_input(
+            sum(
+                frame_nbytes(df)
+                for df in (self.order_df, self.option_df, self.master_df)
+                if df is not None
+            )
+        )
+
+    def expand_order_lines(self) -> pd.DataFrame:
+        """
+        Regenerate the line-level output of an aggregated run.
+
+        Every order line gets the option code of its aggregated row and a
+        copy of that row's expanded rows, with the line's own quantity. The
+        master merge and calculations the aggregated run made are then run on
+        these rows, so the result is the output the run would have given
+        without aggregation. The processor's own frames are left as they are.
+
+        Returns:
+            pd.DataFrame: The line-level output of the last stage run
+        """
+        groups = self.line_groups
+        if groups is None or groups.row_groups is None:
+            raise ValueError("No aggregated run. Call run_pipeline() first.")
+
+        stage_names = [name for name, _, _ in PIPELINE_STAGES]
+        last = stage_names.index(groups.stage)
+        result_attr = PIPELINE_STAGES[last][2]
+        result_df = getattr(self, result_attr)
+
+        with self.instrumentation.stage(
+            "expand_order_lines", rows_in=len(result_df)
+        ) as metrics:
+            order_rows, expanded_rows, expanded_lines = groups.line_positions()
+            lines = groups.lines.reset_index(drop=True)
+            if "옵션분리" in result_df.columns:
+                lines["옵션분리"] = result_df["옵션분리"].take(order_rows).array
+
+            if result_attr == "order_df":
+                metrics.rows_out = len(lines)
+                return lines
+
+            appended_df = (
+                result_df[[col for col in lines.columns if col in result_df.columns]]
+                .take(expanded_rows)
+                .reset_index(drop=True)
+            )
+            appended_df["수량[출력]"] = lines["수량[출력]"].take(expanded_lines).array
+            if KEY_HASH_COLUMN in lines.columns:
+                appended_df[KEY_HASH_COLUMN] = self.key_hasher.hash(
+                    appended_df["상품명구분"]
+                )
+            appended_df = appended_df[lines.columns]
+
+            # A processor sharing the catalog runs the later stages on the lines
+            processor = OrderProcessor(
+                use_cache=False,
+                compact=self.compact,
+                hash_keys=self.key_hasher is not None,
+                engine=self.engine.name,
+                normalizer=self.normalizer,
+                exact_money=self.exact_money,
+                copy_free=self.copy_free,
+            )
+            processor.catalog = self._get_catalog()
+            processor.option_df = self.option_df
+            processor.master_df = self.master_df
+            processor.order_df = lines
+            processor._combine_rows(appended_df)
+            expanded = stage_names.index("expand_option_rows")
+            for name, input_attr, output_attr in PIPELINE_STAGES[
+                expanded + 1 : last + 1
+            ]:
+                processor._run_stage(
+                    getattr(processor.engine, name), input_attr, output_attr
+                )
+
+            metrics.rows_out = len(processor.final_order_df)
+
+        return processor.final_order_df
+
+    def output_config(self) -> Dict:
+        """
+        Return the settings that change the pipeline's output.
+
+        Stored outputs made under other settings must not be reused.
+        """
+        return {
+            "compact": self.compact,
+            "hash_keys": self.key_hasher is not None,
+            "exact_money": self.exact_money,
+            "aggregate": self.aggregate,
+            "normalization_rules": self.normalizer.rules.digest,
+        }
+
+    def _resume_from_checkpoint(self, stages: Tuple) -> Tuple:
+        """
+        Restore the latest reusable stage output.
+
+        Args:
+            stages: The stages to run, in order
+
+        Returns:
+            Tuple: The stages that still have to run
+        """
+        self.checkpoints.plan(
+            STAGE_DEPENDENCIES,
+            {
+                "order_df": self.order_df,
+                "option_df": self.option_df,
+                "master_df": self.master_df,
+            },
+            config=self.output_config(),
+        )
+        stage_names = [name for name, _, _ in stages]
+        latest = self.checkpoints.latest(stage_names)
+        if latest is None:
+            return stages
+
+        position = stage_names.index(latest)
+        output_attr = stages[position][2]
+        logger.info(f"Inputs unchanged up to {latest}, resuming from its checkpoint")
+
+        with self.instrumentation.stage(latest) as metrics:
+            metrics.status = "restored"
+            restored_df = self.checkpoints.load(latest)
+            if KEY_HASH_COLUMN in restored_df.columns:
+                # Register the restored keys for the hash collision check
+                restored_df[KEY_HASH_COLUMN] = self.key_hasher.hash(
+                    restored_df["상품명구분"]
+                )
+            setattr(self, output_attr, restored_df)
+            metrics.rows_out = len(restored_df)
+
+        return stages[position + 1 :]
+
+    def _run_stage(
+        self,
+        stage: Callable[[], None],
+        input_attr: Optional[str],
+        output_attr: str,
+    ) -> None:
+        """
+        Run one stage under the instrumentation.
+
+        Args:
+            stage: Bound stage method to run
+            input_attr: Attribute holding the stage's input frame, if any
+            output_attr: Attribute holding the stage's output frame
+        """
+        # Only the row count is kept, so a stage can drop its input frame
+        input_df = getattr(self, input_attr) if input_attr else None
+        rows_in = 0 if input_df is None else len(input_df)
+        del input_df
+
+        with self.instrumentation.stage(stage.__name__, rows_in=rows_in) as metrics:
+            stage()
+            metrics.rows_out = len(getattr(self, output_attr))
+
+    @property
+    def metrics(self) -> PipelineMetrics:
+        """Per-stage metrics of the latest run."""
+        return self.instrumentation.metrics
+
+    def save_purchase_orders(
+        self,
+        output_dir: str = "purchase_orders",
+        fmt: str = "xlsx",
+        workers: Optional[int] = None,
+        fork: bool = False,
+    ) -> PurchaseOrderRollup:
+        """
+        Roll up the processed data into one purchase order per 매입처.
+
+        Args:
+            output_dir: Directory for the purchase orders
+            fmt: Purchase-order file format
+            workers: Worker processes writing files, defaults to the CPU count
+            fork: Fork the workers from this process instead of a forkserver
+
+        Returns:
+            PurchaseOrderRollup: The lines, supplier totals and reconciliation
+        """
+        if self.final_order_df is None:
+            raise ValueError("No processed data to save. Call process_all() first.")
+
+        with self.instrumentation.stage(
+            "rollup_purchase_orders", rows_in=len(self.final_order_df)
+        ) as metrics:
+            rollup = build_purchase_orders(
+                self.final_order_df, output_dir, fmt=fmt, workers=workers, fork=fork
+            )
+            metrics.rows_out = len(rollup.lines)
+            self.instrumentation.record("suppliers", len(rollup.suppliers))
+
+        logger.info(f"Wrote {len(rollup.suppliers)} purchase orders to {output_dir}")
+        return rollup
+
+    def unmatched_key_report(
+        self,
+        top_k: int = DEFAULT_TOP_K,
+        cache_dir: Optional[str] = DEFAULT_SUGGESTION_DIR,
+    ) -> pd.DataFrame:
+        """
+        Suggest master entries for the order keys missing from the master sheet.
+
+        Each 상품명구분 without a master row is looked up in an n-gram index
+        over the master keys, built once per catalog, and its top_k most
+        similar 상품명구분1 are listed with their 매입처 and 상품코드.
+
+        Args:
+            top_k: Suggestions per unmatched key
+            cache_dir: Directory caching suggestions across runs, off if None
+
+        Returns:
+            pd.DataFrame: The report, see key_suggestions.unmatched_key_report
+        """
+        if self.final_order_df is None:
+            raise ValueError("Data not processed. Call previous methods first.")
+
+        catalog = self._get_catalog()
+        if self._key_index is None or self._key_index[0] is not catalog:
+            master_keys = catalog.master_lookup(hashed=False)["상품명구분1"]
+            self._key_index = (catalog, KeyIndex(master_keys))
+
+        with self.instrumentation.stage(
+            "unmatched_key_report", rows_in=len(self.final_order_df)
+        ) as metrics:
+            report = unmatched_key_report(
+                self.final_order_df["상품명구분"],
+                catalog.master_lookup(hashed=False),
+                index=self._key_index[1],
+                top_k=top_k,
+                cache=SuggestionCache(cache_dir) if cache_dir is not None else None,
+            )
+            metrics.rows_out = len(report)
+            self.instrumentation.record(
+                "unmatched_keys", report["상품명구분"].nunique()
+            )
+
+        return report
 
     def save_to_csv(self, filename: str = "final_order_df.csv") -> None:
         """
@@ -381,12 +1244,68 @@ class OrderProcessor:
         if self.final_order_df is None:
             raise ValueError("No processed data to save. Call process_all() first.")
 
-        self.final_order_df.to_csv(filename, index=False)
+        output_df = self.final_order_df
+        if self.compact:
+            output_df = restore_frame(output_df)
+
+        output_df.to_csv(filename, index=False)
         logger.info(f"Data saved to {filename}")
 
+    def save_output(
+        self,
+        filename: str,
+        fmt: Optional[str] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        **options,
+    ) -> WriteResult:
+        """
+        Save the processed data in chunks with one of the streaming writers.
+
+        Args:
+            filename: Output filename
+            fmt: "parquet", "feather", "csv" or "xlsx", from the extension if None
+            chunk_rows: Rows written per chunk
+            **options: Passed through to the writer, e.g. compression
+
+        Returns:
+            WriteResult: Rows, bytes written and time taken
+        """
+        if self.final_order_df is None:
+            raise ValueError("No processed data to save. Call process_all() first.")
+
+        return write_output(
+            self.final_order_df, filename, fmt, chunk_rows=chunk_rows, **options
+        )
+
+    def save_to_parquet(
+        self, filename: str = "final_order_df.parquet", **options
+    ) -> WriteResult:
+        """Save the processed data as Parquet, keeping column dtypes."""
+        return self.save_output(filename, "parquet", **options)
+
+    def save_to_feather(
+        self, filename: str = "final_order_df.feather", **options
+    ) -> WriteResult:
+        """Save the processed data as an Arrow IPC (Feather) file."""
+        return self.save_output(filename, "feather", **options)
+
+    def save_to_compressed_csv(
+        self, filename: str = "final_order_df.csv.gz", **options
+    ) -> WriteResult:
+        """Save the processed data as CSV compressed per the extension."""
+        return self.save_output(filename, "csv", **options)
+
+    def save_to_xlsx(
+        self, filename: str = "final_order_df.xlsx", **options
+    ) -> WriteResult:
+        """Save the processed data as an xlsx workbook in constant memory."""
+        return self.save_output(filename, "xlsx", **options)
+
 
 def main():
     """Main function to demonstrate usage."""
+    logging.basicConfig(level=logging.INFO)
+
     try:
         # Initialize processor
         processor = OrderProcessor()
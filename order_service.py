@@ -0,0 +1,423 @@
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from master_cache import DEFAULT_CACHE_DIR
+from master_catalog import MasterCatalog
+from order_processor import OrderProcessor
+from workbook_loader import ORDER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Seconds a new worker pool may take to import pandas and install its catalog
+WORKER_START_TIMEOUT = 120.0
+
+# Order row each new worker processes before it takes requests
+WARM_UP_PAYLOAD = json.dumps(
+    [
+        {
+            "판매몰상품번호/딜번호[출력]": 0,
+            "원상품명(쇼핑몰)[출력]": "warm-up",
+            "원옵션(쇼핑몰)[출력]": "NO",
+            "수량[출력]": 1,
+        }
+    ]
+).encode("utf-8")
+
+# Master catalog installed in each worker process by _init_worker, and the
+# barrier its pool's workers meet at once all are running
+_worker_catalog: Optional[MasterCatalog] = None
+_worker_started = None
+
+
+def _init_worker(catalog: MasterCatalog, started=None) -> None:
+    """Install the master catalog in a worker process."""
+    global _worker_catalog, _worker_started
+    _worker_catalog = catalog
+    _worker_started = started
+
+
+def _await_workers() -> int:
+    """
+    Warm a worker up and wait until every worker of the pool is running.
+
+    One made-up order row goes through the pipeline first, so the code paths
+    pandas sets up on first use are ready before the first request.
+
+    Returns:
+        int: The worker's process id
+    """
+    process_order_payload(WARM_UP_PAYLOAD, "application/json")
+    _worker_started.wait(WORKER_START_TIMEOUT)
+    return os.getpid()
+
+
+def process_order_payload(
+    payload: bytes,
+    content_type: str,
+    output_format: str = "csv",
+    catalog: Optional[MasterCatalog] = None,
+) -> bytes:
+    """
+    Process one order payload against the hot master data.
+
+    Args:
+        payload: An order workbook, or JSON rows keyed by the order columns
+        content_type: Request content type; "application/json" selects rows
+        output_format: "csv" or "json"
+        catalog: Master catalog, defaults to the worker's copy
+
+    Returns:
+        bytes: The processed orders in the requested format
+    """
+    processor = OrderProcessor(
+        io.BytesIO(payload), use_cache=False, catalog=catalog or _worker_catalog
+    )
+
+    if content_type.startswith("application/json"):
+        rows = json.loads(payload)
+        if isinstance(rows, dict):
+            rows = rows.get("rows", [])
+        order_df = pd.DataFrame(rows)
+        missing = [col for col in ORDER_COLUMNS if col not in order_df.columns]
+        if missing:
+            raise ValueError(f"Missing order columns: {missing}")
+        processor.order_df = order_df[ORDER_COLUMNS].copy()
+    else:
+        processor.load_order_data()
+
+    result_df = processor.run_pipeline()
+
+    if output_format == "json":
+        return result_df.to_json(orient="records", force_ascii=False).encode("utf-8")
+    return result_df.to_csv(index=False).encode("utf-8")
+
+
+class OrderService:
+    """
+    Resident order-processing service with hot master data.
+
+    The option and master sheets stay loaded in memory as a MasterCatalog,
+    lookup indexes included. A background thread watches the master workbook
+    and, when it changes, builds a new catalog and swaps it in atomically
+    together with a fresh worker pool, warmed up before it takes requests;
+    requests already running finish on the previous catalog. Requests are
+    processed in worker processes, so concurrent requests do not wait on each
+    other's Excel parsing. With workers=0 requests are processed in the
+    request threads, which share the immutable catalog.
+    """
+
+    def __init__(
+        self,
+        master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        workers: Optional[int] = None,
+        poll_interval: float = 5.0,
+        use_cache: bool = True,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ):
+        """
+        Initialize the OrderService.
+
+        Args:
+            master_excel_path: Path to the master data Excel file
+            workers: Number of worker processes, defaults to the CPU count
+            poll_interval: Seconds between checks of the master workbook
+            use_cache: Reuse parsed option/master sheets cached on disk
+            cache_dir: Directory of the parsed master sheet cache
+        """
+        self.master_excel_path = master_excel_path
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.poll_interval = poll_interval
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._catalog = None
+        self._master_stat = None
+        self._master_info = {}
+        self._executor = None
+        self.requests_served = 0
+
+    def _stat_master(self) -> Tuple[int, int]:
+        """Return the master workbook's (size, mtime_ns)."""
+        stat = os.stat(self.master_excel_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _start_executor(self, catalog: MasterCatalog) -> Optional[ProcessPoolExecutor]:
+        """
+        Start a worker pool holding the given master catalog.
+
+        Returns once every worker has imported pandas and installed the
+        catalog, so the pool serves its first request warm.
+        """
+        if self.workers <= 0:
+            return None
+
+        # Forking a threaded server is unsafe, so workers are spawned and
+        # receive the catalog, indexes included, once at start-up
+        mp_context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(catalog, mp_context.Barrier(self.workers)),
+        )
+
+        # Spawned pools start a worker per submit while none is idle, and the
+        # tasks hold their workers until all have started
+        try:
+            warm_ups = [executor.submit(_await_workers) for _ in range(self.workers)]
+            for future in warm_ups:
+                future.result()
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return executor
+
+    def reload_master(self) -> None:
+        """Load the master workbook and atomically swap it in."""
+        with self._reload_lock:
+            stat = self._stat_master()
+            start = time.perf_counter()
+
+            processor = OrderProcessor(
+                master_excel_path=self.master_excel_path,
+                use_cache=self.use_cache,
+                cache_dir=self.cache_dir,
+            )
+            processor.load_master_data()
+            catalog = processor.catalog
+            executor = self._start_executor(catalog)
+
+            with self._lock:
+                old_executor = self._executor
+                self._catalog = catalog
+                self._master_stat = stat
+                self._executor = executor
+                self._master_info = {
+                    "path": os.path.abspath(self.master_excel_path),
+                    "size": stat[0],
+                    "mtime_ns": stat[1],
+                    "loaded_at": time.time(),
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "option_rows": len(catalog.option_df),
+                    "master_rows": len(catalog.master_df),
+                }
+
+            if old_executor is not None:
+                # Running requests finish on the previous master data
+                old_executor.shutdown(wait=False)
+
+            logger.info(f"Master data loaded from {self.master_excel_path}")
+
+    def _watch_master(self) -> None:
+        """Reload the master data whenever the workbook changes on disk."""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if self._stat_master() != self._master_stat:
+                    logger.info("Master workbook changed, reloading...")
+                    self.reload_master()
+            except Exception as e:
+                logger.error(f"Error reloading master data: {e}")
+
+    def start(self) -> None:
+        """Load the master data and start watching it for changes."""
+        self.reload_master()
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_master, name="master-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop watching the master data and shut the worker pool down."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def process(
+        self, payload: bytes, content_type: str, output_format: str = "csv"
+    ) -> bytes:
+        """
+        Process one order payload with the current master data.
+
+        Args:
+            payload: An order workbook, or JSON rows keyed by the order columns
+            content_type: Request content type
+            output_format: "csv" or "json"
+
+        Returns:
+            bytes: The processed orders in the requested format
+        """
+        with self._lock:
+            catalog = self._catalog
+            if catalog is None:
+                raise RuntimeError("Master data not loaded. Call start() first.")
+            self.requests_served += 1
+
+            # Submitting under the lock keeps reload_master from shutting the
+            # pool down between picking it and handing it the request
+            future = None
+            if self._executor is not None:
+                future = self._executor.submit(
+                    process_order_payload, payload, content_type, output_format
+                )
+
+        if future is None:
+            return process_order_payload(payload, content_type, output_format, catalog)
+        return future.result()
+
+    def health(self) -> Dict:
+        """Describe the loaded master data and the requests served so far."""
+        with self._lock:
+            return {
+                "status": "ok" if self._catalog is not None else "loading",
+                "master": dict(self._master_info),
+                "workers": self.workers,
+                "requests_served": self.requests_served,
+            }
+
+
+class OrderRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler for the order service.
+
+    GET /health describes the service. POST /process accepts an order workbook
+    (or JSON rows) and returns the processed orders as CSV, or as JSON with
+    ?format=json. POST /reload forces a master data reload.
+    """
+
+    server_version = "OrderService/1.0"
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        """Send a complete response."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Dict) -> None:
+        """Send a JSON response."""
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8")
+
+    def do_GET(self) -> None:
+        """Serve the health endpoint."""
+        if urlparse(self.path).path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._send_json(200, self.server.service.health())
+
+    def do_POST(self) -> None:
+        """Serve the process and reload endpoints."""
+        url = urlparse(self.path)
+        service = self.server.service
+
+        try:
+            if url.path == "/reload":
+                service.reload_master()
+                self._send_json(200, service.health())
+                return
+
+            if url.path != "/process":
+                self._send_json(404, {"error": "Not found"})
+                return
+
+            output_format = parse_qs(url.query).get("format", ["csv"])[0]
+            if output_format not in ("csv", "json"):
+                raise ValueError(f"Unsupported format: {output_format}")
+
+            length = int(self.headers.get("Content-Length", 0))
+            payload = self.rfile.read(length)
+            content_type = self.headers.get("Content-Type", "")
+
+            body = service.process(payload, content_type, output_format)
+            self._send(
+                200,
+                body,
+                (
+                    "application/json; charset=utf-8"
+                    if output_format == "json"
+                    else "text/csv; charset=utf-8"
+                ),
+            )
+
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format: str, *args) -> None:
+        """Route access logs through the module logger."""
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def serve(service: OrderService, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """
+    Run the order service until interrupted.
+
+    Args:
+        service: Order service to expose
+        host: Interface to bind
+        port: Port to bind
+    """
+    service.start()
+    server = ThreadingHTTPServer((host, port), OrderRequestHandler)
+    server.service = service
+    logger.info(f"Order service listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+def main():
+    """Run the resident order-processing service."""
+    parser = argparse.ArgumentParser(description="Serve order processing over HTTP.")
+    parser.add_argument("--master", default="쇼핑몰연동마스터.xlsx")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    service = OrderService(
+        master_excel_path=args.master,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+    )
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
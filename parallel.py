@@ -0,0 +1,332 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compact import compact_concat
+from instrumentation import StageMetrics
+from master_catalog import MasterCatalog
+from normalization import PRODUCT_COLUMNS, ProductNormalizer, distinct_rows
+from order_processor import (
+    ORDER_ROW_COLUMN,
+    PIPELINE_STAGES,
+    OrderProcessor,
+    deal_number_ranks,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shards smaller than this are not worth a worker process
+MIN_SHARD_ROWS = 10_000
+
+# Master catalog, normalization memo and order rows for worker processes. Set
+# in the parent before the pool starts so workers forked from it share them
+# copy-on-write, without pickling.
+_worker_catalog: Optional[MasterCatalog] = None
+_worker_memo: Optional[Dict[Tuple, Tuple]] = None
+_worker_order_df: Optional[pd.DataFrame] = None
+
+
+def _init_worker(
+    catalog: Optional[MasterCatalog], memo: Optional[Dict[Tuple, Tuple]]
+) -> None:
+    """Install the catalog and memo in a worker not forked from the parent."""
+    global _worker_catalog, _worker_memo
+    if catalog is not None:
+        _worker_catalog = catalog
+        _worker_memo = memo
+
+
+def shard_rows(order_df: pd.DataFrame, shards: int) -> List[np.ndarray]:
+    """
+    Hash-partition order rows by product.
+
+    Rows are assigned by a stable hash of their (deal number, product name,
+    option) triple, the columns 상품명구분 is built from, so every row of a
+    product lands in the same shard and its triple is normalized once.
+
+    Args:
+        order_df: Raw order rows
+        shards: Number of shards
+
+    Returns:
+        List[np.ndarray]: Row positions of each shard, ascending
+    """
+    codes, first_rows = distinct_rows(order_df, PRODUCT_COLUMNS)
+    products = order_df.iloc[first_rows][PRODUCT_COLUMNS]
+    product_shards = pd.util.hash_pandas_object(products, index=False).to_numpy()
+    row_shards = (product_shards % np.uint64(shards)).astype(np.int64)[codes]
+
+    positions = np.argsort(row_shards, kind="stable")
+    bounds = np.cumsum(np.bincount(row_shards, minlength=shards))[:-1]
+    return np.split(positions, bounds)
+
+
+def _process_shard(
+    positions: np.ndarray,
+    shard_df: Optional[pd.DataFrame],
+    until: Optional[str],
+    options: Dict,
+) -> Tuple[pd.DataFrame, List[StageMetrics], Dict[Tuple, Tuple]]:
+    """
+    Run the pipeline stages on one shard with the worker's catalog.
+
+    Args:
+        positions: Row positions of the shard in the order rows
+        shard_df: The shard's order rows, taken from the worker's order rows
+            by position if None
+        until: Stop after this PIPELINE_STAGES method, run all if None
+        options: OrderProcessor settings of the parent
+
+    Returns:
+        Tuple[pd.DataFrame, List[StageMetrics], Dict[Tuple, Tuple]]: The
+        output of the last stage run, with ORDER_ROW_COLUMN, the shard's stage
+        metrics and the product triples it normalized
+    """
+    # Workers start from the parent's memo and hand new entries back, so
+    # only the parent writes the memo directory
+    normalizer = ProductNormalizer(options["rules"])
+    normalizer.merge_memo(_worker_memo, new=False)
+    processor = OrderProcessor(
+        use_cache=False,
+        normalizer=normalizer,
+        compact=options["compact"],
+        hash_keys=options["hash_keys"],
+        engine=options["engine"],
+        exact_money=options["exact_money"],
+        copy_free=options["copy_free"],
+    )
+    # The parent's catalog may hold frames it was given as they are, so it is
+    # installed like assigned frames rather than injected
+    processor.catalog = _worker_catalog
+    processor.option_df = _worker_catalog.option_df
+    processor.master_df = _worker_catalog.master_df
+    if shard_df is None:
+        shard_df = _worker_order_df.take(positions)
+    order_df = shard_df.reset_index(drop=True)
+    order_df[ORDER_ROW_COLUMN] = positions
+    processor.order_df = order_df
+
+    result_df = processor.run_pipeline(until)
+    return result_df, processor.metrics.stages, normalizer.new_memo_entries()
+
+
+class ParallelOrderProcessor(OrderProcessor):
+    """
+    Process one order workbook on several cores.
+
+    The order rows are hash-partitioned by product into one shard per worker,
+    and every shard runs all pipeline stages in a process pool. Workers come
+    from a forkserver that has imported this module, since the parent may be
+    running threads (pyarrow's or polars'); each receives the catalog and the
+    normalization memo once at start-up and each task only its shard's rows.
+    With fork=True the workers are forked from the parent instead and share
+    the catalog, memo and order rows copy-on-write, so only the shards' row
+    positions and results cross process boundaries; the polars engine is
+    never forked, as its thread pool does not survive a fork. Triples the
+    workers normalize are merged into the parent's normalizer and saved to
+    its memo directory. Each stage works row by row apart from the
+    deal-number sort, so the shard outputs are put back in input order and
+    sorted once more, giving the single-core output.
+    """
+
+    def __init__(
+        self,
+        order_excel_path: str = "통합주문리스트.xlsx",
+        master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        workers: Optional[int] = None,
+        min_shard_rows: int = MIN_SHARD_ROWS,
+        fork: bool = False,
+        **kwargs,
+    ):
+        """
+        Initialize the ParallelOrderProcessor.
+
+        Args:
+            order_excel_path: Path to the order list Excel file
+            master_excel_path: Path to the master data Excel file
+            workers: Number of worker processes, defaults to the CPU count
+            min_shard_rows: Fewest order rows per worker; smaller files use
+                fewer workers, or none
+            fork: Fork the workers from this process, which is faster but only
+                safe while it runs no other threads
+            **kwargs: Passed through to OrderProcessor; checkpoints and
+                aggregation are not supported
+        """
+        if kwargs.get("checkpoint_dir") is not None:
+            raise ValueError("Checkpoints are not supported by parallel processing")
+        if kwargs.get("aggregate"):
+            raise ValueError("Aggregation is not supported by parallel processing")
+        super().__init__(order_excel_path, master_excel_path, **kwargs)
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard_rows = min_shard_rows
+        self.fork = fork
+
+    def run_pipeline(self, until: Optional[str] = None) -> pd.DataFrame:
+        """
+        Run every processing stage on the loaded data across the workers.
+
+        Args:
+            until: Stop after this PIPELINE_STAGES method, run all if None
+
+        Returns:
+            pd.DataFrame: The processed order dataframe, or the output of the
+            last stage run, as the single-core pipeline returns it
+        """
+        if self.order_df is None:
+            raise ValueError("Order data not loaded. Call load_data() first.")
+
+        shards = min(self.workers, len(self.order_df) // self.min_shard_rows)
+        if shards <= 1:
+            return super().run_pipeline(until)
+
+        stage_names = [name for name, _, _ in PIPELINE_STAGES]
+        if until is not None and until not in stage_names:
+            raise ValueError(f"Unknown pipeline stage: {until}")
+        result_attr = PIPELINE_STAGES[stage_names.index(until or stage_names[-1])][2]
+
+        with self.instrumentation.stage(
+            "parallel_pipeline", rows_in=len(self.order_df)
+        ) as metrics:
+            results = self._run_shards(shards, until)
+
+            start = time.perf_counter()
+            if result_attr == "order_df":
+                result_df = self._reassemble_order_rows(results)
+            else:
+                result_df = self._reassemble_final_rows(results)
+            self.instrumentation.record_time("reassemble", time.perf_counter() - start)
+
+            setattr(self, result_attr, result_df)
+            metrics.rows_out = len(result_df)
+
+        if self.copy_free and result_attr == "final_order_df":
+            self.order_df = None
+
+        return result_df
+
+    def _run_shards(self, shards: int, until: Optional[str]) -> List[pd.DataFrame]:
+        """
+        Run the stages on every shard in a process pool.
+
+        Returns:
+            List[pd.DataFrame]: The output of each non-empty shard
+        """
+        global _worker_catalog, _worker_memo, _worker_order_df
+
+        catalog = self._get_catalog()
+        memo = self.normalizer.memo_entries()
+        _worker_catalog, _worker_memo = catalog, memo
+        _worker_order_df = self.order_df
+
+        # Polars' thread pool does not survive a fork
+        fork = self.fork and self.engine.name != "polars"
+        if fork:
+            mp_context, initargs = multiprocessing.get_context("fork"), (None, None)
+        elif "forkserver" in multiprocessing.get_all_start_methods():
+            # The server imports pandas once; workers fork from it
+            mp_context = multiprocessing.get_context("forkserver")
+            mp_context.set_forkserver_preload([__name__])
+            initargs = (catalog, memo)
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+            initargs = (catalog, memo)
+
+        options = {
+            "rules": self.normalizer.rules,
+            "compact": self.compact,
+            "hash_keys": self.key_hasher is not None,
+            "engine": self.engine.name,
+            "exact_money": self.exact_money,
+            "copy_free": self.copy_free,
+        }
+        shard_positions = [
+            positions
+            for positions in shard_rows(self.order_df, shards)
+            if len(positions)
+        ]
+        logger.info(
+            f"Processing {len(self.order_df)} order rows in "
+            f"{len(shard_positions)} shards..."
+        )
+        self.instrumentation.record("shards", len(shard_positions))
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(shard_positions),
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=initargs,
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _process_shard,
+                        positions,
+                        None if fork else self.order_df.take(positions),
+                        until,
+                        options,
+                    )
+                    for positions in shard_positions
+                ]
+                outputs = [future.result() for future in futures]
+        finally:
+            _worker_catalog, _worker_memo, _worker_order_df = None, None, None
+
+        for _, _, new_memo in outputs:
+            self.normalizer.merge_memo(new_memo)
+        self.normalizer.save()
+
+        # Shard counts add up; shard stage times are kept per shard
+        counts = defaultdict(int)
+        for i, (_, stages, _) in enumerate(outputs):
+            for stage in stages:
+                self.instrumentation.record_time(
+                    f"shard{i}:{stage.name}", stage.wall_seconds
+                )
+                for name, value in stage.counts.items():
+                    counts[name] += value
+        for name, value in counts.items():
+            self.instrumentation.record(name, value)
+
+        return [result_df for result_df, _, _ in outputs]
+
+    def _concat(self, results: List[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenate shard outputs, keeping categoricals in compact mode."""
+        if self.compact:
+            return compact_concat(results)
+        return pd.concat(results, ignore_index=True)
+
+    def _reassemble_order_rows(self, results: List[pd.DataFrame]) -> pd.DataFrame:
+        """Put shard outputs of the order_df stages back in input order."""
+        combined = self._concat(results)
+        order = np.argsort(combined[ORDER_ROW_COLUMN].to_numpy(), kind="stable")
+        return (
+            combined.take(order)
+            .drop(columns=ORDER_ROW_COLUMN)
+            .set_axis(self.order_df.index)
+        )
+
+    def _reassemble_final_rows(self, results: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Put shard outputs of the final_order_df stages in single-core order.
+
+        The single-core pipeline sorts the order rows, followed by the expanded
+        rows in parent order, by deal number. Each row's ORDER_ROW_COLUMN
+        gives that sequence back; the expanded rows of one parent are in one
+        shard and keep their relative order through the stable sorts.
+        """
+        combined = self._concat(results)
+        order_rows = combined.pop(ORDER_ROW_COLUMN).to_numpy()
+        expanded = order_rows < 0
+        parent_rows = np.where(expanded, -1 - order_rows, order_rows)
+
+        # Deal number first, then the single-core sequence; lexsort is stable
+        ranks = deal_number_ranks(combined["판매몰상품번호/딜번호[출력]"])
+        order = np.lexsort((parent_rows, expanded, ranks))
+        return combined.take(order).reset_index(drop=True)
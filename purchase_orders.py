@@ -0,0 +1,236 @@
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import pandas as pd
+
+from compact import restore_frame
+from money import check_won_totals
+from writers import WriteResult, write_output
+
+logger = logging.getLogger(__name__)
+
+SUPPLIER_COLUMN = "매입처"
+PRODUCT_CODE_COLUMN = "상품코드"
+# Purchase-order labels of each product code, as on the 발주서
+LABEL_COLUMNS = ["상품명_발주서기준", "옵션명_발주서기준\n(옵션 공란 남겨두기)"]
+SUM_COLUMNS = ["발주수량", "기준판매가합계", "매입가합계"]
+
+# Characters not allowed in file names on common filesystems
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+@dataclass
+class PurchaseOrderRollup:
+    """Purchase-order lines and totals rolled up from final_order_df."""
+
+    lines: pd.DataFrame
+    suppliers: pd.DataFrame
+    reconciliation: pd.DataFrame
+
+    @property
+    def balanced(self) -> bool:
+        """True if the purchase orders and unmatched rows add up to the total."""
+        difference = self.reconciliation.loc["difference", ["rows"] + SUM_COLUMNS]
+        return bool((difference.fillna(0) == 0).all())
+
+
+def rollup_purchase_orders(final_order_df: pd.DataFrame) -> PurchaseOrderRollup:
+    """
+    Sum the order quantities and totals per supplier and product code.
+
+    Lines are built in one grouped pass over final_order_df and the supplier
+    totals from the much smaller lines. Rows without a 매입처 (no master
+    entry) cannot be ordered, so they are left out of the purchase orders and
+    reported in the reconciliation, which checks that the purchase orders and
+    the unmatched rows add up to the grand total of final_order_df.
+
+    Args:
+        final_order_df: Output of calculate_final_values
+
+    Returns:
+        PurchaseOrderRollup: Lines per (매입처, 상품코드), totals per 매입처
+        and the grand-total reconciliation
+    """
+    keys = [SUPPLIER_COLUMN, PRODUCT_CODE_COLUMN]
+    df = final_order_df[keys + LABEL_COLUMNS + SUM_COLUMNS]
+    # Integer (exact won) totals are summed in int64
+    check_won_totals(df, SUM_COLUMNS)
+
+    lines = (
+        df.groupby(keys, sort=True, observed=True)
+        .agg(
+            **{col: (col, "first") for col in LABEL_COLUMNS},
+            **{col: (col, "sum") for col in SUM_COLUMNS},
+            rows=(SUM_COLUMNS[0], "size"),
+        )
+        .reset_index()
+    )
+    suppliers = (
+        lines.groupby(SUPPLIER_COLUMN, sort=True, observed=True)
+        .agg(
+            products=(PRODUCT_CODE_COLUMN, "size"),
+            rows=("rows", "sum"),
+            **{col: (col, "sum") for col in SUM_COLUMNS},
+        )
+        .reset_index()
+    )
+
+    ordered = df[keys].notna().all(axis=1)
+    totals = {
+        "final_order_df": _totals(df),
+        "purchase_orders": _totals(lines, rows=lines["rows"].sum()),
+        "unmatched": _totals(df[~ordered]),
+    }
+    reconciliation = pd.DataFrame.from_dict(totals, orient="index")
+    reconciliation.loc["difference"] = reconciliation.loc["final_order_df"] - (
+        reconciliation.loc["purchase_orders"] + reconciliation.loc["unmatched"]
+    )
+    reconciliation["rows"] = reconciliation["rows"].astype("int64")
+
+    rollup = PurchaseOrderRollup(lines, suppliers, reconciliation)
+    if not rollup.balanced:
+        logger.warning(
+            "Purchase orders do not reconcile with final_order_df:\n"
+            f"{reconciliation.to_string()}"
+        )
+    return rollup
+
+
+def _totals(df: pd.DataFrame, rows: Optional[int] = None) -> Dict:
+    """Return the row count and column sums of a frame."""
+    totals = {"rows": len(df) if rows is None else int(rows)}
+    for col in SUM_COLUMNS:
+        totals[col] = df[col].sum()
+    return totals
+
+
+def supplier_filename(supplier, fmt: str, taken: Dict[str, int]) -> str:
+    """
+    Return a unique, filesystem-safe purchase-order file name for a supplier.
+
+    Args:
+        supplier: 매입처 value
+        fmt: Output format, used as the extension
+        taken: Names handed out so far, updated in place
+
+    Returns:
+        str: File name such as "발주서_공급사1.xlsx"
+    """
+    stem = _UNSAFE_FILENAME.sub("_", str(supplier)).strip("._") or "supplier"
+    count = taken.get(stem, 0)
+    taken[stem] = count + 1
+    suffix = f"_{count}" if count else ""
+    return f"발주서_{stem}{suffix}.{fmt}"
+
+
+def _write_purchase_order(lines: pd.DataFrame, path: str, fmt: str) -> WriteResult:
+    """Write one supplier's purchase order."""
+    return write_output(lines, path, fmt)
+
+
+def write_purchase_orders(
+    rollup: PurchaseOrderRollup,
+    output_dir: str,
+    fmt: str = "xlsx",
+    workers: Optional[int] = None,
+    fork: bool = False,
+) -> pd.DataFrame:
+    """
+    Write one purchase-order file per supplier, several at a time.
+
+    Each file lists the supplier's product codes with their 발주서 labels and
+    summed quantities and totals, written in chunks by the streaming writers.
+    The supplier totals and the reconciliation are written alongside as
+    CSV. Worker processes come from a forkserver where available, since the
+    caller may be running threads.
+
+    Args:
+        rollup: Result of rollup_purchase_orders
+        output_dir: Directory for the files
+        fmt: "xlsx", "csv", "parquet" or "feather"
+        workers: Worker processes, defaults to the CPU count
+        fork: Fork the workers from this process, which is faster but only
+            safe while it runs no other threads
+
+    Returns:
+        pd.DataFrame: The supplier totals with each file's path and size
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    lines = restore_frame(rollup.lines)
+    po_columns = [PRODUCT_CODE_COLUMN] + LABEL_COLUMNS + SUM_COLUMNS
+
+    taken = {}
+    jobs = [
+        (
+            supplier,
+            supplier_lines[po_columns].reset_index(drop=True),
+            os.path.join(output_dir, supplier_filename(supplier, fmt, taken)),
+        )
+        for supplier, supplier_lines in lines.groupby(SUPPLIER_COLUMN, sort=True)
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    logger.info(f"Writing {len(jobs)} purchase orders with {workers} workers...")
+    if workers == 1:
+        results = [_write_purchase_order(df, path, fmt) for _, df, path in jobs]
+    else:
+        if fork:
+            mp_context = multiprocessing.get_context("fork")
+        elif "forkserver" in multiprocessing.get_all_start_methods():
+            # The server imports pandas once; workers fork from it
+            mp_context = multiprocessing.get_context("forkserver")
+            mp_context.set_forkserver_preload([__name__])
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+            futures = [
+                pool.submit(_write_purchase_order, df, path, fmt)
+                for _, df, path in jobs
+            ]
+            results = [future.result() for future in futures]
+
+    written = pd.DataFrame(
+        {
+            SUPPLIER_COLUMN: [supplier for supplier, _, _ in jobs],
+            "path": [result.path for result in results],
+            "bytes_written": [result.bytes_written for result in results],
+        }
+    )
+    summary = restore_frame(rollup.suppliers).merge(
+        written, on=SUPPLIER_COLUMN, how="left"
+    )
+    summary.to_csv(os.path.join(output_dir, "suppliers.csv"), index=False)
+    rollup.reconciliation.to_csv(
+        os.path.join(output_dir, "reconciliation.csv"), index_label="scope"
+    )
+    return summary
+
+
+def build_purchase_orders(
+    final_order_df: pd.DataFrame,
+    output_dir: str,
+    fmt: str = "xlsx",
+    workers: Optional[int] = None,
+    fork: bool = False,
+) -> PurchaseOrderRollup:
+    """
+    Roll up final_order_df and write the per-supplier purchase orders.
+
+    Args:
+        final_order_df: Output of calculate_final_values
+        output_dir: Directory for the purchase orders
+        fmt: Purchase-order file format
+        workers: Worker processes writing files, defaults to the CPU count
+        fork: Fork the workers from this process instead of a forkserver
+
+    Returns:
+        PurchaseOrderRollup: The lines, supplier totals and reconciliation
+    """
+    rollup = rollup_purchase_orders(final_order_df)
+    write_purchase_orders(rollup, output_dir, fmt=fmt, workers=workers, fork=fork)
+    return rollup
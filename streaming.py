@@ -0,0 +1,308 @@
+import logging
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from join_keys import factorize_keys
+from order_processor import OrderProcessor, deal_number_ranks
+from workbook_loader import ORDER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+ORDER_SHEET_NAME = "통합주문리스트"
+DEAL_COLUMN = "판매몰상품번호/딜번호[출력]"
+SORT_KEY_COLUMNS = ["k_deal", "k_appended", "k_seq"]
+
+
+def _common_dtype(left: np.dtype, right: np.dtype) -> np.dtype:
+    """Return the dtype pandas would give two batches of one column combined."""
+    if left == right:
+        return left
+    if left.kind in "iuf" and right.kind in "iuf":
+        return np.result_type(left, right)
+    return np.dtype(object)
+
+
+class StreamingOrderProcessor(OrderProcessor):
+    """
+    Process an order workbook in bounded row batches.
+
+    Order rows are read in batches with openpyxl's read-only mode, and each
+    batch runs through every pipeline stage. Processed rows are spilled to a
+    temporary SQLite table together with their parent/child sort keys and a
+    code for their deal number. Once every batch is in, the distinct deal
+    numbers are ranked in one go and the rows are streamed back in sorted
+    order and appended to the output file. Peak memory is bounded by the batch
+    size plus the option and master data and the distinct deal numbers, while
+    the output ordering matches the in-memory pipeline. Aggregation is not
+    supported, as it would only merge order lines within a batch.
+    """
+
+    def __init__(
+        self,
+        order_excel_path: str = "통합주문리스트.xlsx",
+        master_excel_path: str = "쇼핑몰연동마스터.xlsx",
+        batch_size: int = 50_000,
+        **kwargs,
+    ):
+        """
+        Initialize the StreamingOrderProcessor.
+
+        Args:
+            order_excel_path: Path to the order list Excel file
+            master_excel_path: Path to the master data Excel file
+            batch_size: Number of order rows processed per batch
+            **kwargs: Passed through to OrderProcessor; aggregation is not
+                supported
+        """
+        if kwargs.get("aggregate"):
+            raise ValueError("Aggregation is not supported by streaming")
+        super().__init__(order_excel_path, master_excel_path, **kwargs)
+        self.batch_size = batch_size
+
+    def iter_order_batches(
+        self, text_columns: Iterable[str] = ()
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the order sheet's processed columns in batches.
+
+        Cells go through pandas' TextParser exactly as pd.read_excel does, so
+        NA strings and numeric text are converted the same way. Type inference
+        only sees one batch, so columns that are numeric in some batches and
+        text in others must be listed in text_columns to match a whole-sheet
+        read.
+
+        Args:
+            text_columns: Columns to keep unconverted instead of inferring
+                a numeric dtype
+
+        Yields:
+            pd.DataFrame: Up to batch_size order rows with the same columns
+            load_order_data keeps
+        """
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.order_excel_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[ORDER_SHEET_NAME].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            missing = [col for col in ORDER_COLUMNS if col not in header]
+            if missing:
+                raise ValueError(f"Columns not found in {ORDER_SHEET_NAME}: {missing}")
+            positions = [header.index(col) for col in ORDER_COLUMNS]
+            header = list(ORDER_COLUMNS)
+            dtype = {col: object for col in text_columns}
+
+            batch, blank_rows = [], []
+            for row in rows:
+                values = [
+                    (
+                        int(value)
+                        if isinstance(value, float) and value.is_integer()
+                        else value
+                    )
+                    for value in (
+                        row[position] if position < len(row) else None
+                        for position in positions
+                    )
+                ]
+
+                # Trailing blank rows are dropped, as load_order_data does
+                if all(value is None for value in values):
+                    blank_rows.append(values)
+                    continue
+                batch.extend(blank_rows)
+                blank_rows = []
+                batch.append(values)
+
+                if len(batch) >= self.batch_size:
+                    yield TextParser([header] + batch, header=0, dtype=dtype).read()
+                    batch = []
+
+            if batch:
+                yield TextParser([header] + batch, header=0, dtype=dtype).read()
+        finally:
+            workbook.close()
+
+    def process_to_csv(self, filename: str = "final_order_df.csv") -> int:
+        """
+        Run the pipeline batch by batch and write the sorted result to CSV.
+
+        Args:
+            filename: Output CSV filename
+
+        Returns:
+            int: Number of rows written
+        """
+        logger.info("Starting streaming order processing pipeline...")
+        self.instrumentation.reset()
+        self._run_stage(self.load_master_data, None, "master_df")
+
+        fd, spill_path = tempfile.mkstemp(
+            suffix=".sqlite", dir=os.path.dirname(os.path.abspath(filename))
+        )
+        os.close(fd)
+        connection = sqlite3.connect(spill_path)
+
+        try:
+            columns, dtypes, mixed_columns = self._spill_batches(connection)
+            if mixed_columns:
+                logger.info(
+                    f"Re-reading orders with {mixed_columns} kept as text to match "
+                    "a whole-sheet read"
+                )
+                connection.execute("DROP TABLE rows")
+                connection.execute("DROP TABLE deals")
+                columns, dtypes, _ = self._spill_batches(connection, mixed_columns)
+            rows_written = self._write_sorted(connection, columns, dtypes, filename)
+        finally:
+            connection.close()
+            os.remove(spill_path)
+
+        self.order_df = None
+        self.final_order_df = None
+        self.instrumentation.finish()
+        logger.info(f"Streamed {rows_written} rows to {filename}")
+        return rows_written
+
+    def _spill_batches(
+        self, connection: sqlite3.Connection, text_columns: Iterable[str] = ()
+    ) -> Tuple[List[str], Dict[str, np.dtype], List[str]]:
+        """
+        Process every order batch and insert the results into the spill table.
+
+        The rank of every distinct deal number seen goes into the deals table.
+
+        Args:
+            connection: Connection to the spill database
+            text_columns: Order columns to read without type inference
+
+        Returns:
+            Tuple[List[str], Dict[str, np.dtype], List[str]]: Output columns,
+            the dtype each column would have in the in-memory pipeline, and the
+            order columns whose inferred type differed between batches
+        """
+        columns, dtypes = None, {}
+        numeric_input = {}
+        rows_read, appended_seq = 0, 0
+        # Code of each distinct deal number, missing values sharing one
+        deal_codes: Dict[object, int] = {}
+
+        for batch_number, batch in enumerate(self.iter_order_batches(text_columns)):
+            logger.info(f"Processing batch {batch_number} ({len(batch)} rows)...")
+
+            for col in batch.columns:
+                is_numeric = pd.api.types.is_numeric_dtype(batch[col])
+                numeric_input.setdefault(col, set()).add(is_numeric)
+
+            # Remember each order row's position so ties keep the original order
+            batch["_row_seq"] = np.arange(rows_read, rows_read + len(batch))
+            rows_read += len(batch)
+
+            self.order_df = batch
+            result = self.run_pipeline()
+            row_seq = result.pop("_row_seq")
+
+            if columns is None:
+                columns = list(result.columns)
+                connection.execute(
+                    "CREATE TABLE rows ("
+                    + ", ".join(
+                        SORT_KEY_COLUMNS + [f"c{i}" for i in range(len(columns))]
+                    )
+                    + ")"
+                )
+            for col in columns:
+                dtype = result[col].dtype
+                dtype = dtype if isinstance(dtype, np.dtype) else np.dtype(object)
+                dtypes[col] = _common_dtype(dtypes.get(col, dtype), dtype)
+
+            # Expanded rows follow all order rows on ties, in generation order
+            is_appended = row_seq.isna().to_numpy()
+            seq = row_seq.to_numpy(dtype=float, na_value=np.nan)
+            seq[is_appended] = appended_seq + np.arange(is_appended.sum())
+            appended_seq += int(is_appended.sum())
+
+            codes, uniques = factorize_keys(result[DEAL_COLUMN])
+            unique_codes = np.array(
+                [
+                    deal_codes.setdefault(
+                        None if pd.isna(value) else value, len(deal_codes)
+                    )
+                    for value in uniques
+                ],
+                dtype=np.int64,
+            )
+            values = result.astype(object).where(result.notna(), None)
+            connection.executemany(
+                f"INSERT INTO rows VALUES ({', '.join(['?'] * (len(SORT_KEY_COLUMNS) + len(columns)))})",
+                (
+                    (deal, int(appended), int(position), *row)
+                    for deal, appended, position, row in zip(
+                        unique_codes[codes].tolist(),
+                        is_appended,
+                        seq,
+                        values.itertuples(index=False, name=None),
+                    )
+                ),
+            )
+            connection.commit()
+
+        # Ranked once all batches are in, as the ranks are only comparable
+        # among the values ranked together
+        deal_values = pd.Series(list(deal_codes), dtype=object)
+        connection.execute("CREATE TABLE deals (code INTEGER PRIMARY KEY, rank)")
+        connection.executemany(
+            "INSERT INTO deals VALUES (?, ?)",
+            enumerate(deal_number_ranks(deal_values).tolist()),
+        )
+        connection.commit()
+
+        mixed_columns = [col for col, kinds in numeric_input.items() if len(kinds) > 1]
+        return columns or [], dtypes, mixed_columns
+
+    def _write_sorted(
+        self,
+        connection: sqlite3.Connection,
+        columns: List[str],
+        dtypes: Dict[str, np.dtype],
+        filename: str,
+    ) -> int:
+        """Stream the spill table back in sorted order and append it to CSV."""
+        if not columns:
+            pd.DataFrame().to_csv(filename, index=False)
+            return 0
+
+        cursor = connection.execute(
+            f"SELECT {', '.join(f'c{i}' for i in range(len(columns)))} FROM rows "
+            "JOIN deals ON deals.code = rows.k_deal "
+            f"ORDER BY deals.rank, {', '.join(SORT_KEY_COLUMNS[1:])}"
+        )
+
+        rows_written = 0
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+
+            chunk = pd.DataFrame(rows, columns=columns)
+            for col, dtype in dtypes.items():
+                if dtype.kind in "iuf":
+                    chunk[col] = chunk[col].astype(dtype)
+
+            chunk.to_csv(
+                filename,
+                mode="w" if rows_written == 0 else "a",
+                header=rows_written == 0,
+                index=False,
+            )
+            rows_written += len(chunk)
+
+        return rows_written
@@ -0,0 +1,255 @@
+import argparse
+import logging
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MASTER_COLUMNS = [
+    "상품명구분1",
+    "매입처",
+    "상품코드",
+    "상품명_ERP기준\n(빈칸삭제)",
+    "옵션명_ERP기준\n(옵션공란NO채우기)",
+    "상품명_발주서기준",
+    "옵션명_발주서기준\n(옵션 공란 남겨두기)",
+    "기준판매가",
+    "매입단가",
+    "단위수량",
+]
+
+
+class SyntheticDataset(NamedTuple):
+    """Generated order, option and master frames."""
+
+    order_df: pd.DataFrame
+    option_df: pd.DataFrame
+    master_df: pd.DataFrame
+
+
+def _product_ids(deals: pd.Series, names: pd.Series, options: pd.Series) -> pd.Series:
+    """Build 상품명구분 keys the way clean_order_data does."""
+    return (
+        deals.astype(str)
+        + names.str.replace(r"\[쿠폰\]", "", regex=True).astype(str)
+        + options.fillna("NO").astype(str)
+    ).str.replace(" ", "")
+
+
+def generate_dataset(
+    n_orders: int = 10_000,
+    n_skus: int = 1_000,
+    bundle_fraction: float = 0.1,
+    max_bundle_size: int = 4,
+    unmatched_fraction: float = 0.02,
+    n_suppliers: int = 50,
+    zipf_a: float = 1.2,
+    seed: Optional[int] = 0,
+) -> SyntheticDataset:
+    """
+    Generate order, option and master frames at a configurable scale.
+
+    SKUs are products with an optional option text. A bundle_fraction of them
+    are "옵션구분N" bundles (N from 2 to max_bundle_size) whose N-1 components
+    follow the anchor row in the option sheet. Orders draw SKUs from a Zipf
+    distribution, so popular keys repeat like in real exports.
+
+    Args:
+        n_orders: Number of order rows
+        n_skus: Number of sellable SKUs in the catalog
+        bundle_fraction: Fraction of SKUs that expand into components
+        max_bundle_size: Largest N for "옵션구분N" bundles
+        unmatched_fraction: Fraction of SKUs missing from the master sheet
+        n_suppliers: Number of distinct 매입처
+        zipf_a: Zipf exponent for SKU popularity, uniform if 0
+        seed: Random seed
+
+    Returns:
+        SyntheticDataset: (order_df, option_df, master_df)
+    """
+    rng = np.random.default_rng(seed)
+
+    # Sellable SKUs
+    sku_ids = np.arange(n_skus)
+    deals = pd.Series(2_000_000 + sku_ids // 3)
+    names = pd.Series(
+        np.where(sku_ids % 17 == 0, "[쿠폰]", "")
+        + "테스트상품 "
+        + (sku_ids // 3).astype(str)
+        + " 세트",
+        dtype=object,
+    )
+    options = pd.Series(
+        np.where(sku_ids % 5 == 0, None, "색상: 옵션 " + (sku_ids % 3).astype(str)),
+        dtype=object,
+    )
+    keys = _product_ids(deals, names, options)
+    clean_names = names.str.replace(r"\[쿠폰\]", "", regex=True)
+
+    # Bundles: anchor row followed by its N-1 component rows
+    is_bundle = rng.random(n_skus) < bundle_fraction
+    bundle_sizes = np.where(
+        is_bundle, rng.integers(2, max(max_bundle_size, 2) + 1, n_skus), 1
+    )
+    rows_per_sku = np.where(is_bundle, bundle_sizes, 0)
+    owner = np.repeat(sku_ids, rows_per_sku)
+    position = np.arange(len(owner)) - np.repeat(
+        np.cumsum(rows_per_sku) - rows_per_sku, rows_per_sku
+    )
+    is_anchor = position == 0
+
+    component_deals = pd.Series(
+        np.where(
+            is_anchor,
+            deals.to_numpy()[owner].astype(object),
+            deals.to_numpy()[owner].astype(str).astype(object)
+            + "-"
+            + position.astype(str).astype(object),
+        ),
+        dtype=object,
+    )
+    component_options = pd.Series(
+        np.where(
+            is_anchor,
+            options.to_numpy()[owner],
+            np.where(position % 2 == 0, "구성품 " + position.astype(str), None),
+        ),
+        dtype=object,
+    )
+    component_names = pd.Series(clean_names.to_numpy()[owner], dtype=object)
+    component_keys = _product_ids(component_deals, component_names, component_options)
+
+    option_df = pd.DataFrame(
+        {
+            "상품명구분1": component_keys.to_numpy(),
+            "옵션분리구분2": np.where(
+                is_anchor,
+                "옵션구분" + bundle_sizes[owner].astype(str),
+                None,
+            ),
+            "판매몰상품번호/딜번호": component_deals.to_numpy(),
+            "원상품명_쇼핑몰": component_names.to_numpy(),
+            "원옵션_쇼핑몰": component_options.to_numpy(),
+        }
+    )
+
+    # Master rows for every SKU and component, minus the unmatched share
+    master_keys = pd.concat(
+        [keys, component_keys[~is_anchor]], ignore_index=True
+    ).drop_duplicates()
+    master_keys = master_keys[rng.random(len(master_keys)) >= unmatched_fraction]
+    n_master = len(master_keys)
+    master_ids = np.arange(n_master)
+    master_df = pd.DataFrame(
+        {
+            "상품명구분1": master_keys.to_numpy(),
+            "매입처": "공급사" + (master_ids % max(n_suppliers, 1)).astype(str),
+            "상품코드": "SKU" + master_ids.astype(str),
+            "상품명_ERP기준\n(빈칸삭제)": "ERP상품" + master_ids.astype(str),
+            "옵션명_ERP기준\n(옵션공란NO채우기)": "NO",
+            "상품명_발주서기준": "발주상품" + master_ids.astype(str),
+            "옵션명_발주서기준\n(옵션 공란 남겨두기)": None,
+            "기준판매가": rng.integers(10, 500, n_master) * 100,
+            "매입단가": rng.integers(5, 250, n_master) * 100,
+            "단위수량": rng.integers(1, 4, n_master),
+        }
+    )[MASTER_COLUMNS]
+
+    # Orders drawn by SKU popularity
+    if zipf_a > 1:
+        ranks = rng.zipf(zipf_a, n_orders) - 1
+        picks = rng.permutation(n_skus)[ranks % n_skus]
+    else:
+        picks = rng.integers(0, n_skus, n_orders)
+
+    order_df = pd.DataFrame(
+        {
+            "판매몰상품번호/딜번호[출력]": deals.to_numpy()[picks],
+            "원상품명(쇼핑몰)[출력]": names.to_numpy()[picks],
+            "원옵션(쇼핑몰)[출력]": options.to_numpy()[picks],
+            "수량[출력]": rng.integers(1, 6, n_orders),
+        }
+    )
+
+    return SyntheticDataset(order_df, option_df, master_df)
+
+
+def write_workbooks(
+    dataset: SyntheticDataset,
+    order_excel_path: str,
+    master_excel_path: str,
+) -> None:
+    """
+    Write a dataset as order and master workbooks shaped like the real ones.
+
+    Args:
+        dataset: Generated frames
+        order_excel_path: Output path of the order workbook
+        master_excel_path: Output path of the master workbook
+    """
+    logger.info(f"Writing {order_excel_path}...")
+    order_df = dataset.order_df
+    leading = pd.DataFrame(
+        {
+            "주문일자[출력]": "2025-05-20",
+            "쇼핑몰명[출력]": "테스트몰",
+            "브랜드명[출력]": "테스트",
+            "쇼핑몰주문번호[출력]": np.arange(len(order_df)),
+            "쇼핑몰상품주문번호[출력]": np.arange(len(order_df)),
+        },
+        index=order_df.index,
+    )
+    pd.concat([leading, order_df], axis=1).to_excel(
+        order_excel_path, sheet_name="통합주문리스트", index=False
+    )
+
+    # Both master sheets have a title row above the header
+    logger.info(f"Writing {master_excel_path}...")
+    with pd.ExcelWriter(master_excel_path) as writer:
+        dataset.option_df.to_excel(
+            writer, sheet_name="옵션분리", startrow=1, index=False
+        )
+        dataset.master_df.to_excel(writer, sheet_name="마스터", startrow=1, index=False)
+
+
+def main():
+    """Generate synthetic order and master workbooks."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic order and master workbooks."
+    )
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--skus", type=int, default=1_000)
+    parser.add_argument("--bundle-fraction", type=float, default=0.1)
+    parser.add_argument("--max-bundle-size", type=int, default=4)
+    parser.add_argument("--unmatched-fraction", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="synthetic")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    dataset = generate_dataset(
+        n_orders=args.orders,
+        n_skus=args.skus,
+        bundle_fraction=args.bundle_fraction,
+        max_bundle_size=args.max_bundle_size,
+        unmatched_fraction=args.unmatched_fraction,
+        seed=args.seed,
+    )
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_workbooks(
+        dataset,
+        os.path.join(args.output_dir, "통합주문리스트.xlsx"),
+        os.path.join(args.output_dir, "쇼핑몰연동마스터.xlsx"),
+    )
+    print(
+        f"Generated {len(dataset.order_df)} orders, {len(dataset.option_df)} option "
+        f"rows and {len(dataset.master_df)} master rows in {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from compact import compact_frame
+from order_processor import OrderProcessor
+from synthetic_data import SyntheticDataset, generate_dataset, write_workbooks
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    """Keep the per-stage info logs out of test output."""
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(scope="session")
+def dataset() -> SyntheticDataset:
+    """A small generated order, option and master set with bundles."""
+    return generate_dataset(n_orders=3_000, n_skus=300, seed=7)
+
+
+@pytest.fixture(scope="session")
+def workbooks(dataset, tmp_path_factory):
+    """The dataset written as (order workbook, master workbook) paths."""
+    directory = tmp_path_factory.mktemp("workbooks")
+    order_path = str(directory / "통합주문리스트.xlsx")
+    master_path = str(directory / "쇼핑몰연동마스터.xlsx")
+    write_workbooks(dataset, order_path, master_path)
+    return order_path, master_path
+
+
+def make_processor(
+    dataset: SyntheticDataset, processor_class=OrderProcessor, **kwargs
+) -> OrderProcessor:
+    """Return a processor holding a copy of the dataset's frames."""
+    compact = kwargs.get("compact", False)
+    processor = processor_class(use_cache=False, **kwargs)
+    order_df = dataset.order_df.copy()
+    master_df = dataset.master_df
+    if compact:
+        order_df = compact_frame(order_df)
+        master_df = compact_frame(master_df, max_unique_ratio=1.0)
+    processor.order_df = order_df
+    processor.option_df = dataset.option_df
+    processor.master_df = master_df
+    return processor
+
+
+def run_pipeline(dataset: SyntheticDataset, **kwargs) -> pd.DataFrame:
+    """Run every stage on the dataset and return the output."""
+    return make_processor(dataset, **kwargs).run_pipeline()
@@ -0,0 +1,94 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import aggregate_order_lines
+from conftest import make_processor
+
+
+def order_lines(quantities) -> pd.DataFrame:
+    keys = ["a", "b", "a", "c", "b", "c"]
+    return pd.DataFrame(
+        {
+            "판매몰상품번호/딜번호[출력]": [1, 2, 1, 3, 2, 3],
+            "원상품명(쇼핑몰)[출력]": ["A", "B", "A", "C", "B", "C"],
+            "원옵션(쇼핑몰)[출력]": ["NO"] * 6,
+            "수량[출력]": quantities,
+            "상품명구분": keys,
+        },
+        index=[10, 11, 12, 13, 14, 15],
+    )
+
+
+def test_quantities_are_summed_per_key():
+    lines = order_lines([1, 2, 3, 4, 5, 6])
+    aggregated, groups = aggregate_order_lines(lines)
+
+    assert aggregated["상품명구분"].tolist() == ["a", "b", "c"]
+    assert aggregated["수량[출력]"].tolist() == [4, 7, 10]
+    assert aggregated.index.equals(pd.RangeIndex(3))
+    np.testing.assert_array_equal(groups.groups, [0, 1, 0, 2, 1, 2])
+    assert groups.group_count == 3
+    assert groups.lines is lines
+
+
+def test_missing_quantities():
+    # b has one missing quantity, c only missing ones
+    lines = order_lines([1.0, np.nan, 3.0, np.nan, 5.0, np.nan])
+    aggregated, _ = aggregate_order_lines(lines)
+
+    assert aggregated["수량[출력]"].iloc[:2].tolist() == [4.0, 5.0]
+    assert pd.isna(aggregated["수량[출력]"].iloc[2])
+
+
+def test_narrow_quantities_do_not_overflow():
+    lines = order_lines(np.array([100, 1, 100, 1, 1, 1], dtype=np.int8))
+    aggregated, _ = aggregate_order_lines(lines)
+    assert aggregated["수량[출력]"].tolist() == [200, 2, 2]
+
+
+def test_non_numeric_quantities_are_left_alone(caplog):
+    lines = order_lines(["1", "2", "3", "x", "5", "6"])
+    with caplog.at_level(logging.WARNING, logger="aggregation"):
+        aggregated, groups = aggregate_order_lines(lines)
+
+    pd.testing.assert_frame_equal(aggregated, lines.reset_index(drop=True))
+    np.testing.assert_array_equal(groups.groups, np.arange(6))
+    assert "not numeric" in caplog.text
+
+
+def test_aggregated_rows_carry_line_totals(dataset):
+    processor = make_processor(dataset, aggregate=True)
+    processor.run_pipeline(until="process_option_separation")
+
+    lines = processor.line_groups.lines
+    totals = lines.groupby("상품명구분", sort=False)["수량[출력]"].sum()
+    assert processor.order_df["상품명구분"].tolist() == totals.index.tolist()
+    assert processor.order_df["수량[출력]"].tolist() == totals.tolist()
+    assert len(processor.order_df) < len(lines)
+
+
+@pytest.mark.parametrize(
+    "settings", [{}, {"compact": True}, {"hash_keys": False}, {"copy_free": True}]
+)
+@pytest.mark.parametrize(
+    "until", ["process_option_separation", "expand_option_rows", None]
+)
+def test_expanded_lines_match_unaggregated_run(dataset, settings, until):
+    expected_df = make_processor(dataset, **settings).run_pipeline(until=until)
+
+    processor = make_processor(dataset, aggregate=True, **settings)
+    aggregated_df = processor.run_pipeline(until=until)
+    line_df = processor.expand_order_lines()
+
+    assert len(aggregated_df) < len(line_df)
+    pd.testing.assert_frame_equal(line_df, expected_df, check_categorical=False)
+
+
+def test_expand_order_lines_needs_aggregated_run(dataset):
+    processor = make_processor(dataset)
+    processor.run_pipeline()
+    with pytest.raises(ValueError, match="No aggregated run"):
+        processor.expand_order_lines()
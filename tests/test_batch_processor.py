@@ -0,0 +1,50 @@
+import multiprocessing
+import shutil
+
+import pytest
+
+import batch_processor
+from batch_processor import BatchOrderProcessor
+from order_processor import OrderProcessor
+
+
+@pytest.mark.skipif(
+    "forkserver" not in multiprocessing.get_all_start_methods(),
+    reason="needs the forkserver start method",
+)
+def test_batch_matches_single_file_runs(workbooks, tmp_path, monkeypatch):
+    start_methods, real_get_context = [], multiprocessing.get_context
+
+    def get_context(method=None):
+        start_methods.append(method)
+        return real_get_context(method)
+
+    monkeypatch.setattr(batch_processor.multiprocessing, "get_context", get_context)
+    order_path, master_path = workbooks
+    copies = []
+    for name in ("a.xlsx", "b.xlsx"):
+        copies.append(str(tmp_path / name))
+        shutil.copy(order_path, copies[-1])
+
+    batch = BatchOrderProcessor(
+        master_path,
+        output_dir=str(tmp_path / "out"),
+        workers=2,
+        use_cache=True,
+        cache_dir=str(tmp_path / "cache"),
+    )
+    # A cached catalog is read with pyarrow, whose threads must not be forked
+    batch.load_master_data()
+    summary_df = batch.process_files(copies)
+
+    expected = OrderProcessor(order_path, master_path, use_cache=False)
+    expected.load_data()
+    expected_df = expected.run_pipeline()
+    expected_csv = expected_df.to_csv(index=False)
+    # Workers are not forked from the parent, which may run pyarrow threads
+    assert start_methods == ["forkserver"]
+    assert (summary_df["status"] == "ok").all()
+    for output_path in summary_df["output"]:
+        with open(output_path, encoding="utf-8") as f:
+            assert f.read() == expected_csv
+    assert summary_df["output_rows"].tolist() == [len(expected_df)] * 2
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from conftest import make_processor, run_pipeline
+from normalization import DEFAULT_RULES, NormalizationRule, ProductNormalizer, RuleSet
+
+# Changes every product name, and so every key
+EXTRA_RULES = RuleSet(
+    DEFAULT_RULES + (NormalizationRule("세트", "SET", "name", "Set suffix"),)
+)
+
+
+def run_checkpointed(dataset, checkpoint_dir, **kwargs):
+    processor = make_processor(dataset, checkpoint_dir=str(checkpoint_dir), **kwargs)
+    result_df = processor.run_pipeline()
+    statuses = {stage.name: stage.status for stage in processor.metrics.stages}
+    return result_df, statuses
+
+
+def test_rerun_resumes_from_last_stage(dataset, tmp_path):
+    first_df, _ = run_checkpointed(dataset, tmp_path)
+    second_df, statuses = run_checkpointed(dataset, tmp_path)
+
+    assert statuses == {"calculate_final_values": "restored"}
+    pd.testing.assert_frame_equal(second_df, first_df)
+
+
+def test_master_change_reruns_merge(dataset, tmp_path):
+    run_checkpointed(dataset, tmp_path)
+    changed = dataset._replace(
+        master_df=dataset.master_df.assign(
+            기준판매가=dataset.master_df["기준판매가"] + 100
+        )
+    )
+    result_df, statuses = run_checkpointed(changed, tmp_path)
+
+    assert statuses["expand_option_rows"] == "restored"
+    assert "merge_master_data" in statuses
+    pd.testing.assert_frame_equal(result_df, run_pipeline(changed))
+
+
+def test_rule_change_invalidates_every_stage(dataset, tmp_path):
+    run_checkpointed(dataset, tmp_path)
+    normalizer = ProductNormalizer(EXTRA_RULES)
+    result_df, statuses = run_checkpointed(dataset, tmp_path, normalizer=normalizer)
+
+    assert "restored" not in statuses.values()
+    expected_df = run_pipeline(dataset, normalizer=ProductNormalizer(EXTRA_RULES))
+    pd.testing.assert_frame_equal(result_df, expected_df)
+    assert not result_df.equals(run_pipeline(dataset))
+
+
+def test_config_change_invalidates_checkpoints(dataset, tmp_path):
+    run_checkpointed(dataset, tmp_path)
+    _, statuses = run_checkpointed(dataset, tmp_path, exact_money=True)
+
+    assert "restored" not in statuses.values()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_processor, run_pipeline
+from instrumentation import Instrumentation, current_rss_bytes, peak_rss_bytes
+from synthetic_data import generate_dataset
+
+# Copy-free runs peak at about 4.5x their input frames at this scale, against
+# about 7x without the mode
+MAX_PEAK_INPUT_RATIO = 6.0
+
+ALLOCATION_BYTES = 200 * 2**20
+
+needs_peak_rss = pytest.mark.skipif(
+    peak_rss_bytes() is None, reason="Peak RSS is only measured on Linux"
+)
+
+
+def allocate_and_free() -> None:
+    """Raise the process's peak RSS by about ALLOCATION_BYTES."""
+    block = np.ones(ALLOCATION_BYTES // 8)
+    del block
+
+
+@pytest.mark.parametrize(
+    "settings", [{}, {"compact": True}, {"exact_money": True}, {"hash_keys": False}]
+)
+def test_copy_free_output_matches(dataset, settings):
+    processor = make_processor(dataset, copy_free=True, **settings)
+    result_df = processor.run_pipeline()
+
+    pd.testing.assert_frame_equal(result_df, run_pipeline(dataset, **settings))
+    assert processor.order_df is None
+
+
+@needs_peak_rss
+def test_copy_free_peak_stays_under_bound():
+    dataset = generate_dataset(n_orders=200_000, n_skus=20_000, seed=0)
+    processor = make_processor(dataset, copy_free=True)
+    del dataset
+    processor.run_pipeline()
+
+    ratio = processor.metrics.peak_input_ratio
+    assert ratio is not None
+    assert ratio < MAX_PEAK_INPUT_RATIO
+
+
+@needs_peak_rss
+def test_nested_stage_keeps_outer_peak():
+    instrumentation = Instrumentation(track_peak=True)
+    nested = Instrumentation(track_peak=True)
+    with instrumentation.stage("outer"):
+        start = current_rss_bytes()
+        allocate_and_free()
+        with nested.stage("inner"):
+            pass
+
+    # The inner stage reports the peak since the outer one started
+    for metrics in (
+        instrumentation.metrics.stage("outer"),
+        nested.metrics.stage("inner"),
+    ):
+        assert metrics.peak_rss_bytes - start >= ALLOCATION_BYTES * 0.9
+
+
+@needs_peak_rss
+def test_peak_untouched_without_tracking():
+    allocate_and_free()
+    peak = peak_rss_bytes()
+    with Instrumentation().stage("untracked") as metrics:
+        pass
+
+    assert metrics.peak_rss_bytes is None
+    assert peak_rss_bytes() >= peak
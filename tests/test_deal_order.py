@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from order_processor import deal_number_order, deal_number_ranks
+
+DEAL_NUMBERS = [
+    1234,
+    "1234-1",
+    np.nan,
+    "abc",
+    1234,
+    "1234-2",
+    5,
+    "1234",
+    "abc-1",
+    "99",
+    "1234-10",
+    None,
+]
+
+
+@pytest.mark.parametrize("dtype", [object, "category"])
+def test_mixed_deal_numbers_order(dtype):
+    deal_numbers = pd.Series(DEAL_NUMBERS, dtype=dtype)
+
+    # Numbers and digit strings by value, sub ids numerically after their
+    # base, other text after all numbers, missing values last
+    np.testing.assert_array_equal(
+        deal_number_ranks(deal_numbers), [2, 3, 8, 6, 2, 4, 0, 2, 7, 1, 5, 8]
+    )
+    order = deal_number_order(deal_numbers)
+    assert [DEAL_NUMBERS[position] for position in order] == [
+        5,
+        "99",
+        1234,
+        1234,
+        "1234",
+        "1234-1",
+        "1234-2",
+        "1234-10",
+        "abc",
+        "abc-1",
+        DEAL_NUMBERS[2],
+        None,
+    ]
+
+
+def test_ties_keep_row_order():
+    # 1234, "1234" and the two missing values tie; each group stays in input
+    # order
+    deal_numbers = pd.Series(["1234", None, 7, 1234, np.nan, "1234", 7], dtype=object)
+    np.testing.assert_array_equal(
+        deal_number_order(deal_numbers), [2, 6, 0, 3, 5, 1, 4]
+    )
+
+
+def test_expanded_rows_follow_their_order_row():
+    # Expansion appends "1234-1" after every order row; it moves up behind 1234
+    deal_numbers = pd.Series([1234, 55, 1234, "1234-1", "55-1", "1234-1"])
+    np.testing.assert_array_equal(deal_number_order(deal_numbers), [1, 4, 0, 2, 3, 5])
@@ -0,0 +1,130 @@
+from typing import Dict, List
+
+import pandas as pd
+import pytest
+
+from engines import ENGINES
+from order_processor import OrderProcessor
+from synthetic_data import SyntheticDataset, generate_dataset
+
+pytest.importorskip("polars")
+
+OTHER_ENGINES = [name for name in ENGINES if name != "pandas"]
+
+# Generated datasets every engine must agree on, by case name
+CONFORMANCE_CASES: Dict[str, Dict] = {
+    "small": {"n_orders": 500, "n_skus": 60, "seed": 0},
+    "bundles": {
+        "n_orders": 5_000,
+        "n_skus": 400,
+        "bundle_fraction": 0.5,
+        "max_bundle_size": 6,
+        "seed": 1,
+    },
+    "no_bundles": {"n_orders": 2_000, "n_skus": 200, "bundle_fraction": 0.0, "seed": 2},
+    "unmatched": {
+        "n_orders": 5_000,
+        "n_skus": 500,
+        "unmatched_fraction": 0.3,
+        "seed": 3,
+    },
+    "uniform": {"n_orders": 20_000, "n_skus": 2_000, "zipf_a": 0.0, "seed": 4},
+    "large": {"n_orders": 200_000, "n_skus": 20_000, "seed": 5},
+}
+
+
+def _edge_case_dataset() -> SyntheticDataset:
+    """
+    Return a dataset with the inputs the generator never produces.
+
+    It holds missing options, names and deal numbers, text deal numbers, a
+    numeric catalog key, duplicate catalog keys, a bundle without its anchor
+    row and a bundle cut short by the end of the option sheet.
+    """
+    dataset = generate_dataset(n_orders=300, n_skus=40, bundle_fraction=0.3, seed=7)
+    order_df = dataset.order_df.astype({"판매몰상품번호/딜번호[출력]": object})
+    order_df.loc[0, "원옵션(쇼핑몰)[출력]"] = None
+    order_df.loc[1, "원상품명(쇼핑몰)[출력]"] = None
+    order_df.loc[2, "판매몰상품번호/딜번호[출력]"] = None
+    order_df.loc[3, "판매몰상품번호/딜번호[출력]"] = "ABC-2"
+    order_df.loc[4, "원상품명(쇼핑몰)[출력]"] = "[쿠폰] 쿠폰 상품"
+
+    option_df = dataset.option_df.copy()
+    last_key = option_df["상품명구분1"].iloc[-1]
+    option_df = pd.concat(
+        [
+            option_df,
+            pd.DataFrame(
+                {
+                    "상품명구분1": [123, last_key + "끝", "ABC-2쿠폰상품NO"],
+                    "옵션분리구분2": [None, None, "옵션구분3"],
+                    "판매몰상품번호/딜번호": [1, 2, "ABC-2"],
+                    "원상품명_쇼핑몰": [None, "x", "쿠폰 상품"],
+                    "원옵션_쇼핑몰": [None, None, "NO"],
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    order_df.loc[5, ["판매몰상품번호/딜번호[출력]", "원상품명(쇼핑몰)[출력]"]] = [
+        "ABC-2",
+        "쿠폰 상품",
+    ]
+    order_df.loc[5, "원옵션(쇼핑몰)[출력]"] = "NO"
+
+    master_df = pd.concat(
+        [dataset.master_df, dataset.master_df.iloc[:5]], ignore_index=True
+    )
+    return SyntheticDataset(order_df, option_df, master_df)
+
+
+def run_engine(dataset: SyntheticDataset, engine: str) -> OrderProcessor:
+    """
+    Run the pipeline on a copy of a dataset with one engine.
+
+    Args:
+        dataset: Input frames
+        engine: A key of ENGINES
+
+    Returns:
+        OrderProcessor: The processor after the run
+    """
+    processor = OrderProcessor(use_cache=False, engine=engine)
+    processor.order_df = dataset.order_df.copy()
+    processor.option_df = dataset.option_df.copy()
+    processor.master_df = dataset.master_df.copy()
+    processor.run_pipeline()
+    return processor
+
+
+def _stage_counts(processor: OrderProcessor) -> List[Dict[str, int]]:
+    """Return the counts recorded by each stage of the latest run."""
+    return [stage.counts for stage in processor.metrics.stages]
+
+
+def _conformance_dataset(case: str) -> SyntheticDataset:
+    """Return the dataset of a conformance case."""
+    if case == "edge":
+        return _edge_case_dataset()
+    return generate_dataset(**CONFORMANCE_CASES[case])
+
+
+@pytest.mark.parametrize("engine", OTHER_ENGINES)
+@pytest.mark.parametrize("case", list(CONFORMANCE_CASES) + ["edge"])
+def test_engine_matches_pandas(case, engine):
+    dataset = _conformance_dataset(case)
+    reference = run_engine(dataset, "pandas")
+    processor = run_engine(dataset, engine)
+
+    # Equal value for value and dtype for dtype, and the same CSV text
+    pd.testing.assert_frame_equal(processor.final_order_df, reference.final_order_df)
+    assert processor.final_order_df.to_csv(index=False) == (
+        reference.final_order_df.to_csv(index=False)
+    )
+    assert _stage_counts(processor) == _stage_counts(reference)
+
+
+@pytest.mark.parametrize("engine", OTHER_ENGINES)
+def test_engine_rejects_compact_mode(engine):
+    with pytest.raises(ValueError, match="Compact mode"):
+        OrderProcessor(use_cache=False, engine=engine, compact=True)
@@ -0,0 +1,148 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from master_catalog import MASTER_COLUMNS
+from order_processor import OrderProcessor
+
+# Bundles 100 (옵션구분3), 300 (옵션구분2) and 400 (옵션구분4, near the end).
+# The blank 상품명구분1 row is dropped on load, so from 300 on the anchor's
+# index label is one past its position and the span starts a row late,
+# exactly as the row-by-row expansion did.
+OPTION_SHEET = pd.DataFrame(
+    {
+        "상품명구분1": [
+            "100세트A빨강",
+            "100-1세트A흰색",
+            "100-2세트ANO",
+            None,
+            "300세트CNO",
+            "300-1세트C빨강",
+            "300-2세트CNO",
+            "400세트Dx",
+            "400-1세트D소",
+            "400-2세트D대",
+        ],
+        "옵션분리구분2": [
+            "옵션구분3",
+            None,
+            None,
+            None,
+            "옵션구분2",
+            None,
+            None,
+            "옵션구분4",
+            None,
+            None,
+        ],
+        "판매몰상품번호/딜번호": [
+            100,
+            "100-1",
+            "100-2",
+            999,
+            300,
+            "300-1",
+            "300-2",
+            400,
+            "400-1",
+            "400-2",
+        ],
+        "원상품명_쇼핑몰": ["세트 A"] * 3 + ["삭제"] + ["세트 C"] * 3 + ["세트 D"] * 3,
+        "원옵션_쇼핑몰": [
+            "빨강",
+            "흰색",
+            None,
+            None,
+            None,
+            "빨강",
+            None,
+            "x",
+            "소",
+            "대",
+        ],
+    }
+)
+
+ORDERS = pd.DataFrame(
+    {
+        "판매몰상품번호/딜번호[출력]": [100, 200, 300, 400],
+        "원상품명(쇼핑몰)[출력]": ["세트 A", "단품 B", "세트 C", "세트 D"],
+        "원옵션(쇼핑몰)[출력]": ["빨강", "NO", None, "x"],
+        "수량[출력]": [2, 1, 3, 1],
+    }
+)
+
+# What the row-by-row expansion appended, in output order
+EXPECTED = pd.DataFrame(
+    {
+        "판매몰상품번호/딜번호[출력]": [
+            100,
+            "100-1",
+            "100-2",
+            200,
+            300,
+            "300-2",
+            400,
+            "400-2",
+        ],
+        "원상품명(쇼핑몰)[출력]": [
+            "세트 A",
+            "세트 A",
+            "세트 A",
+            "단품 B",
+            "세트 C",
+            "세트 C",
+            "세트 D",
+            "세트 D",
+        ],
+        "원옵션(쇼핑몰)[출력]": ["빨강", "흰색", "NO", "NO", "NO", "NO", "x", "대"],
+        "수량[출력]": [2, 2, 2, 1, 3, 3, 1, 1],
+        "상품명구분": [
+            "100세트A빨강",
+            "100-1세트A흰색",
+            "100-2세트ANO",
+            "200단품BNO",
+            "300세트CNO",
+            "300-2세트CNO",
+            "400세트Dx",
+            "400-2세트D대",
+        ],
+        "옵션분리": [
+            "옵션구분3",
+            "옵션구분3",
+            "옵션구분3",
+            "옵션구분2",
+            "옵션구분2",
+            "옵션구분2",
+            "옵션구분4",
+            "옵션구분4",
+        ],
+    }
+)
+
+
+@pytest.mark.parametrize("hash_keys", [True, False])
+def test_expanded_rows_match_row_by_row_expansion(hash_keys, caplog):
+    processor = OrderProcessor(use_cache=False, hash_keys=hash_keys)
+    processor.order_df = ORDERS.copy()
+    processor.option_df = OPTION_SHEET.dropna(subset=["상품명구분1"])
+    processor.master_df = pd.DataFrame(columns=MASTER_COLUMNS)
+    processor.clean_order_data()
+    processor.process_option_separation()
+
+    # 200 has no option rows; give it a bundle code so its anchor is missing
+    processor.order_df.loc[1, "옵션분리"] = "옵션구분2"
+
+    with caplog.at_level(logging.WARNING, logger="order_processor"):
+        with processor.instrumentation.stage("expand_option_rows") as metrics:
+            processor.expand_option_rows()
+
+    result = processor.final_order_df[EXPECTED.columns]
+    pd.testing.assert_frame_equal(result, EXPECTED, check_dtype=False)
+    assert [record.getMessage() for record in caplog.records] == [
+        "Could not find anchor row for 상품명구분: 200단품BNO",
+        "Not enough subsequent rows in option_df",
+    ]
+    assert metrics.counts["missing_anchor_rows"] == 1
+    assert metrics.counts["short_span_rows"] == 1
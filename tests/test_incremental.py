@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from incremental import IncrementalOrderProcessor
+from order_processor import OrderProcessor
+from normalization import DEFAULT_RULES, NormalizationRule, ProductNormalizer, RuleSet
+from synthetic_data import write_workbooks
+
+
+@pytest.fixture
+def grown_export(dataset, workbooks, tmp_path):
+    """An order workbook holding the first 2000 rows of the dataset's."""
+    order_path = str(tmp_path / "orders_2000.xlsx")
+    unused_master_path = str(tmp_path / "master.xlsx")
+    write_workbooks(
+        dataset._replace(order_df=dataset.order_df[:2000]),
+        order_path,
+        unused_master_path,
+    )
+    return order_path, workbooks[0], workbooks[1]
+
+
+def make_incremental(order_path, master_path, state_dir, **kwargs):
+    return IncrementalOrderProcessor(
+        order_path, master_path, state_dir=str(state_dir), use_cache=False, **kwargs
+    )
+
+
+@pytest.mark.parametrize("settings", [{}, {"compact": True}])
+def test_second_run_processes_only_new_rows(grown_export, tmp_path, settings):
+    first_path, full_path, master_path = grown_export
+    state_dir = tmp_path / "state"
+
+    first = make_incremental(first_path, master_path, state_dir, **settings)
+    first.process_incremental()
+    assert first.new_row_count == 2000
+
+    second = make_incremental(full_path, master_path, state_dir, **settings)
+    result_df = second.process_incremental()
+    assert second.new_row_count == 1000
+
+    # Same rows, order and dtypes as a full run; in compact mode the merged
+    # categoricals list the new rows' categories last
+    full = make_incremental(full_path, master_path, tmp_path / "fresh", **settings)
+    full_df = full.process_incremental()
+    assert full.new_row_count == 3000
+    assert result_df.dtypes.map(type).equals(full_df.dtypes.map(type))
+    pd.testing.assert_frame_equal(result_df, full_df, check_categorical=False)
+    expected_df = OrderProcessor(full_path, master_path, use_cache=False, **settings)
+    expected_df.load_data()
+    pd.testing.assert_frame_equal(full_df, expected_df.run_pipeline())
+
+    third = make_incremental(full_path, master_path, state_dir, **settings)
+    pd.testing.assert_frame_equal(third.process_incremental(), result_df)
+    assert third.new_row_count == 0
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"exact_money": True},
+        {"compact": True},
+        {"hash_keys": False},
+        {
+            "normalizer": ProductNormalizer(
+                RuleSet(DEFAULT_RULES + (NormalizationRule("세트", "SET"),))
+            )
+        },
+    ],
+)
+def test_settings_change_rebuilds_ledger(grown_export, tmp_path, settings):
+    first_path, full_path, master_path = grown_export
+    state_dir = tmp_path / "state"
+    make_incremental(first_path, master_path, state_dir).process_incremental()
+
+    second = make_incremental(full_path, master_path, state_dir, **settings)
+    result_df = second.process_incremental()
+
+    assert second.new_row_count == 3000
+    fresh = make_incremental(full_path, master_path, tmp_path / "fresh", **settings)
+    pd.testing.assert_frame_equal(result_df, fresh.process_incremental())
+
+
+def test_incremental_rejects_aggregation(workbooks, tmp_path):
+    with pytest.raises(ValueError, match="Aggregation"):
+        IncrementalOrderProcessor(
+            *workbooks, state_dir=str(tmp_path / "state"), aggregate=True
+        )
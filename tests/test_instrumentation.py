@@ -0,0 +1,89 @@
+import json
+import threading
+
+import pytest
+
+import instrumentation as instrumentation_module
+from instrumentation import Instrumentation, peak_rss_bytes
+
+
+def test_stage_metrics_and_counts():
+    seen = []
+    instrumentation = Instrumentation(hooks=[seen.append])
+
+    instrumentation.record("outside", 1)
+    with instrumentation.stage("load", rows_in=10) as metrics:
+        metrics.rows_out = 7
+        instrumentation.record("matched_rows", 5.0)
+        instrumentation.record_time("read", 0.25)
+        with instrumentation.stage("nested") as nested:
+            instrumentation.record("nested_rows", 2)
+        instrumentation.record("after_nested", 3)
+
+    assert [stage.name for stage in instrumentation.metrics.stages] == [
+        "nested",
+        "load",
+    ]
+    assert seen == instrumentation.metrics.stages
+    assert metrics.status == "ok"
+    assert (metrics.rows_in, metrics.rows_out) == (10, 7)
+    assert metrics.wall_seconds >= nested.wall_seconds >= 0
+    assert metrics.cpu_seconds >= 0
+    assert metrics.rss_bytes > 0
+    # Counts go to the innermost running stage only
+    assert metrics.counts == {"matched_rows": 5, "after_nested": 3}
+    assert nested.counts == {"nested_rows": 2}
+    assert metrics.timings == {"read": 0.25}
+    assert metrics.peak_rss_bytes is None
+    assert instrumentation.metrics.stage("load") is metrics
+    assert instrumentation.metrics.stage("missing") is None
+    assert instrumentation.metrics.wall_seconds == pytest.approx(
+        metrics.wall_seconds + nested.wall_seconds
+    )
+
+
+def test_failed_stage_is_recorded(tmp_path):
+    def broken_hook(metrics):
+        raise RuntimeError("hook")
+
+    json_path = str(tmp_path / "metrics.json")
+    instrumentation = Instrumentation(json_path=json_path, hooks=[broken_hook])
+    with pytest.raises(ValueError):
+        with instrumentation.stage("clean"):
+            raise ValueError("bad row")
+
+    # A failing hook does not fail the run
+    with instrumentation.stage("merge"):
+        pass
+
+    instrumentation.finish()
+    with open(json_path, encoding="utf-8") as f:
+        document = json.load(f)
+    assert [stage["status"] for stage in document["stages"]] == ["failed", "ok"]
+
+    instrumentation.reset()
+    assert instrumentation.metrics.stages == []
+
+
+@pytest.mark.skipif(peak_rss_bytes() is None, reason="Linux only")
+def test_concurrent_peak_stages():
+    barrier = threading.Barrier(4)
+    results = []
+
+    def run_stage():
+        instrumentation = Instrumentation(track_peak=True)
+        for _ in range(50):
+            with instrumentation.stage("threaded") as metrics:
+                barrier.wait()
+            results.append(metrics.peak_rss_bytes)
+
+    threads = [threading.Thread(target=run_stage) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 200
+    assert all(peak is not None for peak in results)
+    # Every stage left; the next outermost stage resets the peak again
+    assert instrumentation_module._peak_stages == 0
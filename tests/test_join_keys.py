@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import join_keys
+from conftest import make_processor, run_pipeline
+from join_keys import KeyHasher
+
+
+def colliding_hash_text(first: str, second: str):
+    """Return a hash_text that gives second the hash of first."""
+    real_hash_text = join_keys.hash_text
+
+    def hash_text(values):
+        hashes = real_hash_text(values)
+        hashes[np.asarray(values, dtype=object) == second] = real_hash_text(
+            np.array([first], dtype=object)
+        )[0]
+        return hashes
+
+    return hash_text
+
+
+def test_collision_falls_back_to_text_keys(dataset, monkeypatch):
+    order_keys = make_processor(dataset).run_pipeline("clean_order_data")["상품명구분"]
+    used_keys = pd.unique(order_keys[order_keys.isin(dataset.master_df["상품명구분1"])])
+    monkeypatch.setattr(
+        join_keys, "hash_text", colliding_hash_text(used_keys[0], used_keys[1])
+    )
+
+    processor = make_processor(dataset, hash_keys=True)
+    result_df = processor.run_pipeline()
+
+    assert processor.key_hasher.collided
+    pd.testing.assert_frame_equal(result_df, run_pipeline(dataset, hash_keys=False))
+
+
+def test_collision_between_hashers_is_carried_over(monkeypatch):
+    monkeypatch.setattr(join_keys, "hash_text", colliding_hash_text("a", "b"))
+    orders, catalog = KeyHasher(), KeyHasher()
+    orders.hash(pd.Series(["a", "c"]))
+    catalog.hash(pd.Series(["b"]))
+    assert not orders.collided and not catalog.collided
+
+    orders.merge(catalog)
+    assert orders.collided
+    assert orders.key_count == 0
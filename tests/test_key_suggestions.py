@@ -0,0 +1,153 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from key_suggestions import (
+    KeyIndex,
+    SuggestionCache,
+    catalog_key_digest,
+    key_ngrams,
+    unmatched_key_report,
+)
+
+MASTER_KEYS = ["abcd", "abce", "xbcd", "zzzz", "abcd", None]
+
+
+def dice(first, second, n=2) -> float:
+    first, second = key_ngrams(first, n), key_ngrams(second, n)
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+def test_key_ngrams():
+    assert key_ngrams("A b C") == {"ab", "bc"}
+    assert key_ngrams("ab") == {"ab"}
+    assert key_ngrams("") == set()
+    assert key_ngrams(1234, n=3) == {"123", "234"}
+
+
+def test_query_ranks_by_dice_score():
+    index = KeyIndex(MASTER_KEYS)
+
+    # Duplicates and missing keys are indexed once or not at all; ties go to
+    # the key indexed first
+    assert index.query("abcd") == [
+        ("abcd", 1.0),
+        ("abce", 0.6667),
+        ("xbcd", 0.6667),
+    ]
+    assert index.query("A BCD", top_k=2) == [("abcd", 1.0), ("abce", 0.6667)]
+    assert index.query("abcde") == [
+        ("abcd", round(dice("abcde", "abcd"), 4)),
+        ("abce", round(dice("abcde", "abce"), 4)),
+        ("xbcd", round(dice("abcde", "xbcd"), 4)),
+    ]
+    assert index.query("qqqq") == []
+
+
+def test_query_matches_exhaustive_search(dataset):
+    master_keys = dataset.master_df["상품명구분1"].dropna().map(str).unique()
+    index = KeyIndex(master_keys, candidates=len(master_keys))
+    queries = dataset.order_df.iloc[:, :3].map(str).agg("".join, axis=1)
+
+    for query in itertools.islice(pd.unique(queries), 20):
+        scores = [(-dice(query, key), i) for i, key in enumerate(master_keys)]
+        expected = [
+            (master_keys[i], round(-score, 4))
+            for score, i in sorted(scores)[:5]
+            if score < 0
+        ]
+        assert index.query(query) == expected
+
+
+def test_max_postings_reads_the_rarest_grams():
+    # "ab" is in every key, "qz" and "za" only in the first
+    keys = ["qzab"] + [f"ab{i:03d}" for i in range(50)]
+
+    index = KeyIndex(keys)
+    assert index.query("qzab", top_k=3) == [
+        ("qzab", 1.0),
+        ("ab000", round(dice("qzab", "ab000"), 4)),
+        ("ab001", round(dice("qzab", "ab001"), 4)),
+    ]
+
+    # Within the budget only the two rare posting lists are read
+    index = KeyIndex(keys, max_postings=2)
+    assert index.query("qzab", top_k=3) == [("qzab", 1.0)]
+
+    # The rarest list is read even over budget
+    index = KeyIndex(keys, max_postings=0)
+    assert index.query("qzab", top_k=3) == [("qzab", 1.0)]
+    assert index.query("ab007", top_k=1) == [("ab007", 1.0)]
+
+
+@pytest.fixture
+def cache(tmp_path) -> SuggestionCache:
+    cache = SuggestionCache(str(tmp_path / "suggestions"))
+    cache.store("digest", 2, 5, {"abcd": [["abcd", 1.0]]})
+    return cache
+
+
+def test_cache_hit(cache):
+    assert cache.load("digest", 2, 5) == {"abcd": [["abcd", 1.0]]}
+    # Fewer suggestions are a prefix of the cached ones
+    assert cache.load("digest", 2, 3) == {"abcd": [["abcd", 1.0]]}
+
+
+@pytest.mark.parametrize(
+    "digest, n, top_k",
+    [("other", 2, 5), ("digest", 3, 5), ("digest", 2, 6)],
+    ids=["master keys", "ngram", "larger top_k"],
+)
+def test_cache_invalidation(cache, digest, n, top_k):
+    assert cache.load(digest, n, top_k) == {}
+
+
+def test_catalog_key_digest_ignores_order_and_duplicates():
+    assert catalog_key_digest(["b", "a", None]) == catalog_key_digest(["a", "b", "a"])
+    assert catalog_key_digest(["a", "b"]) != catalog_key_digest(["a", "c"])
+
+
+class CountingIndex(KeyIndex):
+    """A KeyIndex counting its queries."""
+
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.queries = 0
+
+    def query(self, key, top_k=5):
+        self.queries += 1
+        return super().query(key, top_k)
+
+
+def test_report_reuses_cached_suggestions(tmp_path):
+    master_lookup = pd.DataFrame(
+        {
+            "상품명구분1": ["abcd", "abce", "xbcd"],
+            "매입처": ["s1", "s2", "s3"],
+            "상품코드": ["c1", "c2", "c3"],
+            "상품명_발주서기준": ["A", "B", "C"],
+        }
+    )
+    order_keys = pd.Series(["abcf", "abcd", "abcf", "qqqq"])
+    cache = SuggestionCache(str(tmp_path / "suggestions"))
+
+    index = CountingIndex(master_lookup["상품명구분1"])
+    report = unmatched_key_report(order_keys, master_lookup, index, 2, cache)
+    assert index.queries == 2
+    assert report["상품명구분"].tolist() == ["abcf", "abcf", "qqqq"]
+    assert report["rows"].tolist() == [2, 2, 1]
+    assert report["상품명구분1"].tolist()[:2] == ["abcd", "abce"]
+    assert report["매입처"].tolist()[:2] == ["s1", "s2"]
+    assert pd.isna(report["rank"].iloc[2])
+
+    index = CountingIndex(master_lookup["상품명구분1"])
+    cached = unmatched_key_report(order_keys, master_lookup, index, 2, cache)
+    assert index.queries == 0
+    pd.testing.assert_frame_equal(cached, report)
+
+    # A changed master sheet makes the cached suggestions stale
+    changed = master_lookup.iloc[:2]
+    index = CountingIndex(changed["상품명구분1"])
+    unmatched_key_report(order_keys, changed, index, 2, cache)
+    assert index.queries == 2
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from master_cache import MANIFEST_NAME, MasterDataCache
+
+OPTION_DF = pd.DataFrame({"상품명구분1": ["a", "b"], "옵션분리구분2": [None, "옵션"]})
+MASTER_DF = pd.DataFrame({"상품명구분1": ["a", "b"], "기준판매가": [1000, 2000]})
+
+
+class Loader:
+    """Stands in for parsing the workbook, counting the parses."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return OPTION_DF.copy(), MASTER_DF.copy()
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "쇼핑몰연동마스터.xlsx"
+    path.write_bytes(b"master v1")
+    return str(path)
+
+
+def read_manifest(cache: MasterDataCache, workbook: str) -> dict:
+    with open(
+        os.path.join(cache._entry_dir(workbook), MANIFEST_NAME), encoding="utf-8"
+    ) as f:
+        return json.load(f)
+
+
+def test_second_load_hits(workbook, tmp_path):
+    cache, loader = MasterDataCache(str(tmp_path / "cache")), Loader()
+    cache.get_or_load(workbook, loader)
+    option_df, master_df = cache.get_or_load(workbook, loader)
+
+    assert loader.calls == 1
+    pd.testing.assert_frame_equal(option_df, OPTION_DF)
+    pd.testing.assert_frame_equal(master_df, MASTER_DF)
+    manifest = read_manifest(cache, workbook)
+    assert manifest["source"]["size"] == os.path.getsize(workbook)
+    assert manifest["rows"] == {"option": 2, "master": 2}
+
+
+def test_touched_workbook_is_rehashed_not_reparsed(workbook, tmp_path):
+    cache, loader = MasterDataCache(str(tmp_path / "cache")), Loader()
+    cache.get_or_load(workbook, loader)
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    cache.get_or_load(workbook, loader)
+    assert loader.calls == 1
+    assert read_manifest(cache, workbook)["source"]["mtime_ns"] == (
+        stat.st_mtime_ns + 10**9
+    )
+
+
+def test_changed_workbook_is_reparsed(workbook, tmp_path):
+    cache, loader = MasterDataCache(str(tmp_path / "cache")), Loader()
+    cache.get_or_load(workbook, loader)
+    with open(workbook, "wb") as f:
+        f.write(b"master v2")
+
+    assert cache.load(workbook) is None
+    cache.get_or_load(workbook, loader)
+    assert loader.calls == 2
+
+
+def test_other_layout_misses(workbook, tmp_path):
+    MasterDataCache(str(tmp_path / "cache"), layout="a").get_or_load(workbook, Loader())
+    assert MasterDataCache(str(tmp_path / "cache"), layout="b").load(workbook) is None
+
+
+def test_unreadable_entry_is_reparsed(workbook, tmp_path):
+    cache, loader = MasterDataCache(str(tmp_path / "cache")), Loader()
+    cache.get_or_load(workbook, loader)
+    entry_dir = cache._entry_dir(workbook)
+    for name in os.listdir(entry_dir):
+        if name != MANIFEST_NAME:
+            os.remove(os.path.join(entry_dir, name))
+
+    cache.get_or_load(workbook, loader)
+    assert loader.calls == 2
+
+
+def test_unconvertible_frames_fall_back_to_pickle(workbook, tmp_path):
+    # Mixed int and text cells do not convert to Parquet
+    mixed_df = MASTER_DF.assign(기준판매가=pd.Series([1000, "문의"], dtype=object))
+    cache = MasterDataCache(str(tmp_path / "cache"))
+    cache.get_or_load(workbook, lambda: (OPTION_DF, mixed_df))
+
+    assert read_manifest(cache, workbook)["formats"] == {
+        "option": "parquet",
+        "master": "pickle",
+    }
+    pd.testing.assert_frame_equal(cache.load(workbook)[1], mixed_df)
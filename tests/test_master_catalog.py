@@ -0,0 +1,88 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from master_catalog import MASTER_COLUMNS, MasterCatalog
+
+# The blank 상품명구분1 row is dropped on load, leaving a gap in the index
+OPTION_SHEET = pd.DataFrame(
+    {
+        "상품명구분1": ["1세트A", "1-1세트A", None, "2세트B", "2-1세트B", "3세트C"],
+        "옵션분리구분2": ["옵션구분2", None, None, "옵션구분3", None, "옵션구분2"],
+        "판매몰상품번호/딜번호": [1, "1-1", 9, 2, "2-1", 3],
+        "원상품명_쇼핑몰": ["세트 A", "세트 A", "삭제", "세트 B", "세트 B", "세트 C"],
+        "원옵션_쇼핑몰": [None, None, None, None, None, None],
+    }
+)
+MASTER_SHEET = pd.DataFrame(
+    [["1세트A", "매입처1"] + [None] * 8], columns=MASTER_COLUMNS
+)
+
+
+@pytest.fixture
+def catalog() -> MasterCatalog:
+    return MasterCatalog(OPTION_SHEET.dropna(subset=["상품명구분1"]), MASTER_SHEET)
+
+
+def test_attributes_cannot_be_set(catalog):
+    with pytest.raises(AttributeError):
+        catalog._span_table = None
+    with pytest.raises(AttributeError):
+        catalog.extra = 1
+    with pytest.raises(AttributeError):
+        del catalog._option_df
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        lambda catalog: catalog.span_table["_span_start"].to_numpy(),
+        lambda catalog: catalog.span_table["_span_taken"].to_numpy(),
+        lambda catalog: catalog.option_codes(hashed=True).index.to_numpy(),
+    ],
+)
+def test_index_arrays_are_read_only(catalog, values):
+    array = values(catalog)
+    with pytest.raises(ValueError):
+        array[0] = 0
+
+
+def test_span_table_uses_anchor_label_as_position(catalog):
+    # 2세트B has label 3 but position 2, so its span starts at position 4
+    # (3세트C) rather than at its own follow-on row, and 3세트C, last in the
+    # sheet, has no follow-on rows left
+    expected = pd.DataFrame(
+        {
+            "상품명구분": ["1세트A", "2세트B", "3세트C"],
+            "옵션분리": ["옵션구분2", "옵션구분3", "옵션구분2"],
+            "_span_start": [1, 4, 6],
+            "_span_wanted": [1, 2, 1],
+            "_span_taken": [1, 1, 0],
+        }
+    )
+    pd.testing.assert_frame_equal(catalog.span_table, expected, check_dtype=False)
+
+    # The same positions as the row-by-row lookup of the anchor's label
+    option_df = catalog.option_df
+    for _, span in catalog.span_table.iterrows():
+        anchors = option_df[
+            (option_df["상품명구분1"] == span["상품명구분"])
+            & (option_df["옵션분리구분2"] == span["옵션분리"])
+        ]
+        start = anchors.index[0] + 1
+        assert span["_span_start"] == start
+        assert span["_span_taken"] == min(
+            span["_span_wanted"], max(0, len(option_df) - start)
+        )
+
+
+def test_pickled_catalog_keeps_its_indexes(catalog):
+    restored = pickle.loads(pickle.dumps(catalog))
+    pd.testing.assert_frame_equal(restored.span_table, catalog.span_table)
+    np.testing.assert_array_equal(
+        restored.option_codes(hashed=True).index, catalog.option_codes(True).index
+    )
+    with pytest.raises(AttributeError):
+        restored.extra = 1
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from conftest import run_pipeline
+from money import check_won_totals, won_column
+
+TOTAL_COLUMNS = ["기준판매가합계", "매입가합계"]
+# Not a float64: the float pipeline rounds it to 2**53
+LARGE_PRICE = 2**53 + 1
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_exact_totals_match_float_totals(dataset, compact):
+    exact_df = run_pipeline(dataset, exact_money=True, compact=compact)
+    float_df = run_pipeline(dataset)
+
+    for col in ["발주수량"] + TOTAL_COLUMNS:
+        assert exact_df[col].dtype == "Int64"
+        pd.testing.assert_series_equal(
+            exact_df[col],
+            float_df[col].astype("Int64"),
+            check_categorical=False,
+        )
+
+
+def test_exact_totals_beyond_float_precision(dataset):
+    master_df = dataset.master_df.assign(기준판매가=LARGE_PRICE)
+    result_df = run_pipeline(dataset._replace(master_df=master_df), exact_money=True)
+
+    matched = result_df["발주수량"].notna()
+    assert matched.any()
+    totals = result_df.loc[matched, "기준판매가합계"].tolist()
+    quantities = result_df.loc[matched, "발주수량"].tolist()
+    assert totals == [quantity * LARGE_PRICE for quantity in quantities]
+
+
+def test_exact_totals_overflow(dataset):
+    master_df = dataset.master_df.assign(기준판매가=2**62)
+    with pytest.raises(OverflowError, match="기준판매가합계"):
+        run_pipeline(dataset._replace(master_df=master_df), exact_money=True)
+
+
+def test_fraction_of_a_won():
+    with pytest.raises(ValueError, match="fraction of a won"):
+        won_column(pd.Series([1.0, 2.5]), "기준판매가")
+
+
+def test_grand_total_overflow():
+    df = pd.DataFrame({"기준판매가합계": [2**62, 2**62]})
+    with pytest.raises(OverflowError, match="기준판매가합계"):
+        check_won_totals(df, ["기준판매가합계"])
@@ -0,0 +1,33 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from order_processor import OrderProcessor
+from workbook_loader import CalamineBackend, resolve_backend
+from writers import write_output
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_arrow_output_without_pyarrow(fmt, monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    path = tmp_path / f"out.{fmt}"
+
+    with pytest.raises(ImportError, match=r"format-order\[parquet\]"):
+        write_output(pd.DataFrame({"a": [1]}), str(path))
+    assert not path.exists()
+
+
+def test_calamine_backend_without_python_calamine(monkeypatch):
+    monkeypatch.setattr(CalamineBackend, "available", classmethod(lambda cls: False))
+
+    with pytest.raises(ImportError, match=r"format-order\[calamine\]"):
+        resolve_backend("calamine")
+    assert resolve_backend("auto") == "openpyxl"
+
+
+def test_polars_engine_without_polars(monkeypatch):
+    monkeypatch.setitem(sys.modules, "polars", None)
+
+    with pytest.raises(ImportError, match=r"format-order\[polars\]"):
+        OrderProcessor(use_cache=False, engine="polars")
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import order_service
+from order_service import OrderService
+
+
+class SlowSubmitExecutor(ThreadPoolExecutor):
+    """A worker pool that takes a while to accept each request."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        time.sleep(0.05)
+        return super().submit(fn, *args, **kwargs)
+
+
+def test_requests_survive_master_reloads(workbooks, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        order_service, "process_order_payload", lambda payload, *args: payload
+    )
+    monkeypatch.setattr(
+        OrderService, "_start_executor", lambda self, catalog: SlowSubmitExecutor(1)
+    )
+    service = OrderService(
+        master_excel_path=workbooks[1], workers=1, cache_dir=str(tmp_path)
+    )
+    service.reload_master()
+
+    errors = []
+
+    def send_requests():
+        for i in range(10):
+            try:
+                assert service.process(b"%d" % i, "application/json") == b"%d" % i
+            except Exception as e:
+                errors.append(e)
+
+    clients = [threading.Thread(target=send_requests) for _ in range(4)]
+    for client in clients:
+        client.start()
+    for _ in range(3):
+        service.reload_master()
+    for client in clients:
+        client.join()
+    service.stop()
+
+    assert errors == []
+    assert service.requests_served == 40
+
+
+def test_reloaded_pool_is_warm(workbooks, tmp_path):
+    service = OrderService(
+        master_excel_path=workbooks[1], workers=2, cache_dir=str(tmp_path)
+    )
+    service.reload_master()
+    first_pool = service._executor
+    service.reload_master()
+    try:
+        # Every worker of the new pool was started and initialized by reload
+        executor = service._executor
+        assert executor is not first_pool
+        pids = set(executor._processes)
+        assert len(pids) == 2
+        assert executor.submit(os.getpid).result() in pids
+
+        order_df = pd.read_excel(workbooks[0]).head(20)
+        payload = order_df.to_json(orient="records", force_ascii=False)
+        output = service.process(payload.encode("utf-8"), "application/json")
+        assert len(output.decode("utf-8").splitlines()) > 20
+        assert set(executor._processes) == pids
+    finally:
+        service.stop()
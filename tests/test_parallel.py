@@ -0,0 +1,112 @@
+import importlib.util
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import engines
+from conftest import make_processor, run_pipeline
+from normalization import PRODUCT_COLUMNS, ProductNormalizer
+from parallel import ParallelOrderProcessor
+
+# Packages of the engines that need an optional extra
+ENGINE_PACKAGES = {"polars": "polars"}
+ENGINES = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name in ENGINE_PACKAGES
+            and importlib.util.find_spec(ENGINE_PACKAGES[name]) is None,
+            reason=f"the {name} engine is not installed",
+        ),
+    )
+    for name in engines.ENGINES
+]
+
+
+def run_parallel(dataset, **kwargs) -> ParallelOrderProcessor:
+    """Run every stage on the dataset in two shards."""
+    processor = make_processor(
+        dataset,
+        processor_class=ParallelOrderProcessor,
+        workers=2,
+        min_shard_rows=1_000,
+        **kwargs,
+    )
+    processor.run_pipeline()
+    return processor
+
+
+@pytest.mark.parametrize(
+    "fork",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=[
+                pytest.mark.skipif(
+                    "fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs the fork start method",
+                ),
+                # The test process runs pyarrow's threads; fork is opt-in
+                pytest.mark.filterwarnings("ignore::DeprecationWarning"),
+            ],
+        ),
+    ],
+)
+@pytest.mark.parametrize("engine", ENGINES)
+def test_parallel_matches_serial(dataset, engine, fork):
+    processor = run_parallel(dataset, engine=engine, fork=fork)
+
+    assert processor.metrics.stages[-1].counts["shards"] == 2
+    pd.testing.assert_frame_equal(
+        processor.final_order_df, run_pipeline(dataset, engine=engine)
+    )
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_parallel_order_stages_match_serial(dataset, engine):
+    processor = make_processor(
+        dataset,
+        processor_class=ParallelOrderProcessor,
+        workers=2,
+        min_shard_rows=1_000,
+        engine=engine,
+    )
+    serial = make_processor(dataset, engine=engine)
+
+    pd.testing.assert_frame_equal(
+        processor.run_pipeline("process_option_separation"),
+        serial.run_pipeline("process_option_separation"),
+    )
+
+
+def test_parallel_saves_worker_memo(dataset, tmp_path):
+    memo_dir = str(tmp_path / "memo")
+    run_parallel(dataset, normalizer=ProductNormalizer(memo_dir=memo_dir))
+
+    # The triples normalized in the workers reach the parent's memo directory
+    memo = ProductNormalizer(memo_dir=memo_dir).memo_entries()
+    assert len(memo) == len(dataset.order_df[PRODUCT_COLUMNS].drop_duplicates())
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_parallel_workers_start_from_parent_memo(dataset, engine):
+    serial = ProductNormalizer()
+    make_processor(dataset, normalizer=serial).run_pipeline("clean_order_data")
+    triple, (_, key) = next(iter(serial.memo_entries().items()))
+
+    # Workers use the parent's memoized result rather than normalizing again
+    normalizer = ProductNormalizer()
+    normalizer.merge_memo({triple: ("memoized", key)}, new=False)
+    processor = make_processor(
+        dataset,
+        processor_class=ParallelOrderProcessor,
+        workers=2,
+        min_shard_rows=1_000,
+        engine=engine,
+        normalizer=normalizer,
+    )
+    order_df = processor.run_pipeline("clean_order_data")
+
+    assert (order_df["원상품명(쇼핑몰)[출력]"] == "memoized").any()
@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+import purchase_orders
+from compact import restore_frame
+from conftest import make_processor
+from purchase_orders import (
+    LABEL_COLUMNS,
+    PRODUCT_CODE_COLUMN,
+    SUM_COLUMNS,
+    SUPPLIER_COLUMN,
+    rollup_purchase_orders,
+)
+
+
+def blanks_as_none(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df as objects with blank cells None; read_excel gives NaN."""
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.mark.parametrize("settings", [{}, {"exact_money": True}, {"compact": True}])
+def test_reconciliation_balances(dataset, settings):
+    final_order_df = make_processor(dataset, **settings).run_pipeline()
+    rollup = rollup_purchase_orders(final_order_df)
+
+    assert rollup.balanced
+    reconciliation = rollup.reconciliation
+    assert reconciliation.loc["final_order_df", "rows"] == len(final_order_df)
+    # The dataset has keys without a master entry
+    assert reconciliation.loc["unmatched", "rows"] > 0
+    for col in SUM_COLUMNS:
+        assert reconciliation.loc["final_order_df", col] == final_order_df[col].sum()
+        assert reconciliation.loc["difference", col] == 0
+    if settings.get("exact_money"):
+        # Exact won totals stay integers
+        assert all(
+            pd.api.types.is_integer_dtype(rollup.lines[col]) for col in SUM_COLUMNS
+        )
+
+
+@pytest.mark.skipif(
+    "forkserver" not in multiprocessing.get_all_start_methods(),
+    reason="needs the forkserver start method",
+)
+def test_each_supplier_gets_its_own_lines(dataset, tmp_path, monkeypatch):
+    start_methods, real_get_context = [], multiprocessing.get_context
+
+    def get_context(method=None):
+        start_methods.append(method)
+        return real_get_context(method)
+
+    monkeypatch.setattr(purchase_orders.multiprocessing, "get_context", get_context)
+    processor = make_processor(dataset)
+    processor.run_pipeline()
+    output_dir = str(tmp_path / "purchase_orders")
+    rollup = processor.save_purchase_orders(output_dir, workers=2)
+
+    assert start_methods == ["forkserver"]
+    summary = pd.read_csv(os.path.join(output_dir, "suppliers.csv"))
+    assert sorted(summary["path"]) == sorted(
+        os.path.join(output_dir, name)
+        for name in os.listdir(output_dir)
+        if name.endswith(".xlsx")
+    )
+
+    lines = restore_frame(rollup.lines)
+    po_columns = [PRODUCT_CODE_COLUMN] + LABEL_COLUMNS + SUM_COLUMNS
+    for supplier, path in zip(summary[SUPPLIER_COLUMN], summary["path"]):
+        expected = lines[lines[SUPPLIER_COLUMN] == supplier][po_columns]
+        written = pd.read_excel(path)
+        pd.testing.assert_frame_equal(
+            blanks_as_none(written),
+            blanks_as_none(expected.reset_index(drop=True)),
+            check_dtype=False,
+        )
+    assert summary["rows"].sum() == rollup.reconciliation.loc["purchase_orders", "rows"]
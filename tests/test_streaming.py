@@ -0,0 +1,47 @@
+import pytest
+
+from order_processor import OrderProcessor
+from streaming import StreamingOrderProcessor
+from synthetic_data import write_workbooks
+
+
+@pytest.fixture(scope="module")
+def mixed_deal_workbooks(dataset, tmp_path_factory):
+    """The dataset with suffixed, text, digit-string and missing deal numbers."""
+    order_df = dataset.order_df.astype({"판매몰상품번호/딜번호[출력]": object})
+    deals = order_df["판매몰상품번호/딜번호[출력]"]
+    deals[::7] = [f"{deal}-{i % 3}" for i, deal in enumerate(deals[::7])]
+    deals[::11] = "ABC-1"
+    deals[::13] = None
+    deals[::17] = deals[::17].astype(str)
+    order_df["판매몰상품번호/딜번호[출력]"] = deals
+
+    directory = tmp_path_factory.mktemp("mixed_deals")
+    order_path = str(directory / "통합주문리스트.xlsx")
+    master_path = str(directory / "쇼핑몰연동마스터.xlsx")
+    write_workbooks(dataset._replace(order_df=order_df), order_path, master_path)
+    return order_path, master_path
+
+
+@pytest.mark.parametrize("batch_size", [700, 10_000])
+@pytest.mark.parametrize("deals", ["numbers", "mixed"])
+def test_streaming_matches_in_memory(
+    workbooks, mixed_deal_workbooks, tmp_path, batch_size, deals
+):
+    order_path, master_path = workbooks if deals == "numbers" else mixed_deal_workbooks
+    output_path = tmp_path / "streamed.csv"
+    processor = StreamingOrderProcessor(
+        order_path, master_path, batch_size=batch_size, use_cache=False
+    )
+    rows_written = processor.process_to_csv(str(output_path))
+
+    expected = OrderProcessor(order_path, master_path, use_cache=False)
+    expected.load_data()
+    expected_df = expected.run_pipeline()
+    assert rows_written == len(expected_df)
+    assert output_path.read_text(encoding="utf-8") == expected_df.to_csv(index=False)
+
+
+def test_streaming_rejects_aggregation(workbooks):
+    with pytest.raises(ValueError, match="Aggregation"):
+        StreamingOrderProcessor(*workbooks, aggregate=True)
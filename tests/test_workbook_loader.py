@@ -0,0 +1,68 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import workbook_loader
+from workbook_loader import ORDER_SHEETS, WorkbookPool
+
+
+@pytest.fixture
+def two_cpus(monkeypatch):
+    """Keep the process executors from falling back to serial reads."""
+    monkeypatch.setattr(workbook_loader.os, "cpu_count", lambda: 2)
+
+
+@pytest.mark.skipif(
+    "forkserver" not in multiprocessing.get_all_start_methods(),
+    reason="needs the forkserver start method",
+)
+def test_process_workers_are_not_forked_from_the_caller(two_cpus, workbooks):
+    with WorkbookPool("process") as pool:
+        order_data = pool.submit(workbooks[0], ORDER_SHEETS).result()
+        assert pool._pool._mp_context.get_start_method() == "forkserver"
+
+    with WorkbookPool("serial") as pool:
+        expected = pool.submit(workbooks[0], ORDER_SHEETS).result()
+    pd.testing.assert_frame_equal(
+        order_data.frames["통합주문리스트"], expected.frames["통합주문리스트"]
+    )
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="needs the fork start method",
+)
+def test_fork_is_opt_in(two_cpus):
+    with WorkbookPool("fork") as pool:
+        assert pool._start()._mp_context.get_start_method() == "fork"
+
+
+def test_single_cpu_reads_serially(monkeypatch):
+    monkeypatch.setattr(workbook_loader.os, "cpu_count", lambda: 1)
+    assert WorkbookPool("process").executor == "serial"
+
+
+@pytest.mark.parametrize("backend", ["calamine", "openpyxl"])
+def test_read_sheet_drops_rows_empty_in_parsed_columns(backend, tmp_path):
+    if not workbook_loader.EXCEL_BACKENDS[backend].available():
+        pytest.skip(f"{backend} is not installed")
+    path = str(tmp_path / "sheet.xlsx")
+    # "note" has values below the last row of the parsed columns
+    pd.DataFrame(
+        {
+            "a": [1, None, 3, None, None],
+            "note": ["x", "y", None, "z", "w"],
+            "b": ["p", "q", None, None, None],
+        }
+    ).to_excel(path, sheet_name="data", index=False)
+
+    with workbook_loader.EXCEL_BACKENDS[backend](path) as workbook:
+        frame = workbook_loader.read_sheet(workbook, "data", usecols=["a", "b"])
+    expected = pd.read_excel(
+        path, sheet_name="data", usecols=["a", "b"], engine=backend
+    )
+
+    assert len(frame) == 3
+    pd.testing.assert_frame_equal(frame, expected.iloc[:3])
+    assert expected.iloc[3:].isna().all(axis=None)
@@ -0,0 +1,463 @@
+import hashlib
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Type
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from master_catalog import MASTER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Order and option sheet columns the pipeline reads, by header name
+ORDER_COLUMNS = [
+    "판매몰상품번호/딜번호[출력]",
+    "원상품명(쇼핑몰)[출력]",
+    "원옵션(쇼핑몰)[출력]",
+    "수량[출력]",
+]
+OPTION_COLUMNS = [
+    "상품명구분1",
+    "옵션분리구분2",
+    "판매몰상품번호/딜번호",
+    "원상품명_쇼핑몰",
+    "원옵션_쇼핑몰",
+]
+
+# Sheets parsed from each workbook, with their read options: the header row
+# and the columns to parse by header name (every column if omitted)
+ORDER_SHEETS = {"통합주문리스트": {"usecols": ORDER_COLUMNS}}
+MASTER_SHEETS = {
+    "옵션분리": {"header": 1, "usecols": OPTION_COLUMNS},
+    "마스터": {"header": 1, "usecols": MASTER_COLUMNS},
+}
+
+# How WorkbookPool runs its reads
+LOAD_EXECUTORS = ("process", "fork", "thread", "serial")
+
+
+def sheet_layout(sheets: Dict[str, Dict]) -> str:
+    """Return a hash of sheet read options, identifying the frames they parse."""
+    document = json.dumps(sheets, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class ExcelBackend:
+    """
+    One xlsx parser behind the interface read_sheet projects columns with.
+
+    Rows come back as lists of cell values converted the way pd.read_excel's
+    engine of the same parser converts them, with "" for empty cells.
+    """
+
+    name = ""
+    module = ""
+    # What to pip install for the parser
+    requirement = ""
+
+    def __init__(self, path):
+        """
+        Open a workbook.
+
+        Args:
+            path: Workbook path or binary file-like object
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def available(cls) -> bool:
+        """Return whether the parser is installed, without importing it."""
+        return importlib.util.find_spec(cls.module) is not None
+
+    def rows(
+        self, sheet: str, start_row: int = 0, start_col: int = 0, stop_col=None
+    ) -> Iterator[list]:
+        """
+        Yield the rows of a sheet.
+
+        Args:
+            sheet: Sheet name
+            start_row: First row yielded, 0-based
+            start_col: First column of each row, 0-based
+            stop_col: Column after the last one, or None for whole rows
+
+        Yields:
+            list: The converted cell values of one row; with stop_col every
+            row has stop_col - start_col values
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the workbook."""
+
+    def __enter__(self) -> "ExcelBackend":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class OpenpyxlBackend(ExcelBackend):
+    """
+    openpyxl in read-only mode.
+
+    Cells outside the requested columns are skipped before conversion, but
+    openpyxl still scans each row's XML in Python.
+    """
+
+    name = "openpyxl"
+    module = "openpyxl"
+    requirement = "openpyxl"
+
+    def __init__(self, path):
+        from openpyxl import load_workbook
+
+        self.workbook = load_workbook(
+            path, read_only=True, data_only=True, keep_links=False
+        )
+
+    @staticmethod
+    def _convert(cell):
+        """Convert a cell as pandas' openpyxl reader does."""
+        value = cell.value
+        if value is None:
+            return ""
+        if cell.data_type == "e":
+            return math.nan
+        if cell.data_type == "n":
+            whole = int(value)
+            return whole if whole == value else float(value)
+        return value
+
+    def rows(self, sheet, start_row=0, start_col=0, stop_col=None):
+        worksheet = self.workbook[sheet]
+        # Dimensions saved by other tools can be wrong, as pd.read_excel notes
+        worksheet.reset_dimensions()
+        cells = worksheet.iter_rows(
+            min_row=start_row + 1, min_col=start_col + 1, max_col=stop_col
+        )
+        convert = self._convert
+        for row in cells:
+            yield [convert(cell) for cell in row]
+
+    def close(self):
+        self.workbook.close()
+
+
+class CalamineBackend(ExcelBackend):
+    """
+    The Rust calamine parser, through python-calamine.
+
+    A sheet is parsed natively in one go; only the requested columns are
+    converted to Python values.
+    """
+
+    name = "calamine"
+    module = "python_calamine"
+    requirement = "'format-order[calamine]'"
+
+    def __init__(self, path):
+        from python_calamine import CalamineWorkbook
+
+        self.workbook = CalamineWorkbook.from_object(path)
+        self._sheets = {}
+
+    @staticmethod
+    def _convert(value):
+        """Convert a cell as pandas' calamine reader does."""
+        if isinstance(value, float):
+            whole = int(value)
+            return whole if whole == value else value
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    def rows(self, sheet, start_row=0, start_col=0, stop_col=None):
+        if sheet not in self._sheets:
+            self._sheets[sheet] = self.workbook.get_sheet_by_name(sheet)
+        calamine_sheet = self._sheets[sheet]
+        if calamine_sheet.start is None:
+            return
+
+        # Rows start at the sheet's first row but columns at its first used
+        # column, so leading empty columns are put back
+        offset = calamine_sheet.start[1]
+        convert = self._convert
+        for row in itertools.islice(calamine_sheet.iter_rows(), start_row, None):
+            if offset:
+                row = [""] * offset + row
+            if stop_col is None:
+                yield [convert(value) for value in row[start_col:]]
+            else:
+                values = [convert(value) for value in row[start_col:stop_col]]
+                yield values + [""] * (stop_col - start_col - len(values))
+
+    def close(self):
+        self.workbook.close()
+
+
+# Parsing backends by name, in order of preference for "auto"
+EXCEL_BACKENDS: Dict[str, Type[ExcelBackend]] = {
+    "calamine": CalamineBackend,
+    "openpyxl": OpenpyxlBackend,
+}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """
+    Return the backend a read uses.
+
+    Args:
+        name: A key of EXCEL_BACKENDS, or "auto" for the first one installed
+
+    Returns:
+        str: The backend's name
+    """
+    if name == "auto":
+        for backend_name, backend in EXCEL_BACKENDS.items():
+            if backend.available():
+                return backend_name
+        raise ImportError("Reading workbooks needs openpyxl: pip install openpyxl")
+    if name not in EXCEL_BACKENDS:
+        raise ValueError(
+            f"Unknown Excel backend: {name} "
+            f"(choose from auto, {', '.join(EXCEL_BACKENDS)})"
+        )
+    if not EXCEL_BACKENDS[name].available():
+        backend = EXCEL_BACKENDS[name]
+        raise ImportError(
+            f"The {name} backend needs the {backend.module} package: "
+            f"pip install {backend.requirement}"
+        )
+    return name
+
+
+def read_sheet(
+    backend: ExcelBackend,
+    sheet: str,
+    header: int = 0,
+    usecols: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Parse one sheet, or only some of its columns.
+
+    The columns are looked up by name in the header row and only their cells
+    are converted; the values go through pandas' TextParser as in
+    pd.read_excel, so each row equals that row of pd.read_excel(...,
+    usecols=usecols). Rows after the last one with a value in the parsed
+    columns are dropped, even where other columns still have values; there
+    read_excel keeps them as rows of missing values.
+
+    Args:
+        backend: Open workbook
+        sheet: Sheet name
+        header: Row holding the column names, 0-based; rows above it are
+            skipped
+        usecols: Header names of the columns to parse, every column if None
+
+    Returns:
+        pd.DataFrame: The parsed columns, in sheet order
+
+    Raises:
+        ValueError: If a column in usecols is not in the header row
+    """
+    names = next(backend.rows(sheet, header), None)
+    if names is None:
+        return pd.DataFrame(columns=list(usecols or []))
+
+    if usecols is None:
+        data = [names] + list(backend.rows(sheet, header + 1))
+        # Trailing empty cells do not widen the frame
+        for row in data:
+            while row and row[-1] == "":
+                row.pop()
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+    else:
+        missing = [col for col in usecols if col not in names]
+        if missing:
+            raise ValueError(f"Columns not found in {sheet}: {missing}")
+        # The first column of a repeated name is the one read_excel names so
+        positions = sorted(names.index(col) for col in usecols)
+        start, stop = positions[0], positions[-1] + 1
+        offsets = [position - start for position in positions]
+
+        data = [[names[position] for position in positions]]
+        for row in backend.rows(sheet, header + 1, start, stop):
+            data.append([row[offset] for offset in offsets])
+
+    # Trailing empty rows are dropped, as read_excel does
+    last = len(data) - 1
+    while last > 0 and all(value == "" for value in data[last]):
+        last -= 1
+    del data[last + 1 :]
+
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+@dataclass
+class SheetTiming:
+    """Time taken to parse one sheet."""
+
+    workbook: str
+    sheet: str
+    rows: int
+    seconds: float
+
+
+@dataclass
+class WorkbookData:
+    """Sheets parsed from one workbook and the time each took."""
+
+    workbook: str
+    frames: Dict[str, pd.DataFrame]
+    open_seconds: float
+    timings: List[SheetTiming] = field(default_factory=list)
+    backend: str = ""
+
+    @property
+    def seconds(self) -> float:
+        """Total time spent opening the workbook and parsing its sheets."""
+        return self.open_seconds + sum(timing.seconds for timing in self.timings)
+
+
+def _workbook_name(path) -> str:
+    """Return a display name for a workbook path or file-like object."""
+    return (
+        os.path.basename(path) if isinstance(path, (str, os.PathLike)) else "<stream>"
+    )
+
+
+def read_workbook(path, sheets: Dict[str, Dict], backend: str = "auto") -> WorkbookData:
+    """
+    Open a workbook once and parse several sheets from that handle.
+
+    Args:
+        path: Workbook path or binary file-like object
+        sheets: Sheet names mapped to their read options, "header" and
+            "usecols" as in pd.read_excel
+        backend: A key of EXCEL_BACKENDS, or "auto" for the first installed
+
+    Returns:
+        WorkbookData: The parsed frames by sheet name and their timings
+    """
+    name = _workbook_name(path)
+    backend = resolve_backend(backend)
+    start = time.perf_counter()
+    with EXCEL_BACKENDS[backend](path) as workbook:
+        data = WorkbookData(
+            workbook=name,
+            frames={},
+            open_seconds=time.perf_counter() - start,
+            backend=backend,
+        )
+        for sheet, options in sheets.items():
+            start = time.perf_counter()
+            data.frames[sheet] = read_sheet(workbook, sheet, **options)
+            data.timings.append(
+                SheetTiming(
+                    workbook=name,
+                    sheet=sheet,
+                    rows=len(data.frames[sheet]),
+                    seconds=time.perf_counter() - start,
+                )
+            )
+
+    return data
+
+
+class WorkbookPool:
+    """
+    Reads workbooks concurrently, each opened once.
+
+    openpyxl parses in pure Python under the GIL, so the default "process"
+    executor is the one that overlaps two workbooks; "thread" only overlaps
+    file I/O and "serial" reads each workbook as it is submitted. Process
+    workers come from a forkserver that has imported this module, so they
+    start quickly without forking a parent that may be running threads;
+    "fork" forks the caller directly, which is faster still but only safe in
+    single-threaded programs. With a single CPU the process executors fall
+    back to serial reads.
+    """
+
+    def __init__(self, executor: str = "process", max_workers: int = 2):
+        """
+        Initialize the pool; workers are started on the first submit.
+
+        Args:
+            executor: "process", "fork", "thread" or "serial"
+            max_workers: Most workbooks read at once
+        """
+        if executor not in LOAD_EXECUTORS:
+            raise ValueError(f"Unknown load executor: {executor}")
+        if executor in ("process", "fork") and (os.cpu_count() or 1) < 2:
+            logger.debug("Single CPU, reading workbooks serially")
+            executor = "serial"
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _start(self):
+        """Return the underlying executor, starting it if needed."""
+        if self._pool is None and self.executor == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        elif self._pool is None:
+            if self.executor == "fork":
+                mp_context = multiprocessing.get_context("fork")
+            elif "forkserver" in multiprocessing.get_all_start_methods():
+                # The server imports pandas once; workers fork from it
+                mp_context = multiprocessing.get_context("forkserver")
+                mp_context.set_forkserver_preload([__name__])
+            else:
+                mp_context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=mp_context
+            )
+        return self._pool
+
+    def submit(
+        self, path, sheets: Dict[str, Dict], backend: str = "auto"
+    ) -> "Future[WorkbookData]":
+        """
+        Start reading a workbook.
+
+        Args:
+            path: Workbook path or binary file-like object
+            sheets: Sheet names mapped to their read options
+            backend: A key of EXCEL_BACKENDS, or "auto"
+
+        Returns:
+            Future[WorkbookData]: The workbook's frames and timings
+        """
+        if self.executor != "serial":
+            return self._start().submit(read_workbook, path, sheets, backend)
+
+        future = Future()
+        try:
+            future.set_result(read_workbook(path, sheets, backend))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Shut the workers down, dropping reads that have not started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "WorkbookPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(wait=exc_type is None)
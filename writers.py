@@ -0,0 +1,296 @@
+import bz2
+import gzip
+import logging
+import lzma
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from compact import restore_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Stdlib openers for compressed CSV, by compression name
+CSV_OPENERS: Dict[Optional[str], Callable] = {
+    None: open,
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+CSV_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+@dataclass
+class WriteResult:
+    """Outcome of writing one output file."""
+
+    path: str
+    format: str
+    rows: int
+    bytes_written: int
+    seconds: float
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Yield consecutive row slices of at most chunk_rows rows."""
+    chunk_rows = max(int(chunk_rows), 1)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start : start + chunk_rows]
+
+
+def _finish(path: str, fmt: str, rows: int, start: float) -> WriteResult:
+    """Build and log the result of a finished write."""
+    result = WriteResult(
+        path=path,
+        format=fmt,
+        rows=rows,
+        bytes_written=os.path.getsize(path),
+        seconds=time.perf_counter() - start,
+    )
+    logger.info(
+        f"Data saved to {path} ({fmt}, {result.rows} rows, "
+        f"{result.bytes_written} bytes in {result.seconds:.2f}s)"
+    )
+    return result
+
+
+def _arrow_ready(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make every column convertible to Arrow.
+
+    Arrow columns hold a single type, so text columns mixing Python types
+    (deal numbers such as 1234 next to "1234-1") are written as strings.
+    """
+    fixed = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if not pd.api.types.infer_dtype(series.cat.categories).startswith("mixed"):
+                continue
+            series = series.astype(object)
+        elif series.dtype != object:
+            continue
+
+        if pd.api.types.infer_dtype(series, skipna=True).startswith("mixed"):
+            fixed[col] = series.astype(str).where(series.notna(), None)
+
+    return df.assign(**fixed) if fixed else df
+
+
+def _require_pyarrow(fmt: str) -> None:
+    """Fail with an install hint if pyarrow, needed for Arrow output, is missing."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            f"{fmt} output needs the pyarrow package: "
+            "pip install 'format-order[parquet]'"
+        ) from e
+
+
+def _arrow_schema(df: pd.DataFrame):
+    """Infer the Arrow schema of the whole frame, so every chunk shares it."""
+    import pyarrow as pa
+
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+
+def write_parquet(
+    df: pd.DataFrame,
+    path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    compression: str = "snappy",
+) -> WriteResult:
+    """
+    Write a frame as Parquet, one row group per chunk.
+
+    Categorical columns are stored dictionary-encoded and read back as
+    categoricals.
+
+    Args:
+        df: Frame to write
+        path: Output path
+        chunk_rows: Rows per row group
+        compression: Parquet compression codec
+
+    Returns:
+        WriteResult: Rows, bytes written and time taken
+    """
+    _require_pyarrow("Parquet")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    start = time.perf_counter()
+    df = _arrow_ready(df)
+    schema = _arrow_schema(df)
+
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+        if df.empty:
+            writer.write_table(schema.empty_table())
+
+    return _finish(path, "parquet", len(df), start)
+
+
+def write_feather(
+    df: pd.DataFrame,
+    path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    compression: Optional[str] = "lz4",
+) -> WriteResult:
+    """
+    Write a frame as an Arrow IPC (Feather v2) file, one batch per chunk.
+
+    Args:
+        df: Frame to write
+        path: Output path
+        chunk_rows: Rows per record batch
+        compression: "lz4", "zstd" or None
+
+    Returns:
+        WriteResult: Rows, bytes written and time taken
+    """
+    _require_pyarrow("Feather")
+    import pyarrow as pa
+
+    start = time.perf_counter()
+    df = _arrow_ready(df)
+    schema = _arrow_schema(df)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            for chunk in _chunks(df, chunk_rows):
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                )
+
+    return _finish(path, "feather", len(df), start)
+
+
+def write_csv(
+    df: pd.DataFrame,
+    path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    compression: Optional[str] = "infer",
+) -> WriteResult:
+    """
+    Write a frame as CSV, optionally compressed, one chunk at a time.
+
+    The decompressed text is the same as DataFrame.to_csv(index=False).
+
+    Args:
+        df: Frame to write
+        path: Output path
+        chunk_rows: Rows formatted per write
+        compression: "gzip", "bz2", "xz", None, or "infer" from the extension
+
+    Returns:
+        WriteResult: Rows, bytes written (compressed) and time taken
+    """
+    if compression == "infer":
+        compression = CSV_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if compression not in CSV_OPENERS:
+        raise ValueError(f"Unsupported CSV compression: {compression}")
+
+    start = time.perf_counter()
+    with CSV_OPENERS[compression](path, "wt", encoding="utf-8", newline="") as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            restore_frame(chunk).to_csv(f, index=False, header=i == 0)
+
+    return _finish(path, f"csv.{compression}" if compression else "csv", len(df), start)
+
+
+def write_xlsx(
+    df: pd.DataFrame,
+    path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    sheet_name: str = "final_order",
+) -> WriteResult:
+    """
+    Write a frame as an xlsx workbook with openpyxl's write-only mode.
+
+    Rows are streamed to the workbook as they are appended, so memory stays
+    bounded by one chunk.
+
+    Args:
+        df: Frame to write
+        path: Output path
+        chunk_rows: Rows converted per step
+        sheet_name: Worksheet name
+
+    Returns:
+        WriteResult: Rows, bytes written and time taken
+    """
+    from openpyxl import Workbook
+
+    start = time.perf_counter()
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append([str(col) for col in df.columns])
+
+    for chunk in _chunks(df, chunk_rows):
+        # Missing values become empty cells; tolist() yields Python scalars
+        values = restore_frame(chunk).astype(object)
+        for row in values.where(values.notna(), None).to_numpy().tolist():
+            worksheet.append(row)
+
+    workbook.save(path)
+    return _finish(path, "xlsx", len(df), start)
+
+
+# Writers by format name, and the formats implied by file extensions
+WRITERS: Dict[str, Callable[..., WriteResult]] = {
+    "parquet": write_parquet,
+    "feather": write_feather,
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+}
+FORMAT_EXTENSIONS = {
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".csv": "csv",
+    ".gz": "csv",
+    ".bz2": "csv",
+    ".xz": "csv",
+    ".xlsx": "xlsx",
+}
+
+
+def write_output(
+    df: pd.DataFrame,
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    **options,
+) -> WriteResult:
+    """
+    Write a frame in the given format, or the one implied by the extension.
+
+    Args:
+        df: Frame to write
+        path: Output path
+        fmt: "parquet", "feather", "csv" or "xlsx", inferred if None
+        chunk_rows: Rows per chunk
+        **options: Passed through to the format's writer
+
+    Returns:
+        WriteResult: Rows, bytes written and time taken
+    """
+    if fmt is None:
+        fmt = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported output format for {path}: {fmt}")
+
+    return WRITERS[fmt](df, path, chunk_rows=chunk_rows, **options)